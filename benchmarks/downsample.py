@@ -0,0 +1,55 @@
+"""Benchmark the time to down-sample a frame one at a time and in batches."""
+import argparse
+import timeit
+from os.path import abspath, dirname, join
+from sys import path
+import numpy as np
+# add the parent directory to the path so we can import `src`
+path.append(abspath(join(dirname(__file__), '..')))
+from src.environment.wrappers.downsample_env import downsample
+# import OpenCV after `src`, its loader replaces `sys.path`
+import cv2
+
+
+def nes_frames(count: int) -> np.ndarray:
+    """Return a batch of frames of NES sized blocks of palette colors."""
+    palette = np.random.randint(0, 256, (54, 3), dtype=np.uint8)
+    indexes = np.random.randint(0, len(palette), (count, 30, 32))
+    # scale the indexes up into 8x8 tiles like the NES background
+    return palette[indexes.repeat(8, axis=1).repeat(8, axis=2)]
+
+
+def per_frame(frames: np.ndarray, image_size: tuple) -> list:
+    """Down-sample frames one at a time (DownsampleEnv before batching)."""
+    return [
+        cv2.resize(cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY), image_size)[:, :, np.newaxis]
+        for frame in frames
+    ]
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    np.random.seed(1)
+    image_size = (84, 84)
+    for count in [1, 8, 32]:
+        frames = nes_frames(count)
+        out = np.empty((count, *image_size, 1), dtype=np.uint8)
+        expected = np.stack(per_frame(frames, image_size))
+        if not np.array_equal(expected, downsample(frames, image_size, out)):
+            raise ValueError('batched frames differ from single frames')
+        methods = [
+            ('per frame', lambda: per_frame(frames, image_size)),
+            ('batched', lambda: downsample(frames, image_size, out=out)),
+        ]
+        for name, method in methods:
+            time = min(timeit.repeat(method, number=args.number, repeat=args.repeat))
+            time = 1e6 * time / args.number / count
+            print('{:>3} frames {:<10} {:8.2f} µs/frame'.format(count, name, time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark actors that predict alone against actors of an inference server."""
+import argparse
+import multiprocessing
+import timeit
+from functools import partial
+from os.path import abspath, dirname, join
+from sys import path
+import numpy as np
+# add the parent directory to the path so we can import `src`
+path.append(abspath(join(dirname(__file__), '..')))
+from src.agents.inference_server import InferenceServer
+from src.models import build_deep_q_model
+
+
+def model_fn(num_actions: int):
+    """Build the Q network of the benchmark."""
+    return build_deep_q_model(num_actions=num_actions)
+
+
+def act_alone(num_actions: int, steps: int, seed: int, results) -> None:
+    """Predict actions with a network of the actor (in a process)."""
+    model = model_fn(num_actions)
+    mask = np.ones((1, num_actions), dtype=np.float32)
+    states = np.random.RandomState(seed).randint(0, 256, (steps, 84, 84, 4), dtype=np.uint8)
+    start = timeit.default_timer()
+    for state in states:
+        np.argmax(model.predict([state[np.newaxis], mask]))
+    results.put(timeit.default_timer() - start)
+
+
+def act_with_server(client, steps: int, seed: int, results) -> None:
+    """Predict actions with a client of an inference server (in a process)."""
+    states = np.random.RandomState(seed).randint(0, 256, (steps, 84, 84, 4), dtype=np.uint8)
+    start = timeit.default_timer()
+    for state in states:
+        client.predict(state)
+    results.put(timeit.default_timer() - start)
+    client.close()
+
+
+def run(target, args_fn, actors: int) -> float:
+    """Run actors in processes and return the longest time of an actor."""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [
+        context.Process(target=target, args=(*args_fn(index), index, results))
+        for index in range(actors)
+    ]
+    for process in processes:
+        process.start()
+    times = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return max(times)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--actors', type=int, default=8)
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--num_actions', type=int, default=6)
+    parser.add_argument('--max_latency', type=float, default=0.002)
+    args = parser.parse_args()
+    time = run(act_alone, lambda _: (args.num_actions, args.steps), args.actors)
+    print('{:<15} {:10.1f} actions/s'.format('alone', args.actors * args.steps / time))
+    server = InferenceServer(partial(model_fn, args.num_actions), (84, 84, 4),
+        args.num_actions, args.actors,
+        max_latency=args.max_latency,
+    )
+    time = run(act_with_server, lambda index: (server.client(index), args.steps), args.actors)
+    print('{:<15} {:10.1f} actions/s'.format('server', args.actors * args.steps / time))
+    metrics = server.metrics()
+    print('batches: {}, fill rate: {:.2f}, mean latency: {:.2f} ms'.format(
+        metrics['batches'],
+        metrics['fill_rate'],
+        1e3 * metrics['mean_latency'],
+    ))
+    server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark MaxFrameskipEnv against the wrapper that copies every screen."""
+import argparse
+import timeit
+from os.path import abspath, dirname, join
+from sys import path
+import gym
+import numpy as np
+# add the parent directory to the path so we can import `src`
+path.append(abspath(join(dirname(__file__), '..')))
+from src.environment.wrappers import MaxFrameskipEnv
+
+
+class CopyingMaxFrameskipEnv(MaxFrameskipEnv):
+    """The MaxFrameskipEnv before it skipped screens and reused buffers."""
+
+    def step(self, action):
+        total_reward = 0.0
+        done = None
+        for i in range(self._skip):
+            obs, reward, done, info = self.env.step(action)
+            total_reward += reward
+            if i == self._skip - 2:
+                self._obs_buffer[0] = obs
+            if i == self._skip - 1:
+                self._obs_buffer[1] = obs
+            if done:
+                break
+        max_frame = self._obs_buffer.max(axis=0)
+
+        return max_frame, total_reward, done, info
+
+
+def play(env: gym.Env, actions: np.ndarray) -> list:
+    """Play a list of actions and return the observations."""
+    env.seed(1)
+    observations = [np.array(env.reset())]
+    for action in actions:
+        obs, _, done, _ = env.step(action)
+        observations.append(np.array(obs))
+        if done:
+            observations.append(np.array(env.reset()))
+    return observations
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--env', type=str, default='PongNoFrameskip-v4')
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    np.random.seed(1)
+    actions = np.random.randint(0, gym.make(args.env).action_space.n, args.steps)
+    envs = [
+        ('copying', CopyingMaxFrameskipEnv(gym.make(args.env))),
+        ('skip screens', MaxFrameskipEnv(gym.make(args.env))),
+    ]
+    # the wrappers must produce the same observations frame for frame
+    expected = play(envs[0][1], actions)
+    for name, env in envs[1:]:
+        for index, (obs, other) in enumerate(zip(expected, play(env, actions))):
+            if not np.array_equal(obs, other):
+                raise ValueError('{} differs at observation {}'.format(name, index))
+    for name, env in envs:
+        time = min(timeit.repeat(lambda: play(env, actions), number=1, repeat=args.repeat))
+        print('{:<15} {:8.2f} µs/step'.format(name, 1e6 * time / args.steps))
+
+
+if __name__ == '__main__':
+    main()
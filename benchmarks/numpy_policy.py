@@ -0,0 +1,78 @@
+"""Benchmark the startup, memory, and latency of the Keras and NumPy policies."""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname, join
+# add the parent directory to the path so we can import `src`
+sys.path.append(abspath(join(dirname(__file__), '..')))
+
+
+def keras_policy(weights: str, dueling: bool):
+    """Build the models of `play` and return their policy."""
+    from src.models import build_deep_q_model
+    from src.models import build_dueling_deep_q_model
+    from src.models import build_policy_function
+    from src.models import export_numpy_weights
+    build = build_dueling_deep_q_model if dueling else build_deep_q_model
+    # `play` builds the online and the target model
+    model, _ = build(), build()
+    if not os.path.exists(weights):
+        export_numpy_weights(model, weights)
+    return build_policy_function(model)
+
+
+def numpy_policy(weights: str, dueling: bool):
+    """Load the NumPy policy of `play --numpy`."""
+    from src.base import NumPyPolicy
+    return NumPyPolicy(weights)
+
+
+def child(args) -> None:
+    """Time the steps of a policy in a fresh process."""
+    import numpy as np
+    policy = {'keras': keras_policy, 'numpy': numpy_policy}[args.child](args.weights, args.dueling)
+    states = np.random.randint(0, 256, (args.steps, 1, 84, 84, 4), dtype=np.uint8)
+    policy(states[0])
+    print('{:.3f}'.format(time.time() - args.start))
+    print('tensorflow' in sys.modules)
+    start = time.time()
+    for state in states:
+        policy(state)
+    print('{:.1f}'.format(1e6 * (time.time() - start) / args.steps))
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--dueling', action='store_true')
+    parser.add_argument('--child', choices=['keras', 'numpy'])
+    parser.add_argument('--weights', type=str)
+    parser.add_argument('--start', type=float)
+    args = parser.parse_args()
+    if args.child is not None:
+        return child(args)
+    with tempfile.TemporaryDirectory() as directory:
+        weights = join(directory, 'weights.npz')
+        # the Keras process writes the weights for the NumPy process
+        for name in ['keras', 'numpy']:
+            command = [sys.executable, __file__, '--child', name,
+                '--weights', weights,
+                '--steps', str(args.steps),
+                '--start', repr(time.time()),
+            ] + (['--dueling'] if args.dueling else [])
+            process = subprocess.Popen(command, stdout=subprocess.PIPE)
+            output = process.stdout.read().decode().split()
+            # the resources of this child only (kilobytes on Linux)
+            _, _, usage = os.wait4(process.pid, 0)
+            startup, tensorflow, latency = output[-3:]
+            print('{:<8} startup {:>7} s  max RSS {:7.1f} MB  TensorFlow {:<5}  {:>8} µs/action'.format(
+                name, startup, usage.ru_maxrss / 1024, tensorflow, latency
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Benchmark the latency of an action with `predict` and the policy function."""
+import argparse
+import timeit
+from os.path import abspath, dirname, join
+from sys import path
+import numpy as np
+# add the parent directory to the path so we can import `src`
+path.append(abspath(join(dirname(__file__), '..')))
+from src.models import build_deep_q_model
+from src.models import build_dueling_deep_q_model
+from src.models import build_policy_function
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--num_actions', type=int, default=6)
+    parser.add_argument('--dueling', action='store_true')
+    args = parser.parse_args()
+    np.random.seed(1)
+    build = build_dueling_deep_q_model if args.dueling else build_deep_q_model
+    model = build(num_actions=args.num_actions)
+    policy = build_policy_function(model)
+    mask = np.ones((1, args.num_actions), dtype=np.float32)
+    states = np.random.randint(0, 256, (args.steps, 1, 84, 84, 4), dtype=np.uint8)
+    methods = [
+        ('predict', lambda s: np.argmax(model.predict([s, mask]), axis=1)),
+        ('predict_on_batch', lambda s: np.argmax(model.predict_on_batch([s, mask]), axis=1)),
+        ('policy', policy),
+    ]
+    # the methods must select the same actions state for state
+    expected = [methods[0][1](state) for state in states]
+    for name, method in methods[1:]:
+        for index, state in enumerate(states):
+            if not np.array_equal(expected[index], method(state)):
+                raise ValueError('{} differs at state {}'.format(name, index))
+    for name, method in methods:
+        time = min(timeit.repeat(lambda: [method(s) for s in states], number=1, repeat=3))
+        print('{:<20} {:8.1f} µs/action'.format(name, 1e6 * time / args.steps))
+
+
+if __name__ == '__main__':
+    main()
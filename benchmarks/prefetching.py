@@ -0,0 +1,56 @@
+"""Benchmark the time of a training cycle with and without prefetching."""
+import argparse
+import time
+import timeit
+from os.path import abspath, dirname, join
+from sys import path
+import numpy as np
+# add the parent directory to the path so we can import `src`
+path.append(abspath(join(dirname(__file__), '..')))
+from src.base import CompressedReplayQueue
+from src.base import FrameReplayQueue
+from src.base import PrefetchingReplayQueue
+from benchmarks.replay_queue import trajectory
+
+
+def benchmark(name: str, queue, args: argparse.Namespace) -> None:
+    """Fill a queue and print the time of a training cycle with it."""
+    for experience in trajectory(args.size, flat=True):
+        queue.push(*experience)
+    experiences = trajectory(args.cycles * args.update_frequency, flat=True)
+    start = timeit.default_timer()
+    for _ in range(args.cycles):
+        # act in the environment between updates
+        for _ in range(args.update_frequency):
+            queue.push(*next(experiences))
+        batch = queue.sample(size=32)
+        # the training step releases the GIL while the network trains
+        time.sleep(args.train_ms / 1000)
+    cycle = (timeit.default_timer() - start) / args.cycles
+    print('{:<40} cycle: {:8.2f} ms'.format(name, 1e3 * cycle))
+    if isinstance(queue, PrefetchingReplayQueue):
+        queue.close()
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=10000)
+    parser.add_argument('--cycles', type=int, default=200)
+    parser.add_argument('--update_frequency', type=int, default=4)
+    parser.add_argument('--train_ms', type=float, default=5,
+        help='the time of a training step on the network')
+    args = parser.parse_args()
+    np.random.seed(1)
+    queues = [
+        ('FrameReplayQueue', FrameReplayQueue(args.size)),
+        ('Prefetching(FrameReplayQueue)', PrefetchingReplayQueue(FrameReplayQueue(args.size))),
+        ('CompressedReplayQueue', CompressedReplayQueue(args.size)),
+        ('Prefetching(CompressedReplayQueue)', PrefetchingReplayQueue(CompressedReplayQueue(args.size))),
+    ]
+    for name, queue in queues:
+        benchmark(name, queue, args)
+
+
+if __name__ == '__main__':
+    main()
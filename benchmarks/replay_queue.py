@@ -0,0 +1,102 @@
+"""Benchmark the memory and speed of the replay queues."""
+import argparse
+import tempfile
+import timeit
+from os.path import abspath, dirname, join
+from sys import path
+import numpy as np
+# add the parent directory to the path so we can import `src`
+path.append(abspath(join(dirname(__file__), '..')))
+from src.base import CompressedReplayQueue
+from src.base import FrameReplayQueue
+from src.base import MemmapReplayQueue
+from src.base import ReplayQueue
+
+
+def trajectory(length: int, episode_length: int=500, k: int=4, flat: bool=False):
+    """
+    Yield experiences from random frame stacked episodes.
+
+    Args:
+        length: the number of experiences to yield
+        episode_length: the number of experiences per episode
+        k: the number of frames per stack
+        flat: whether to use frames of flat color blocks (like the
+            backgrounds of NES games) instead of random noise
+
+    Returns:
+        a generator of (s, a, r, d, s2) tuples
+
+    """
+    frames = np.random.randint(0, 256, (64, 84, 84), dtype=np.uint8)
+    if flat:
+        # scale up 12x12 frames of noise into 7x7 blocks of flat color
+        frames = np.random.randint(0, 8, (64, 12, 12), dtype=np.uint8) * 32
+        frames = frames.repeat(7, axis=1).repeat(7, axis=2)
+    for index in range(length):
+        step = index % episode_length
+        if step == 0:
+            stack = [frames[index % 64]] * k
+            s2 = np.stack(stack, axis=2)
+        s = s2
+        stack = stack[1:] + [frames[(index + 1) % 64]]
+        s2 = np.stack(stack, axis=2)
+        yield s, np.random.randint(6), 0, step == episode_length - 1, s2
+
+
+def replay_queue_nbytes(queue: ReplayQueue) -> int:
+    """Return the number of bytes in the arrays of a ReplayQueue."""
+    experiences = filter(None, queue.queue)
+    return sum(e[0].nbytes + e[4].nbytes + 3 for e in experiences)
+
+
+def benchmark(name: str, queue, size: int, repeat: int, flat: bool) -> None:
+    """Fill a queue and print the time to sample from it."""
+    push = timeit.default_timer()
+    for experience in trajectory(size, flat=flat):
+        queue.push(*experience)
+    push = timeit.default_timer() - push
+    sample = min(timeit.repeat(queue.sample, number=repeat, repeat=3)) / repeat
+    # sample into reusable arrays
+    out = queue.empty_batch(32)
+    sample_out = timeit.repeat(lambda: queue.sample(32, out=out), number=repeat, repeat=3)
+    sample_out = min(sample_out) / repeat
+    if isinstance(queue, ReplayQueue):
+        nbytes = replay_queue_nbytes(queue)
+    else:
+        nbytes = queue.nbytes
+    template = '{:<34} push: {:8.2f} us  sample(32): {:8.2f} us  ' \
+        'sample(32, out): {:8.2f} us  memory: {:8.1f} MB'
+    print(template.format(
+        name,
+        1e6 * push / size,
+        1e6 * sample,
+        1e6 * sample_out,
+        nbytes / 2**20,
+    ))
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--flat', action='store_true',
+        help='use frames of flat color blocks instead of random noise')
+    args = parser.parse_args()
+    np.random.seed(1)
+    queues = [
+        ('ReplayQueue', ReplayQueue(args.size)),
+        ('FrameReplayQueue', FrameReplayQueue(args.size)),
+        ('CompressedReplayQueue', CompressedReplayQueue(args.size)),
+        ('CompressedReplayQueue(workers=0)', CompressedReplayQueue(args.size, workers=0)),
+    ]
+    for name, queue in queues:
+        benchmark(name, queue, args.size, args.repeat, args.flat)
+    with tempfile.TemporaryDirectory() as directory:
+        queue = MemmapReplayQueue(args.size, directory)
+        benchmark('MemmapReplayQueue', queue, args.size, args.repeat, args.flat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark the updates per second of train_on_batch and the fused step."""
+import argparse
+import timeit
+from os.path import abspath, dirname, join
+from sys import path
+import numpy as np
+# add the parent directory to the path so we can import `src`
+path.append(abspath(join(dirname(__file__), '..')))
+from src.models import build_deep_q_model
+from src.models import build_target_update_function
+from src.models import build_train_function
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--updates', type=int, default=100)
+    parser.add_argument('--batch_size', type=int, default=32)
+    parser.add_argument('--num_actions', type=int, default=6)
+    parser.add_argument('--xla', action='store_true')
+    args = parser.parse_args()
+    np.random.seed(1)
+    size, n = args.batch_size, args.num_actions
+    model = build_deep_q_model(num_actions=n)
+    target_model = build_deep_q_model(num_actions=n)
+    s = np.random.randint(0, 256, (size, 84, 84, 4), dtype=np.uint8)
+    a = np.random.randint(0, n, size).astype(np.uint8)
+    r = np.random.normal(size=size).astype(np.float32)
+    d = np.random.random(size) < 0.1
+    s2 = np.random.randint(0, 256, (size, 84, 84, 4), dtype=np.uint8)
+    w = np.ones(size, dtype=np.float32)
+    ones = np.ones((size, n), dtype=np.float32)
+    eye = np.eye(n, dtype=np.float32)
+
+    def replay():
+        """Train with targets from NumPy like `DeepQAgent._replay`."""
+        Q = np.max(target_model.predict_on_batch([s2, ones]), axis=1)
+        Q[d] = 0
+        y = np.zeros((size, n), dtype=np.float32)
+        y[range(size), a] = r + 0.99 * Q
+        return model.train_on_batch([s, eye[a]], y)
+
+    train = build_train_function(model, target_model, jit_compile=args.xla)
+    update_target = build_target_update_function(model, target_model)
+    methods = [
+        ('train_on_batch', replay),
+        ('fused step', lambda: train(s, a, r, d, s2, w)),
+        ('set_weights', lambda: target_model.set_weights(model.get_weights())),
+        ('update_target', update_target),
+    ]
+    for name, method in methods:
+        method()
+        time = min(timeit.repeat(method, number=args.updates, repeat=3))
+        print('{:<20} {:8.1f} calls/s'.format(name, args.updates / time))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,15 @@
 """A package with implementations of deep reinforcement agents."""
+from .policy_agent import PolicyAgent
 from .random_agent import RandomAgent
-from .deep_q_agent import DeepQAgent
+
+
+# importing Keras takes seconds and hundreds of MB, i.e., the agents that
+# play without a Keras model are free of it. import the DeepQAgent from its
+# module, `src.agents.deep_q_agent`
 
 
 # explicitly define the outward facing API of this package.
 __all__ = [
-    RandomAgent.__class__,
-    DeepQAgent.__class__,
+    PolicyAgent.__name__,
+    RandomAgent.__name__,
 ]
@@ -1,6 +1,8 @@
 """An abstract base class for reinforcement agents."""
+from typing import Callable
 import gym
 import numpy as np
+from tqdm import tqdm
 
 
 class Agent(object):
@@ -68,6 +70,78 @@ class Agent(object):
 
         return state, reward, done
 
+    def _play_parallel(self,
+        games: int,
+        env_fn: Callable,
+        num_workers: int,
+        select_actions: Callable,
+    ) -> np.ndarray:
+        """
+        Play games in environments in parallel worker processes.
+
+        Notes:
+            Each worker plays games one after another, the games are
+            numbered in the order they start. The real scores of the games
+            (the `episode_rewards` of each worker) are appended to the
+            `episode_rewards` of `self.env` in game order, i.e., the results
+            of `self.env` are the same as if it had played the games
+
+        Args:
+            games: the number of games to play
+            env_fn: a picklable function that builds an environment, e.g.,
+                `functools.partial(setup_env, env_id)`
+            num_workers: the number of worker processes
+            select_actions: a function of the batch of the states of the
+                workers that returns the action of each worker
+
+        Returns:
+            an array of scores, one for each game
+
+        """
+        # these are only used by parallel play, import here
+        from src.environment.vec_env import VecEnv
+        vec_env = VecEnv(env_fn, min(num_workers, games))
+        # the progress bar for the operation
+        progress = tqdm(total=games, unit='game')
+        progress.set_postfix(score='?')
+        # the scores of the games and the running score of each worker
+        scores = np.zeros(games)
+        running = np.zeros(vec_env.num_envs)
+        # the games each worker has started, games past the number to play
+        # keep the workers busy until the last game ends
+        started = [[game] for game in range(vec_env.num_envs)]
+        next_game = vec_env.num_envs
+        finished = 0
+        try:
+            states = vec_env.reset()
+            while finished < games:
+                states, rewards, dones, _ = vec_env.step(select_actions(states))
+                running += rewards
+                for index in np.flatnonzero(dones):
+                    game = started[index][-1]
+                    if game < games:
+                        scores[game] = running[index]
+                        finished += 1
+                        # update the progress bar
+                        progress.set_postfix(score=running[index])
+                        progress.update(1)
+                    running[index] = 0
+                    started[index].append(next_game)
+                    next_game += 1
+            # collect the real scores of the games in order
+            episode_rewards = np.zeros(games)
+            worker_rewards = vec_env.get_attr('episode_rewards')
+            for worker_games, rewards in zip(started, worker_rewards):
+                for game, reward in zip(worker_games, rewards):
+                    if game < games:
+                        episode_rewards[game] = reward
+        finally:
+            progress.close()
+            vec_env.close()
+        self.env.unwrapped.episode_rewards.extend(episode_rewards.tolist())
+
+        return scores
+
 
 # explicitly define the outward facing API of this module
 __all__ = [Agent.__name__]
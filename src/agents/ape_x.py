@@ -0,0 +1,369 @@
+"""Actor processes that experience environments for an Ape-X learner."""
+import multiprocessing
+import os
+import queue
+from typing import Callable
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+
+def exploration_rates(num_actors: int, epsilon: float=0.4, alpha: float=7) -> np.ndarray:
+    """
+    Return the exploration rate of each actor of Ape-X.
+
+    Notes:
+        The actor at index i explores with ε^(1 + α * i / (N - 1)), i.e.,
+        the rates are spread from ε down to ε^(1 + α) (Horgan et al. 2018)
+
+    Args:
+        num_actors: the number of actors, N
+        epsilon: the exploration rate of the first actor, ε
+        alpha: the exponent, α, that spreads the rates of the actors
+
+    Returns:
+        an array with the exploration rate of each actor
+
+    """
+    if num_actors == 1:
+        return np.array([epsilon])
+    return epsilon**(1 + alpha * np.arange(num_actors) / (num_actors - 1))
+
+
+def _encode(segment: list, values: np.ndarray, discount_factor: float) -> tuple:
+    """
+    Encode a segment of consecutive experiences to send to the learner.
+
+    Args:
+        segment: the list of consecutive (s, a, r, d, s2) experiences
+        values: the Q values of each state of the segment and the next
+            state of its last experience
+        discount_factor: the discount factor, γ, of the TD-errors
+
+    Returns:
+        a tuple of:
+            - the frames of the segment, i.e., the frames of the first state
+              followed by the newest frame of each next state
+            - the action of each experience
+            - the reward of each experience
+            - the done flag of each experience
+            - the (one-step) TD-error of each experience
+
+    """
+    states, actions, rewards, dones, next_states = zip(*segment)
+    actions = np.array(actions, dtype=np.uint8)
+    rewards = np.array(rewards, dtype=np.float32)
+    dones = np.array(dones, dtype=np.bool_)
+    frames = np.concatenate([
+        np.moveaxis(states[0], -1, 0),
+        np.array([next_state[..., -1] for next_state in next_states]),
+    ])
+    # the initial priorities are the TD-errors of the Q values of the actor
+    Q = values[np.arange(len(actions)), actions]
+    Q_t = np.max(values[1:], axis=1)
+    Q_t[dones] = 0
+    td_errors = rewards + discount_factor * Q_t - Q
+
+    return frames, actions, rewards, dones, td_errors.astype(np.float32)
+
+
+def _actor(
+    index: int,
+    env_fn: Callable,
+    model_fn: Callable,
+    exploration_rate: float,
+    discount_factor: float,
+    segment_length: int,
+    weights,
+    version,
+    segments,
+    stop,
+    seed: int,
+) -> None:
+    """
+    Run an actor in a worker process.
+
+    Args:
+        index: the index of the actor
+        env_fn: a (picklable) function that builds the environment
+        model_fn: a (picklable) function that builds the Q network
+        exploration_rate: the epsilon for epsilon greedy exploration
+        discount_factor: the discount factor, γ, of the TD-errors
+        segment_length: the max number of experiences in a segment
+        weights: the shared array of the flat weights of the learner
+        version: the shared version of the weights
+        segments: the queue to put segments of experiences on
+        stop: the event that stops the actor
+        seed: the seed for the actor (None to leave it unseeded)
+
+    Returns:
+        None
+
+    """
+    # the copy of the network acts on the CPU, the learner has the GPU
+    os.environ['CUDA_VISIBLE_DEVICES'] = ''
+    # import Keras after hiding the GPU, i.e., the module of the actors
+    # imports without TensorFlow
+    from src.models import build_policy_function
+    env = env_fn()
+    if seed is not None:
+        env.seed(seed + index)
+        env.action_space.seed(seed + index)
+        np.random.seed(seed + index)
+    model = model_fn()
+    policy = build_policy_function(model)
+    shapes = [w.shape for w in model.get_weights()]
+    splits = np.cumsum([int(np.prod(shape)) for shape in shapes])[:-1]
+    model_version = None
+    # the experiences of the current segment and the scores of the episodes
+    # that ended since the last segment was sent
+    segment = []
+    scores = []
+    score = 0
+    state = env.reset()
+    try:
+        while not stop.is_set():
+            # copy the newest weights of the learner to the local network
+            if version.value != model_version:
+                with weights.get_lock():
+                    model_version = version.value
+                    flat = np.frombuffer(weights.get_obj(), dtype=np.float32).copy()
+                parts = np.split(flat, splits)
+                model.set_weights([p.reshape(s) for p, s in zip(parts, shapes)])
+            if np.random.random() < exploration_rate:
+                action = env.action_space.sample()
+            else:
+                action = policy(state[np.newaxis])[0]
+            next_state, reward, done, _ = env.step(action)
+            score += reward
+            segment.append((state, action, reward, done, next_state))
+            state = next_state
+            if done:
+                scores.append(score)
+                score = 0
+                state = env.reset()
+            # segments end with their episode, i.e., they're consecutive
+            if not done and len(segment) < segment_length:
+                continue
+            states = np.array([s for s, *_ in segment] + [segment[-1][-1]])
+            masks = np.ones((len(states), env.action_space.n), dtype=np.float32)
+            values = model.predict_on_batch([states, masks])
+            message = (index, *_encode(segment, values, discount_factor), scores)
+            # wait for room on the queue unless the actor is stopped
+            while not stop.is_set():
+                try:
+                    segments.put(message, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            segment = []
+            scores = []
+    except KeyboardInterrupt:
+        pass
+    finally:
+        env.close()
+
+
+class ApeXActors(object):
+    """Actor processes that experience environments for an Ape-X learner."""
+
+    def __init__(self,
+        env_fn: Callable,
+        model_fn: Callable,
+        num_weights: int,
+        num_actors: int,
+        rates: np.ndarray=None,
+        discount_factor: float=0.99,
+        segment_length: int=64,
+        max_segments: int=None,
+        seed: int=None,
+        start_method: str='spawn',
+    ) -> None:
+        """
+        Initialize a new pool of actors.
+
+        Notes:
+            Each actor plays its own environment with a CPU copy of the Q
+            network and its own exploration rate. The actors send segments
+            of consecutive experiences with their TD-errors (the initial
+            priorities) to the learner. A segment is the frames of its first
+            state followed by the newest frame of each next state, i.e., the
+            stacks of frames are rebuilt by the learner. The learner writes
+            its weights to shared memory with `publish`, the actors copy them
+            before their next step. States must be stacks of single-channel
+            frames in the last dimension
+
+        Args:
+            env_fn: a picklable function that builds an environment, e.g.,
+                `functools.partial(setup_env, env_id)`
+            model_fn: a picklable function that builds the Q network
+            num_weights: the number of weights of the Q network
+            num_actors: the number of actors (worker processes)
+            rates: the exploration rate of each actor. If None, the rates
+                are from `exploration_rates`
+            discount_factor: the discount factor, γ, of the TD-errors
+            segment_length: the max number of experiences in a segment
+            max_segments: the number of segments that can wait for the
+                learner before actors block. If None, 4 for each actor
+            seed: a seed for the actors, the actor at index i is seeded with
+                `seed + i`. If None, actors are unseeded
+            start_method: the method of starting worker processes as either
+                'spawn', 'forkserver', or 'fork'
+
+        Returns:
+            None
+
+        """
+        # type check the num_actors parameter
+        if not isinstance(num_actors, int):
+            raise TypeError('`num_actors` must be of type int')
+        # ensure the num_actors is within a legal range of values
+        if num_actors <= 0:
+            raise ValueError('`num_actors` must be > 0')
+        if rates is None:
+            rates = exploration_rates(num_actors)
+        if len(rates) != num_actors:
+            raise ValueError('`rates` must have a rate for each actor')
+        if max_segments is None:
+            max_segments = 4 * num_actors
+        self.num_actors = num_actors
+        self.rates = rates
+        self.segment_length = segment_length
+        self.seed = seed
+        context = multiprocessing.get_context(start_method)
+        # the flat weights of the learner and their version in shared memory
+        self.weights = context.Array('f', num_weights)
+        self.version = context.Value('q', 0)
+        self.segments = context.Queue(max_segments)
+        self.stop = context.Event()
+        self.processes = []
+        for index in range(num_actors):
+            args = (
+                index,
+                env_fn,
+                model_fn,
+                float(rates[index]),
+                discount_factor,
+                segment_length,
+                self.weights,
+                self.version,
+                self.segments,
+                self.stop,
+                seed,
+            )
+            process = context.Process(target=_actor, args=args, daemon=True)
+            self.processes.append(process)
+        self.started = False
+        self.closed = False
+
+    def __repr__(self) -> str:
+        """Return a debugging string of this pool of actors."""
+        return '{}(num_actors={}, segment_length={}, seed={})'.format(
+            self.__class__.__name__,
+            self.num_actors,
+            self.segment_length,
+            self.seed,
+        )
+
+    def publish(self, weights: list) -> None:
+        """
+        Publish the weights of the learner to the actors.
+
+        Notes:
+            The first call starts the actors, i.e., they never act with
+            uninitialized weights
+
+        Args:
+            weights: the list of weight arrays of the Q network
+
+        Returns:
+            None
+
+        """
+        flat = np.concatenate([np.ravel(w) for w in weights]).astype(np.float32)
+        with self.weights.get_lock():
+            np.frombuffer(self.weights.get_obj(), dtype=np.float32)[:] = flat
+            self.version.value += 1
+        if not self.started:
+            for process in self.processes:
+                process.start()
+            self.started = True
+
+    def receive(self, timeout: float=1.0) -> list:
+        """
+        Receive the segments that the actors sent since the last call.
+
+        Args:
+            timeout: the number of seconds between checks that the actors
+                are alive while waiting for the first segment
+
+        Returns:
+            a list of segments, each a tuple of:
+                - the index of the actor that sent the segment
+                - the current state of each experience
+                - the action of each experience
+                - the reward of each experience
+                - the done flag of each experience
+                - the next state of each experience
+                - the TD-error of each experience
+                - the scores of the episodes that ended in the segment
+
+        """
+        messages = []
+        # wait for at least one segment
+        while not messages:
+            try:
+                messages.append(self.segments.get(timeout=timeout))
+            except queue.Empty:
+                for index, process in enumerate(self.processes):
+                    if not process.is_alive():
+                        msg = 'actor {} exited with code {}'
+                        raise RuntimeError(msg.format(index, process.exitcode))
+        # take the other segments that are ready
+        while True:
+            try:
+                messages.append(self.segments.get_nowait())
+            except queue.Empty:
+                break
+        segments = []
+        for index, frames, actions, rewards, dones, td_errors, scores in messages:
+            # the stacks of frames are a view of the windows of consecutive
+            # frames with the frames of each window on the last axis
+            k = len(frames) - len(actions)
+            s = frames.strides
+            states = as_strided(frames,
+                shape=(len(actions) + 1, *frames.shape[1:], k),
+                strides=(s[0], *s[1:], s[0]),
+                writeable=False,
+            )
+            segments.append((
+                index,
+                states[:-1],
+                actions,
+                rewards,
+                dones,
+                states[1:],
+                td_errors,
+                scores,
+            ))
+
+        return segments
+
+    def close(self) -> None:
+        """Stop the actors and wait for them to exit."""
+        if self.closed:
+            return
+        self.stop.set()
+        if self.started:
+            # drain the queue so that no actor blocks on a full queue
+            for process in self.processes:
+                while process.is_alive():
+                    try:
+                        self.segments.get(timeout=0.1)
+                    except queue.Empty:
+                        process.join(timeout=0.1)
+        self.segments.close()
+        self.closed = True
+
+
+# explicitly define the outward facing API of this module
+__all__ = [ApeXActors.__name__, exploration_rates.__name__]
@@ -1,17 +1,34 @@
 """An implementation of Deep Q-Learning."""
+import os
+import pickle
+import queue
+import random
+import shutil
+import threading
+from functools import partial
 from typing import Callable
 import gym
 import numpy as np
 from tqdm import tqdm
+from keras import backend as K
 from keras.optimizers import Optimizer
 from keras.optimizers import Adam
 from src.models import build_deep_q_model
 from src.models import build_dueling_deep_q_model
+from src.models import build_policy_function
+from src.models import build_target_update_function
+from src.models import build_train_function
 from src.models.losses import huber_loss
 from src.base import AnnealingVariable
+from src.base import CompressedReplayQueue
+from src.base import FrameReplayQueue
+from src.base import MemmapReplayQueue
+from src.base import PrefetchingReplayQueue
 from src.base import ReplayQueue
 from src.base import PrioritizedReplayQueue
+from src.base import SynchronizedReplayQueue
 from .agent import Agent
+from .ape_x import ApeXActors
 
 
 # the format string for this objects representation
@@ -20,14 +37,23 @@ _REPR_TEMPLATE = """
     env={},
     render_mode={}
     replay_memory_size={},
+    replay_memory_dir={},
+    compress_replay_memory={},
     prioritized_experience_replay={},
+    deduplicate_frames={},
+    priority_batch_size={},
+    prefetch_batches={},
+    num_envs={},
     discount_factor={},
+    n_step={},
     update_frequency={},
     optimizer={},
     exploration_rate={},
     loss={},
     target_update_freq={},
-    dueling_network={}
+    dueling_network={},
+    fused_train_step={},
+    jit_compile={}
 )
 """.lstrip()
 
@@ -39,14 +65,23 @@ class DeepQAgent(Agent):
         env: gym.Env,
         render_mode: str=None,
         replay_memory_size: int=750000,
+        replay_memory_dir: str=None,
+        compress_replay_memory: bool=False,
         prioritized_experience_replay: bool=False,
+        deduplicate_frames: bool=True,
+        priority_batch_size: int=None,
+        prefetch_batches: int=None,
+        num_envs: int=1,
         discount_factor: float=0.99,
+        n_step: int=1,
         update_frequency: int=4,
         optimizer: Optimizer=Adam(lr=2e-5),
         exploration_rate: AnnealingVariable=AnnealingVariable(1., .1, 1000000),
         loss: Callable=huber_loss,
         target_update_freq: int=10000,
         dueling_network: bool=False,
+        fused_train_step: bool=False,
+        jit_compile: bool=False,
     ) -> None:
         """
         Initialize a new Deep Q Agent.
@@ -58,10 +93,33 @@ class DeepQAgent(Agent):
                 - 'human': render in a window to observe on screen
             replay_memory_size: the number of previous experiences to store
                 in the experience replay queue
+            replay_memory_dir: a directory to store the replay queue in as
+                memory-mapped files. If None, the replay queue is stored in
+                memory
+            compress_replay_memory: whether to compress each frame in the
+                replay queue. Samples decompress frames in a pool of threads
             prioritized_experience_replay: whether to use prioritized
                 experience replay. If False, will use the standard replay
                 queue with uniform random sampling
+            deduplicate_frames: whether to store each frame of the stacked
+                states only once in the replay queue. If False, will store
+                each experience as a tuple with two complete frame stacks
+            priority_batch_size: the number of new experiences to calculate
+                TD-errors for in a single batch when using prioritized
+                experience replay. New experiences are pushed with the max
+                priority of the queue. If None, new experiences are only
+                prioritized with TD-errors after they are replayed
+            prefetch_batches: the number of batches to sample from the
+                replay queue ahead of time in a background thread. If None,
+                batches are sampled when they are needed
+            num_envs: the number of environments of the VecEnv to train on
+                with `train_vectorized` (or the number of actors of
+                `train_ape_x`). The frame replay queues keep the last state
+                of each environment to store each frame once
             discount_factor: discount factor, γ, for discounting future reward
+            n_step: the number of steps, n, of the returns to learn from,
+                i.e., the targets are the discounted rewards of the next n
+                steps plus the discounted Q value after n steps
             update_frequency: the number of actions between updates to the
                 deep Q network from replay memory
             optimizer: the optimization method to use on the CNN gradients
@@ -70,6 +128,11 @@ class DeepQAgent(Agent):
             loss: the loss method to use at the end of the CNN
             target_update_freq: frequency to update the target network (steps)
             dueling_network: whether to use the dueling architecture
+            fused_train_step: whether to train with a single compiled step
+                that computes the targets, the loss, and the update in the
+                graph (see `build_train_function`) instead of
+                `train_on_batch` with targets computed in NumPy
+            jit_compile: whether to compile the fused train step with XLA
 
         Returns:
             None
@@ -79,45 +142,104 @@ class DeepQAgent(Agent):
         super().__init__(env, render_mode)
         # setup the replay queue
         self.prioritized_experience_replay = prioritized_experience_replay
+        self.deduplicate_frames = deduplicate_frames
+        self.priority_batch_size = priority_batch_size
+        # the new experiences (and their IDs) that are waiting for their
+        # TD-errors to be calculated
+        self._unprioritized = []
+        self.replay_memory_dir = replay_memory_dir
+        self.compress_replay_memory = compress_replay_memory
+        # the arguments of the frame replay queues for n-step returns and
+        # the environments that push in turns
+        n_step_kwargs = dict(
+            n_step=n_step,
+            discount_factor=discount_factor,
+            streams=num_envs,
+        )
         if prioritized_experience_replay:
-            self.queue = PrioritizedReplayQueue(replay_memory_size)
+            if replay_memory_dir is not None:
+                msg = 'prioritized experience replay must be in memory'
+                raise ValueError(msg)
+            if compress_replay_memory:
+                msg = 'prioritized experience replay can\'t be compressed'
+                raise ValueError(msg)
+            self.queue = PrioritizedReplayQueue(replay_memory_size, **n_step_kwargs)
+        elif replay_memory_dir is not None:
+            if compress_replay_memory:
+                msg = 'memory-mapped replay memory can\'t be compressed'
+                raise ValueError(msg)
+            self.queue = MemmapReplayQueue(replay_memory_size, replay_memory_dir,
+                **n_step_kwargs
+            )
+        elif compress_replay_memory:
+            self.queue = CompressedReplayQueue(replay_memory_size, **n_step_kwargs)
+        elif deduplicate_frames:
+            self.queue = FrameReplayQueue(replay_memory_size, **n_step_kwargs)
+        elif n_step > 1:
+            raise ValueError('n-step returns require de-duplicated frames')
         else:
             self.queue = ReplayQueue(replay_memory_size)
+        self.prefetch_batches = prefetch_batches
+        self.num_envs = num_envs
+        if prefetch_batches is not None:
+            self.queue = PrefetchingReplayQueue(self.queue, prefetch_batches)
         # setup the Q learning algorithm variables
         self.discount_factor = discount_factor
+        self.n_step = n_step
         self.update_frequency = update_frequency
         self.optimizer = optimizer
         self.exploration_rate = exploration_rate
         self.loss = loss
         self.target_update_freq = target_update_freq
         self.dueling_network = dueling_network
+        if jit_compile and not fused_train_step:
+            raise ValueError('XLA only compiles the fused train step')
+        self.fused_train_step = fused_train_step
+        self.jit_compile = jit_compile
+        # the number of frames the agent has trained for
+        self.frames_played = 0
         # build an output mask that lets all action values pass through
         mask_shape = (1, env.action_space.n)
         self.mask = np.ones(mask_shape, dtype=np.float32)
         # use an identity of size action space, to index rows from it using
         # an action vector to produce a one-hot vector masks for training error
         self.action_onehot = np.eye(env.action_space.n, dtype=np.float32)
+        # the reusable target and mask buffers of replay keyed by batch size
+        self._replay_buffers = {}
         # setup the model for predicting Q values
         if dueling_network:
             build_model = build_dueling_deep_q_model
         else:
             build_model = build_deep_q_model
-        # build the neural model for estimating Q values
-        self.model = build_model(
+        # the function that builds a new (compiled) copy of the network
+        self._build_model = partial(build_model,
             image_size=env.observation_space.shape[:2],
             num_frames=env.observation_space.shape[-1],
             num_actions=env.action_space.n,
             loss=loss,
             optimizer=optimizer
         )
+        # build the neural model for estimating Q values
+        self.model = self._build_model()
         # build the target model for estimating target values
-        self.target_model = build_model(
-            image_size=env.observation_space.shape[:2],
-            num_frames=env.observation_space.shape[-1],
-            num_actions=env.action_space.n,
-            loss=loss,
-            optimizer=optimizer
-        )
+        self.target_model = self._build_model()
+        # the compiled function that selects greedy actions with the model
+        # (e.g. replaced by a QuantizedPolicy to play with fewer bits)
+        self.policy = build_policy_function(self.model)
+        # the function that copies the weights to the target in the graph
+        self._update_target = build_target_update_function(self.model, self.target_model)
+        # the compiled train step (it builds the weights of the optimizer)
+        self._train_step = None
+        if fused_train_step:
+            self._train_step = build_train_function(self.model, self.target_model,
+                discount_factor=discount_factor**n_step,
+                loss=loss,
+                jit_compile=jit_compile,
+            )
+        # the copy of the online model that acts in pipelined training and
+        # its policy (built by the first call to `train_pipelined`)
+        self.actor_model = None
+        self.actor_policy = None
 
     def __repr__(self) -> str:
         """Return a debugging string of this agent."""
@@ -126,51 +248,96 @@ class DeepQAgent(Agent):
             self.env,
             repr(self.render_mode),
             self.queue.size,
+            repr(self.replay_memory_dir),
+            self.compress_replay_memory,
             self.prioritized_experience_replay,
+            self.deduplicate_frames,
+            self.priority_batch_size,
+            self.prefetch_batches,
+            self.num_envs,
             self.discount_factor,
+            self.n_step,
             self.update_frequency,
             self.optimizer,
             self.exploration_rate,
             self.loss.__name__,
             self.target_update_freq,
-            self.dueling_network
+            self.dueling_network,
+            self.fused_train_step,
+            self.jit_compile,
         )
 
+    def _buffers(self, size: int) -> tuple:
+        """
+        Return reusable buffers for a batch of a given size.
+
+        Args:
+            size: the number of experiences in the batch
+
+        Returns:
+            a tuple of:
+                - a matrix for the target y values
+                - a matrix of ones that lets all action values pass through
+                - a matrix for the one-hot masks of the selected actions
+
+        """
+        if size not in self._replay_buffers:
+            self._replay_buffers[size] = (
+                np.zeros((size, self.env.action_space.n), dtype=np.float32),
+                np.repeat(self.mask, size, axis=0),
+                np.zeros((size, self.env.action_space.n), dtype=np.float32),
+            )
+
+        return self._replay_buffers[size]
+
     def _td_error(self,
         s: np.ndarray,
         a: np.ndarray,
         r: np.ndarray,
         d: np.ndarray,
         s2: np.ndarray
-    ) -> float:
+    ) -> np.ndarray:
         """
-        Calculate the TD-error for a single experience.
+        Calculate the TD-error for a batch of experiences.
 
         Args:
-            s: the current state
-            a: the action to get from current state `s` to next state `s2`
-            r: the reward resulting from taking action `a` in state `s`
-            d: the flag denoting whether the episode ended after action `a`
-            s2: the next state from taking action `a` in state `s`
+            s: a batch of current states
+            a: a batch of actions from each state in s
+            r: a batch of reward from each action in a
+            d: a batch of terminal flags after each action in a
+            s2: a batch of next states from each state-action pair in s, a
 
         Returns:
-            the TD-error as a result of the experience
+            the TD-error of each experience in the batch
 
         """
-        if d:
-            # terminal states have a Q value of zero by definition
-            Q_t = 0.0
-        else:
-            # predict Q values for the next state and take the max value.
-            Q_t = self.target_model.predict([s2[None, :, :, :], self.mask])
-
+        _, mask, _ = self._buffers(len(s))
+        # predict Q values for the next states and take the max value
+        Q_t = np.max(self.target_model.predict_on_batch([s2, mask]), axis=1)
+        # terminal states have a Q value of zero by definition
+        Q_t[d] = 0
         # calculate the predicted Q value from the current state and action
-        Q = self.model.predict([s[None, :, :, :], self.mask])
+        Q = self.model.predict_on_batch([s, mask])[range(len(s)), a]
         # calculate the TD error based on the reward, discounted future
         # reward, and the predicted future reward
-        td_error = abs(r + self.discount_factor * np.max(Q_t) - np.max(Q))
+        return r + self.discount_factor * Q_t - Q
 
-        return td_error
+    def _prioritize(self) -> None:
+        """Calculate TD-errors for the unprioritized experiences in a batch."""
+        if not self._unprioritized:
+            return
+        indexes, s, a, r, d, s2 = zip(*self._unprioritized)
+        # the n-step windows of new experiences aren't complete yet, i.e.,
+        # their first priorities are estimated from one-step TD-errors
+        td_error = self._td_error(
+            np.array(s),
+            np.array(a),
+            np.array(r, dtype=np.float32),
+            np.array(d, dtype=np.bool_),
+            np.array(s2),
+        )
+        self.queue.update_priorities(indexes, td_error)
+        self._unprioritized = []
 
     def _remember(self,
         s: np.ndarray,
@@ -178,6 +345,7 @@ class DeepQAgent(Agent):
         r: int,
         d: bool,
         s2: np.ndarray,
+        stream: int=0,
     ) -> None:
         """
         Push an experience onto the replay queue.
@@ -188,24 +356,38 @@ class DeepQAgent(Agent):
             r: the reward resulting from taking action `a` in state `s`
             d: the flag denoting whether the episode ended after action `a`
             s2: the next state from taking action `a` in state `s`
+            stream: the index of the environment of the experience in the
+                VecEnv of `train_vectorized`
 
         Returns:
             None
 
         """
         if self.prioritized_experience_replay:
-            # calculate the priority of the experience based on the TD error
-            priority = self._td_error(s, a, r, d, s2)
-            self.queue.push(s, a, r, d, s2, priority=priority)
+            # push the experience with the max priority so that it's replayed
+            # at least once before its TD-error is known
+            self.queue.push(s, a, r, d, s2,
+                priority=self.queue.max_priority,
+                stream=stream,
+            )
+            if self.priority_batch_size is None:
+                return
+            # calculate the priorities of new experiences in batches (by the
+            # ID of the experience, see `PrioritizedReplayQueue.sample`)
+            self._unprioritized.append((self.queue.pushes - 1, s, a, r, d, s2))
+            if len(self._unprioritized) >= self.priority_batch_size:
+                self._prioritize()
         else:
-            self.queue.push(s, a, r, d, s2)
+            self.queue.push(s, a, r, d, s2, stream=stream)
 
     def _replay(self,
         s: np.ndarray,
         a: np.ndarray,
         r: np.ndarray,
         d: np.ndarray,
-        s2: np.ndarray
+        s2: np.ndarray,
+        w: np.ndarray=None,
+        indexes: np.ndarray=None,
     ) -> float:
         """
         Train the network on a mini-batch of replay data.
@@ -216,27 +398,91 @@ class DeepQAgent(Agent):
             r: a batch of reward from each action in a
             d: a batch of terminal flags after each action in a
             s2: a batch of next states from each state-action pair in s, a
+            w: an optional batch of importance sampling weights
+            indexes: an optional batch of indexes of each memory in the
+                prioritized replay queue. If not None, the priorities of
+                the memories are updated with their new TD-errors
 
         Returns:
             the loss as a result of the training
 
         """
-        # initialize target y values
-        y = np.zeros((len(s), self.env.action_space.n), dtype=np.float32)
+        if self._train_step is not None:
+            # train with targets and TD-errors from the graph
+            if w is None:
+                w = np.ones(len(s), dtype=np.float32)
+            loss, td_error = self._train_step(s, a, r, d, s2, w)
+            if indexes is not None:
+                self.queue.update_priorities(indexes, td_error)
+            return loss
+        # reuse the buffers for the target y values and masks of the batch
+        y, mask, action_mask = self._buffers(len(s))
+        y.fill(0)
 
         # predict Q values for the next state of each memory in the batch and
         # take the max value. don't mask any outputs, i.e. use ones
-        mask = np.repeat(self.mask, len(s), axis=0)
         Q = np.max(self.target_model.predict_on_batch([s2, mask]), axis=1)
         # terminal states have a Q value of zero by definition
         Q[d] = 0
         # set the y value for each sample to the reward of the selected
-        # action plus the discounted Q value
-        y[range(y.shape[0]), a] = r + self.discount_factor * Q
+        # action plus the discounted Q value (after n steps)
+        y[range(y.shape[0]), a] = r + self.discount_factor**self.n_step * Q
+
+        # the mask that disables training for actions that aren't the
+        # selected actions
+        np.take(self.action_onehot, a, axis=0, out=action_mask)
+        if indexes is not None:
+            # calculate the TD-error of each memory from the Q values of the
+            # selected actions before the update
+            Q = self.model.predict_on_batch([s, action_mask])
+            td_error = np.sum(y - Q, axis=1)
+
+        # train the model on the batch and return the loss.
+        loss = self.model.train_on_batch([s, action_mask], y, sample_weight=w)
+
+        # feed the TD-errors back to the prioritized replay queue
+        if indexes is not None:
+            self.queue.update_priorities(indexes, td_error)
+
+        return loss
 
-        # train the model on the batch and return the loss. use the mask that
-        # disables training for actions that aren't the selected actions.
-        return self.model.train_on_batch([s, self.action_onehot[a]], y)
+    def _learn(self, frame: int, batch_size: int, batch: tuple) -> tuple:
+        """
+        Replay a batch and update the target network when they're due.
+
+        Args:
+            frame: the number of the frame that was played, a batch is
+                replayed every `update_frequency` frames and the target
+                network is updated every `target_update_freq` frames
+            batch_size: the size of the replay history batch
+            batch: the reusable arrays to sample the batch into, None to
+                allocate them (prefetched batches come in reusable arrays of
+                their own)
+
+        Returns:
+            a tuple of:
+                - the loss of the batch (0 if no batch was due)
+                - the reusable arrays to sample the next batch into
+
+        """
+        loss = 0
+        # update Q from replay
+        if frame % self.update_frequency == 0:
+            if batch is None and self.prefetch_batches is None:
+                batch = self.queue.empty_batch(batch_size)
+            loss = self._replay(*self.queue.sample(size=batch_size, out=batch))
+        # update Target Q from online Q
+        if frame % self.target_update_freq == 0:
+            self._update_target()
+
+        return loss, batch
+
+    def _stop_training(self, progress) -> None:
+        """Close the progress bar of training and stop prefetching batches."""
+        progress.close()
+        # stop sampling batches in the background
+        if self.prefetch_batches is not None:
+            self.queue.close()
 
     def observe(self, replay_start_size: int=50000) -> None:
         """
@@ -273,6 +519,9 @@ class DeepQAgent(Agent):
                 # update the progress bar
                 progress.update(1)
 
+        # calculate priorities for any experiences left in the last batch
+        if self.prioritized_experience_replay:
+            self._prioritize()
         progress.close()
 
     def predict(self, frames: np.ndarray, exploration_rate: float) -> int:
@@ -290,12 +539,33 @@ class DeepQAgent(Agent):
         if np.random.random() < exploration_rate:
             # select a random action and return it
             return self.env.action_space.sample()
-        # reshape the frames to pass through the loss network
-        frames = frames[np.newaxis, :, :, :]
-        # predict the values of each action
-        actions = self.model.predict([frames, self.mask])
-        # return the action with the highest estimated future reward
-        return np.argmax(actions)
+        # reshape the frames to pass through the network and return the
+        # action with the highest estimated future reward
+        return self.policy(frames[np.newaxis, :, :, :])[0]
+
+    def predict_batch(self, states: np.ndarray, exploration_rate: float) -> np.ndarray:
+        """
+        Predict an action for each of a batch of frame stacks.
+
+        Args:
+            states: the batch of frame stacks to predict Q values from
+            exploration_rate: the exploration rate for epsilon greedy selection
+
+        Returns:
+            the selected action for each stack of frames
+
+        """
+        explore = np.random.random(len(states)) < exploration_rate
+        if explore.all():
+            # every action is random, skip the network
+            actions = np.zeros(len(states), dtype=np.int64)
+        else:
+            # predict the best action for every state at once
+            actions = np.array(self.policy(states))
+        # replace the greedy actions with random actions
+        actions[explore] = np.random.randint(self.env.action_space.n, size=explore.sum())
+
+        return actions
 
     def train(self,
         frames_to_play: int=50000000,
@@ -319,6 +589,8 @@ class DeepQAgent(Agent):
         # the progress bar for the operation
         progress = tqdm(total=frames_to_play, unit='frame')
         progress.set_postfix(score='?', loss='?')
+        # the reusable arrays to sample batches into (see `_learn`)
+        batch = None
 
         while frames_to_play > 0:
             done = False
@@ -343,12 +615,10 @@ class DeepQAgent(Agent):
                 # decrement the observation counter
                 frames_to_play -= 1
                 frames += 1
-                # update Q from replay
-                if frames_to_play % self.update_frequency == 0:
-                    loss += self._replay(*self.queue.sample(size=batch_size))
-                # update Target Q from online Q
-                if frames_to_play % self.target_update_freq == 0:
-                    self.target_model.set_weights(self.model.get_weights())
+                self.frames_played += 1
+                # update Q from replay (and Target Q) when they're due
+                batch_loss, batch = self._learn(frames_to_play, batch_size, batch)
+                loss += batch_loss
 
             # pass the score to the callback at the end of the episode
             if callable(callback):
@@ -357,20 +627,420 @@ class DeepQAgent(Agent):
             progress.set_postfix(score=score, loss=loss)
             progress.update(frames)
 
-        progress.close()
+        self._stop_training(progress)
 
-    def play(self, games: int=100, exploration_rate: float=0.05) -> np.ndarray:
+    def train_vectorized(self,
+        vec_env,
+        frames_to_play: int=50000000,
+        batch_size: int=32,
+        callback: Callable=None,
+    ) -> None:
+        """
+        Train the network on a vector of environments that step in parallel.
+
+        Notes:
+            The experiences of the environments are pushed in turns, each as
+            a stream of the replay queue (see `FrameReplayQueue.push`), i.e.,
+            the frames of each environment are stored once and the n-step
+            windows of each environment are complete
+
+        Args:
+            vec_env: the VecEnv to experience (with the spaces of `env`)
+            frames_to_play: the number of frames to play the games for
+            batch_size: the size of the replay history batches
+            callback: an optional callback to get updates about the score,
+                      loss, discount factor, and exploration rate every
+                      episode
+
+        Returns:
+            None
+
+        """
+        if vec_env.num_envs != self.num_envs:
+            msg = 'the agent was built for {} environments, the vector has {}'
+            raise ValueError(msg.format(self.num_envs, vec_env.num_envs))
+        # the progress bar for the operation
+        progress = tqdm(total=frames_to_play, unit='frame')
+        progress.set_postfix(score='?', loss='?')
+        # the reusable arrays to sample batches into (see `_learn`)
+        batch = None
+        # the score of the episode of each environment and the loss since
+        # the last episode ended
+        scores = np.zeros(vec_env.num_envs)
+        loss = 0
+        # reset the games and get the initial states (copy the states out of
+        # the shared memory of the vector before the next step writes it)
+        states = vec_env.reset().copy()
+
+        while frames_to_play > 0:
+            # predict the best action for every state with a single batch
+            actions = self.predict_batch(states, self.exploration_rate.value)
+            for _ in range(vec_env.num_envs):
+                self.exploration_rate.step()
+            # step every environment with its action
+            next_states, rewards, dones, _ = vec_env.step(actions)
+            next_states = next_states.copy()
+            scores += rewards
+            # the next state of a finished episode is its last observation,
+            # the environment already started the next episode
+            terminal_states = next_states.copy()
+            terminal_states[dones] = vec_env.terminal_observations[dones]
+            # push the experience of each environment onto its stream
+            for index in range(vec_env.num_envs):
+                self._remember(
+                    states[index],
+                    actions[index],
+                    rewards[index],
+                    dones[index],
+                    terminal_states[index],
+                    stream=index,
+                )
+            states = next_states
+
+            for _ in range(vec_env.num_envs):
+                # decrement the observation counter
+                frames_to_play -= 1
+                self.frames_played += 1
+                # update Q from replay (and Target Q) when they're due
+                batch_loss, batch = self._learn(frames_to_play, batch_size, batch)
+                loss += batch_loss
+
+            # pass the scores of finished episodes to the callback
+            for index in np.flatnonzero(dones):
+                if callable(callback):
+                    callback(self, scores[index], loss)
+                progress.set_postfix(score=scores[index], loss=loss)
+                scores[index] = 0
+                loss = 0
+            # update the progress bar
+            progress.update(vec_env.num_envs)
+
+        self._stop_training(progress)
+
+    def _act(self, frames_to_play: int, max_lag: int, shared: dict,
+        condition: threading.Condition,
+        acting: threading.Lock,
+        episodes: queue.Queue,
+    ) -> None:
+        """
+        Play the game with the actor model in the acting thread.
+
+        Args:
+            frames_to_play: the number of frames to play the game for
+            max_lag: the number of updates the actor can play ahead of the
+                learner
+            shared: the state shared with the learner
+            condition: the condition that guards the shared state
+            acting: the lock that the actor holds while it steps
+            episodes: the queue to put the scores of finished episodes on
+
+        Returns:
+            None
+
+        """
+        try:
+            with shared['graph'].as_default():
+                state = None
+                score = 0
+                while True:
+                    with condition:
+                        # wait for the learner to catch up with the actor
+                        condition.wait_for(lambda: shared['stop'] or
+                            shared['acted'] < (shared['updates'] + max_lag) * self.update_frequency
+                        )
+                        if shared['stop'] or shared['acted'] >= frames_to_play:
+                            break
+                        weights, shared['weights'] = shared['weights'], None
+                    # refresh the actor with the last published weights
+                    if weights is not None:
+                        self.actor_model.set_weights(weights)
+                    with acting:
+                        # reset the game and get the initial state
+                        if state is None:
+                            state = self._initial_state()
+                        # predict the best action based on the current state
+                        if np.random.random() < self.exploration_rate.value:
+                            action = self.env.action_space.sample()
+                        else:
+                            action = self.actor_policy(state[np.newaxis])[0]
+                        # step the exploration rate forward
+                        self.exploration_rate.step()
+                        # fire the action and observe the next state, reward, and flag
+                        next_state, reward, done = self._next_state(action)
+                        score += reward
+                        # push the memory onto the (synchronized) replay queue
+                        self._remember(state, action, reward, done, next_state)
+                        state = next_state
+                        if done:
+                            episodes.put(score)
+                            state = None
+                            score = 0
+                    with condition:
+                        shared['acted'] += 1
+                        self.frames_played += 1
+                        condition.notify_all()
+        except Exception as error:
+            # pass the error to the learner (that's waiting on frames)
+            shared['error'] = error
+        finally:
+            with condition:
+                shared['finished'] = True
+                condition.notify_all()
+
+    def train_pipelined(self,
+        frames_to_play: int=50000000,
+        batch_size: int=32,
+        callback: Callable=None,
+        sync_every: int=100,
+        max_lag: int=8,
+    ) -> None:
+        """
+        Train the network with an acting thread and a learning thread.
+
+        Notes:
+            An acting thread plays the game with a copy of the online network
+            (`actor_model`) and pushes the experiences onto the replay queue
+            while the calling thread replays batches, i.e., the emulator and
+            the network (that both release the GIL) run at the same time. The
+            learner replays a batch for every `update_frequency` frames like
+            `train` and the actor plays at most `max_lag` updates ahead of the
+            learner, i.e., the replay ratio is the same as `train`. The replay
+            queue is wrapped in a SynchronizedReplayQueue unless it prefetches
+            batches (and is already synchronized)
+
+        Args:
+            frames_to_play: the number of frames to play the game for
+            batch_size: the size of the replay history batches
+            callback: an optional callback to get updates about the score,
+                      loss, discount factor, and exploration rate every
+                      episode. The actor pauses while the callback runs
+            sync_every: the number of updates between copies of the online
+                weights to the actor model
+            max_lag: the number of updates the actor can play ahead of the
+                learner
+
+        Returns:
+            None
+
+        """
+        if not isinstance(self.queue, (PrefetchingReplayQueue, SynchronizedReplayQueue)):
+            self.queue = SynchronizedReplayQueue(self.queue)
+        if self.actor_model is None:
+            self.actor_model = self._build_model()
+            self.actor_policy = build_policy_function(self.actor_model)
+        self.actor_model.set_weights(self.model.get_weights())
+        # build the functions of the models before the threads share them
+        for model in [self.model, self.target_model, self.actor_model]:
+            model._make_predict_function()
+        if self._train_step is None:
+            self.model._make_train_function()
+        # the state shared between the actor and the learner
+        shared = dict(
+            graph=K.get_session().graph,
+            acted=0,
+            updates=0,
+            weights=None,
+            stop=False,
+            finished=False,
+            error=None,
+        )
+        condition = threading.Condition()
+        acting = threading.Lock()
+        episodes = queue.Queue()
+        actor = threading.Thread(target=self._act, daemon=True, args=(
+            frames_to_play, max_lag, shared, condition, acting, episodes
+        ))
+        # the progress bar for the operation
+        progress = tqdm(total=frames_to_play, unit='frame')
+        progress.set_postfix(score='?', loss='?')
+        # the reusable arrays to sample batches into (see `_learn`)
+        batch = None
+        loss = 0
+        acted = 0
+
+        def report(loss: float) -> float:
+            """Pass the scores of finished episodes to the callback."""
+            while not episodes.empty():
+                score = episodes.get()
+                if callable(callback):
+                    # pause the actor while the callback runs
+                    with acting:
+                        callback(self, score, loss)
+                progress.set_postfix(score=score, loss=loss)
+                loss = 0
+            return loss
+
+        actor.start()
+        try:
+            for update in range(1, frames_to_play // self.update_frequency + 1):
+                # wait for the actor to play the frames of the update
+                with condition:
+                    condition.wait_for(lambda: shared['finished'] or
+                        shared['acted'] >= update * self.update_frequency
+                    )
+                    if shared['acted'] < update * self.update_frequency:
+                        break
+                # update Q from replay (and Target Q when it's due)
+                frame = update * self.update_frequency
+                batch_loss, batch = self._learn(frame, batch_size, batch)
+                loss += batch_loss
+                # publish the online weights for the actor
+                weights = None
+                if update % sync_every == 0:
+                    weights = self.model.get_weights()
+                with condition:
+                    shared['updates'] = update
+                    if weights is not None:
+                        shared['weights'] = weights
+                    condition.notify_all()
+                    frames, acted = shared['acted'] - acted, shared['acted']
+                # pass the scores of finished episodes to the callback
+                loss = report(loss)
+                # update the progress bar
+                progress.update(frames)
+            # wait for the actor to play the frames after the last update
+            with condition:
+                condition.wait_for(lambda: shared['finished'])
+                progress.update(shared['acted'] - acted)
+            report(loss)
+        finally:
+            # stop the actor
+            with condition:
+                shared['stop'] = True
+                condition.notify_all()
+            actor.join()
+            self._stop_training(progress)
+        if shared['error'] is not None:
+            raise shared['error']
+
+    def train_ape_x(self,
+        env_fn: Callable,
+        num_actors: int,
+        frames_to_play: int=50000000,
+        batch_size: int=32,
+        callback: Callable=None,
+        sync_every: int=400,
+        segment_length: int=64,
+    ) -> None:
+        """
+        Train the network as the learner of actors in worker processes.
+
+        Notes:
+            Each actor (see ApeXActors) plays its own environment with a CPU
+            copy of the network and its own exploration rate, i.e., the
+            exploration rate of the agent isn't used. The actors push their
+            experiences with TD-errors as initial priorities to the replay
+            queue of this (learner) process, which replays a batch for every
+            `update_frequency` frames that the actors play like `train` and
+            publishes its weights to the actors every `sync_every` updates.
+            The experiences of each actor are pushed onto a stream of their
+            own (see `FrameReplayQueue.push`), i.e., the agent must be built
+            with `num_envs=num_actors`
+
+        Args:
+            env_fn: a picklable function that builds an environment, e.g.,
+                `functools.partial(setup_env, env_id)`
+            num_actors: the number of actors (worker processes)
+            frames_to_play: the number of frames to play the games for
+            batch_size: the size of the replay history batches
+            callback: an optional callback to get updates about the score,
+                      loss, discount factor, and exploration rate every
+                      episode
+            sync_every: the number of updates between copies of the weights
+                to the actors
+            segment_length: the max number of consecutive experiences that
+                an actor sends at once
+
+        Returns:
+            None
+
+        """
+        if num_actors != self.num_envs:
+            msg = 'the agent was built for {} environments, Ape-X has {} actors'
+            raise ValueError(msg.format(self.num_envs, num_actors))
+        # the function that builds the network of the actors (the compiled
+        # optimizer of the learner isn't needed, nor picklable)
+        keywords = dict(self._build_model.keywords)
+        del keywords['optimizer']
+        model_fn = partial(self._build_model.func, **keywords)
+        actors = ApeXActors(env_fn, model_fn,
+            num_weights=self.model.count_params(),
+            num_actors=num_actors,
+            discount_factor=self.discount_factor,
+            segment_length=segment_length,
+        )
+        # the progress bar for the operation
+        progress = tqdm(total=frames_to_play, unit='frame')
+        progress.set_postfix(score='?', loss='?')
+        # the reusable arrays to sample batches into (see `_learn`)
+        batch = None
+        loss = 0
+        frames = 0
+        updates = 0
+        try:
+            # the first weights start the actors
+            actors.publish(self.model.get_weights())
+            while frames < frames_to_play:
+                for index, s, a, r, d, s2, td_errors, scores in actors.receive():
+                    # push the experiences onto the stream of the actor in
+                    # order, i.e., each frame is stored once
+                    for experience in zip(s, a, r, d, s2, td_errors):
+                        if self.prioritized_experience_replay:
+                            self.queue.push(*experience[:-1], priority=experience[-1], stream=index)
+                        else:
+                            self.queue.push(*experience[:-1], stream=index)
+                    frames += len(a)
+                    self.frames_played += len(a)
+                    progress.update(len(a))
+                    # pass the scores of finished episodes to the callback
+                    for score in scores:
+                        if callable(callback):
+                            callback(self, score, loss)
+                        progress.set_postfix(score=score, loss=loss)
+                        loss = 0
+                # replay a batch for every `update_frequency` frames played
+                while updates < min(frames, frames_to_play) // self.update_frequency:
+                    updates += 1
+                    # update Q from replay (and Target Q when it's due)
+                    frame = updates * self.update_frequency
+                    batch_loss, batch = self._learn(frame, batch_size, batch)
+                    loss += batch_loss
+                    # broadcast the weights of the online network
+                    if updates % sync_every == 0:
+                        actors.publish(self.model.get_weights())
+        finally:
+            actors.close()
+            self._stop_training(progress)
+
+    def play(self,
+        games: int=100,
+        exploration_rate: float=0.05,
+        num_workers: int=1,
+        env_fn: Callable=None,
+    ) -> np.ndarray:
         """
         Run the agent without training for the given number of games.
 
         Args:
             games: the number of games to play
             exploration_rate: the epsilon for epsilon greedy exploration
+            num_workers: the number of worker processes to play the games
+                in parallel in (1 plays in `self.env`)
+            env_fn: a picklable function that builds the environment of a
+                worker, e.g., `functools.partial(setup_env, env_id)`
+                (required for more than one worker)
 
         Returns:
             an array of scores, one for each game
 
         """
+        if num_workers > 1:
+            if env_fn is None:
+                raise ValueError('`env_fn` is required to play with workers')
+            # select the actions of every worker in a single batch
+            return self._play_parallel(games, env_fn, num_workers,
+                lambda states: self.predict_batch(states, exploration_rate)
+            )
         # the progress bar for the operation
         progress = tqdm(range(games), unit='game')
         progress.set_postfix(score='?')
@@ -402,6 +1072,115 @@ class DeepQAgent(Agent):
 
         return scores
 
+    def _random_states(self) -> dict:
+        """Return a dictionary of the random generators used in training."""
+        generators = {'numpy': np.random}
+        # the action space samples the random actions of the agent and the
+        # unwrapped environment seeds any randomness of the game
+        objects = {'action_space': self.env.action_space, 'env': self.env.unwrapped}
+        for name, obj in objects.items():
+            generator = getattr(obj, 'np_random', None)
+            if isinstance(generator, np.random.RandomState):
+                generators[name] = generator
+
+        return generators
+
+    def save_checkpoint(self, directory: str, **state) -> None:
+        """
+        Save a checkpoint to resume training from.
+
+        Notes:
+            The checkpoint is written to a temporary directory that replaces
+            `directory` when complete, i.e., an interrupted save never
+            corrupts the last checkpoint
+
+        Args:
+            directory: the directory to save the checkpoint to
+            state: any extra (picklable) state to store in the checkpoint
+
+        Returns:
+            None
+
+        """
+        # score the experiences waiting for TD-errors so that the saved
+        # priorities are complete
+        if self.prioritized_experience_replay:
+            self._prioritize()
+        temp_directory = '{}.tmp'.format(directory)
+        if os.path.exists(temp_directory):
+            shutil.rmtree(temp_directory)
+        os.makedirs(temp_directory)
+        # save the weights of the networks and the state of the optimizer
+        self.model.save_weights('{}/weights.h5'.format(temp_directory))
+        self.target_model.save_weights('{}/target_weights.h5'.format(temp_directory))
+        optimizer_weights = self.model.optimizer.get_weights()
+        np.savez('{}/optimizer.npz'.format(temp_directory), *optimizer_weights)
+        # save the replay memory
+        self.queue.save('{}/replay'.format(temp_directory))
+        # save the schedules, counters, and random generators
+        state = dict(state,
+            exploration_rate=self.exploration_rate.value,
+            frames_played=self.frames_played,
+            random=random.getstate(),
+            random_states={
+                name: generator.get_state()
+                for name, generator in self._random_states().items()
+            },
+        )
+        with open('{}/state.pkl'.format(temp_directory), 'wb') as state_file:
+            pickle.dump(state, state_file, protocol=pickle.HIGHEST_PROTOCOL)
+        # replace the old checkpoint with the new one
+        old_directory = '{}.old'.format(directory)
+        if os.path.exists(directory):
+            os.rename(directory, old_directory)
+        os.rename(temp_directory, directory)
+        if os.path.exists(old_directory):
+            shutil.rmtree(old_directory)
+
+    def load_checkpoint(self, directory: str) -> dict:
+        """
+        Load a checkpoint to resume training from.
+
+        Args:
+            directory: the directory to load the checkpoint from
+
+        Returns:
+            a dictionary with the extra state passed to `save_checkpoint`
+
+        """
+        # fall back to the last checkpoint if a save was interrupted
+        if not os.path.exists(directory) and os.path.exists('{}.old'.format(directory)):
+            directory = '{}.old'.format(directory)
+        if not os.path.exists(directory):
+            raise OSError('checkpoint not found: {}'.format(directory))
+        # load the weights of the networks and the state of the optimizer
+        self.model.load_weights('{}/weights.h5'.format(directory))
+        self.target_model.load_weights('{}/target_weights.h5'.format(directory))
+        with np.load('{}/optimizer.npz'.format(directory)) as optimizer_file:
+            names = ['arr_{}'.format(i) for i in range(len(optimizer_file.files))]
+            optimizer_weights = [optimizer_file[name] for name in names]
+        if optimizer_weights:
+            # the optimizer creates its weights when the training function
+            # is built, build it before setting the weights (the fused train
+            # step built them with the agent)
+            if self._train_step is None:
+                self.model._make_train_function()
+            self.model.optimizer.set_weights(optimizer_weights)
+        # load the replay memory
+        self.queue.load('{}/replay'.format(directory))
+        # load the schedules, counters, and random generators
+        with open('{}/state.pkl'.format(directory), 'rb') as state_file:
+            state = pickle.load(state_file)
+        self.exploration_rate.value = state.pop('exploration_rate')
+        self.frames_played = state.pop('frames_played')
+        random.setstate(state.pop('random'))
+        random_states = state.pop('random_states')
+        for name, generator in self._random_states().items():
+            if name in random_states:
+                generator.set_state(random_states[name])
+
+        return state
+
 
 # explicitly define the outward facing API of this module
 __all__ = [DeepQAgent.__name__]
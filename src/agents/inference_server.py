@@ -0,0 +1,317 @@
+"""A process that batches the action requests of many actors."""
+import multiprocessing
+from multiprocessing.connection import wait
+import time
+from typing import Callable
+import numpy as np
+
+
+# the commands of the control pipe of a server
+_WEIGHTS, _METRICS, _CLOSE = range(3)
+
+
+def _serve(
+    model_fn: Callable,
+    weights: list,
+    array,
+    shape: tuple,
+    num_actions: int,
+    remotes: list,
+    control,
+    batch_size: int,
+    max_latency: float,
+) -> None:
+    """
+    Serve action requests in a server process.
+
+    Args:
+        model_fn: a (picklable) function that builds the Q network
+        weights: the initial weights of the network (None to keep them)
+        array: the shared array of the states
+        shape: the shape of the array of states, i.e., (clients, *state)
+        num_actions: the number of actions of the network
+        remotes: the pipe of each client to receive requests on
+        control: the pipe to receive commands from the owner on
+        batch_size: the number of requests that trigger a forward pass
+        max_latency: the seconds a request can wait for a batch to fill
+
+    Returns:
+        None
+
+    """
+    model = model_fn()
+    if weights is not None:
+        model.set_weights(weights)
+    states = np.frombuffer(array, dtype=np.uint8).reshape(shape)
+    mask = np.ones((batch_size, num_actions), dtype=np.float32)
+    clients = {remote: index for index, remote in enumerate(remotes)}
+    # the pending requests as (client, arrival time)
+    pending = []
+    # the number of batches of each size and the total seconds that the
+    # requests waited for their actions
+    sizes = np.zeros(batch_size + 1, dtype=np.int64)
+    waited = 0.0
+    try:
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0, pending[0][1] + max_latency - time.monotonic())
+            for connection in wait(list(clients) + [control], timeout):
+                if connection is control:
+                    command, data = control.recv()
+                    if command == _WEIGHTS:
+                        model.set_weights(data)
+                        control.send(None)
+                    elif command == _METRICS:
+                        control.send((sizes.copy(), waited))
+                    elif command == _CLOSE:
+                        return
+                    continue
+                try:
+                    connection.recv_bytes()
+                except EOFError:
+                    # the client is gone, stop listening to it
+                    del clients[connection]
+                    continue
+                pending.append((clients[connection], time.monotonic()))
+            # run a forward pass when the batch is full or the oldest
+            # request reaches its deadline
+            while pending and (len(pending) >= batch_size or
+                time.monotonic() >= pending[0][1] + max_latency
+            ):
+                batch, pending = pending[:batch_size], pending[batch_size:]
+                indexes = [index for index, _ in batch]
+                values = model.predict_on_batch([states[indexes], mask[:len(batch)]])
+                actions = np.argmax(values, axis=1)
+                now = time.monotonic()
+                for (index, arrival), action in zip(batch, actions):
+                    remotes[index].send_bytes(int(action).to_bytes(4, 'little'))
+                    waited += now - arrival
+                sizes[len(batch)] += 1
+    except KeyboardInterrupt:
+        pass
+
+
+class InferenceClient(object):
+    """A client that requests actions from an inference server."""
+
+    def __init__(self, index: int, remote, array, shape: tuple) -> None:
+        """
+        Initialize a new client of an inference server.
+
+        Args:
+            index: the index of the client (its slot of the states)
+            remote: the pipe to send requests on
+            array: the shared array of the states
+            shape: the shape of the array of states, i.e., (clients, *state)
+
+        Returns:
+            None
+
+        """
+        self.index = index
+        self.remote = remote
+        self.array = array
+        self.shape = shape
+        self._attach()
+
+    def _attach(self) -> None:
+        """View the slot of the client in the shared array of the states."""
+        states = np.frombuffer(self.array, dtype=np.uint8).reshape(self.shape)
+        self._state = states[self.index]
+
+    def __getstate__(self) -> dict:
+        """Return the state to pickle, i.e., without the view of the array."""
+        state = self.__dict__.copy()
+        del state['_state']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """View the shared array of a pickled client."""
+        self.__dict__.update(state)
+        self._attach()
+
+    def predict(self, state: np.ndarray) -> int:
+        """
+        Return the greedy action of the network for a state.
+
+        Args:
+            state: the stack of frames to predict the action of
+
+        Returns:
+            the action with the highest Q value
+
+        """
+        self._state[:] = state
+        self.remote.send_bytes(b'')
+        return int.from_bytes(self.remote.recv_bytes(), 'little')
+
+    def close(self) -> None:
+        """Detach from the server."""
+        self._state = None
+        self.remote.close()
+
+
+class InferenceServer(object):
+    """A process that batches the action requests of many actors."""
+
+    def __init__(self,
+        model_fn: Callable,
+        state_shape: tuple,
+        num_actions: int,
+        num_clients: int,
+        weights: list=None,
+        batch_size: int=None,
+        max_latency: float=0.002,
+        start_method: str='spawn',
+    ) -> None:
+        """
+        Initialize a new inference server.
+
+        Notes:
+            Each client writes its state to a slot of an array in shared
+            memory (a multiprocessing RawArray) and wakes the server through a pipe of its own. The server
+            runs one batched forward pass (`predict_on_batch` with an all-ones
+            mask, like the models of `src.models`) when `batch_size` requests
+            are waiting or when the oldest request has waited `max_latency`
+            seconds, and sends the argmax action back to each client. Clients
+            (see `client`) share the array when they're passed to processes
+            as they start, i.e., as arguments of the processes of the
+            actors.
+
+        Args:
+            model_fn: a picklable function that builds the Q network, e.g.,
+                `functools.partial(build_deep_q_model, num_actions=...)`
+            state_shape: the shape of a state, i.e. (height, width, frames)
+            num_actions: the number of actions of the network
+            num_clients: the number of clients (actors)
+            weights: the weights of the network. If None, the network keeps
+                the weights that `model_fn` builds it with
+            batch_size: the number of requests that trigger a forward pass.
+                If None, defaults to `num_clients`
+            max_latency: the max number of seconds that a request waits for
+                its batch to fill
+            start_method: the method of starting the server process as either
+                'spawn', 'forkserver', or 'fork'
+
+        Returns:
+            None
+
+        """
+        # type check the num_clients parameter
+        if not isinstance(num_clients, int):
+            raise TypeError('`num_clients` must be of type int')
+        # ensure the num_clients is within a legal range of values
+        if num_clients <= 0:
+            raise ValueError('`num_clients` must be > 0')
+        if batch_size is None:
+            batch_size = num_clients
+        if not 0 < batch_size <= num_clients:
+            raise ValueError('`batch_size` must be in [1, num_clients]')
+        if max_latency < 0:
+            raise ValueError('`max_latency` must be >= 0')
+        self.num_clients = num_clients
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        # the array of the state of each client in shared memory
+        self.shape = (num_clients, *state_shape)
+        context = multiprocessing.get_context(start_method)
+        self._array = context.RawArray('B', int(np.prod(self.shape)))
+        pipes = [context.Pipe() for _ in range(num_clients)]
+        self._remotes = [remote for remote, _ in pipes]
+        self._control, control = context.Pipe()
+        args = (
+            model_fn,
+            weights,
+            self._array,
+            self.shape,
+            num_actions,
+            [remote for _, remote in pipes],
+            control,
+            batch_size,
+            max_latency,
+        )
+        self.process = context.Process(target=_serve, args=args, daemon=True)
+        self.process.start()
+        for _, remote in pipes:
+            remote.close()
+        control.close()
+        self.closed = False
+
+    def __repr__(self) -> str:
+        """Return a debugging string of this server."""
+        return '{}(num_clients={}, batch_size={}, max_latency={})'.format(
+            self.__class__.__name__,
+            self.num_clients,
+            self.batch_size,
+            self.max_latency,
+        )
+
+    def client(self, index: int) -> InferenceClient:
+        """
+        Return the client at a given index.
+
+        Args:
+            index: the index of the client
+
+        Returns:
+            a client that requests actions from the server
+
+        """
+        return InferenceClient(index, self._remotes[index], self._array, self.shape)
+
+    def set_weights(self, weights: list) -> None:
+        """
+        Set the weights of the network of the server.
+
+        Args:
+            weights: the list of weight arrays of the Q network
+
+        Returns:
+            None
+
+        """
+        self._control.send((_WEIGHTS, weights))
+        self._control.recv()
+
+    def metrics(self) -> dict:
+        """
+        Return the metrics of the batches of the server.
+
+        Returns:
+            a dictionary with:
+                - batches: the number of forward passes
+                - requests: the number of requests served
+                - batch_sizes: the number of batches of each size
+                - fill_rate: the mean fraction of `batch_size` of a batch
+                - mean_latency: the mean number of seconds from a request to
+                  its action (in the server)
+
+        """
+        self._control.send((_METRICS, None))
+        sizes, waited = self._control.recv()
+        batches = int(sizes.sum())
+        requests = int(np.dot(sizes, np.arange(len(sizes))))
+        return {
+            'batches': batches,
+            'requests': requests,
+            'batch_sizes': sizes,
+            'fill_rate': requests / max(1, batches * self.batch_size),
+            'mean_latency': waited / max(1, requests),
+        }
+
+    def close(self) -> None:
+        """Stop the server and close the pipes of the clients."""
+        if self.closed:
+            return
+        if self.process.is_alive():
+            self._control.send((_CLOSE, None))
+        self.process.join()
+        self._control.close()
+        for remote in self._remotes:
+            remote.close()
+        self.closed = True
+
+
+# explicitly define the outward facing API of this module
+__all__ = [InferenceClient.__name__, InferenceServer.__name__]
@@ -0,0 +1,135 @@
+"""An agent that plays with a fixed policy."""
+from typing import Callable
+import gym
+import numpy as np
+from tqdm import tqdm
+from .agent import Agent
+
+
+class PolicyAgent(Agent):
+    """An agent that plays with a fixed (e.g. NumPy) policy."""
+
+    def __init__(self, env: gym.Env, policy, render_mode: str=None) -> None:
+        """
+        Create a new agent that plays with a policy.
+
+        Args:
+            env: the environment for the agent to experience
+            policy: a function of a batch of stacks of frames that returns
+                the greedy action of each stack (e.g. a NumPyPolicy)
+            render_mode: the mode for rendering frames in the OpenAI gym env
+                - None: don't render (much faster execution)
+                - 'human': render in a window to observe on screen
+
+        Returns:
+            None
+
+        """
+        super().__init__(env, render_mode=render_mode)
+        self.policy = policy
+
+    def __repr__(self) -> str:
+        """Return a debugging string of this agent."""
+        return '{}(env={}, policy={}, render_mode={})'.format(
+            self.__class__.__name__,
+            self.env,
+            self.policy,
+            self.render_mode
+        )
+
+    def predict(self, frames: np.ndarray, exploration_rate: float) -> int:
+        """
+        Predict an action from a stack of frames.
+
+        Args:
+            frames: the stack of frames to select an action for
+            exploration_rate: the exploration rate for epsilon greedy selection
+
+        Returns:
+            the predicted optimal action based on the frames
+
+        """
+        if np.random.random() < exploration_rate:
+            # select a random action and return it
+            return self.env.action_space.sample()
+        return self.policy(frames[np.newaxis, :, :, :])[0]
+
+    def predict_batch(self, states: np.ndarray, exploration_rate: float) -> np.ndarray:
+        """
+        Predict an action for each of a batch of frame stacks.
+
+        Args:
+            states: the batch of frame stacks to select actions for
+            exploration_rate: the exploration rate for epsilon greedy selection
+
+        Returns:
+            the selected action for each stack of frames
+
+        """
+        actions = np.array(self.policy(states))
+        # replace the greedy actions with random actions
+        explore = np.random.random(len(states)) < exploration_rate
+        actions[explore] = np.random.randint(self.env.action_space.n, size=explore.sum())
+
+        return actions
+
+    def play(self,
+        games: int=100,
+        exploration_rate: float=0.05,
+        num_workers: int=1,
+        env_fn: Callable=None,
+    ) -> np.ndarray:
+        """
+        Run the agent for the given number of games.
+
+        Args:
+            games: the number of games to play
+            exploration_rate: the epsilon for epsilon greedy exploration
+            num_workers: the number of worker processes to play the games
+                in parallel in (1 plays in `self.env`)
+            env_fn: a picklable function that builds the environment of a
+                worker, e.g., `functools.partial(setup_env, env_id)`
+                (required for more than one worker)
+
+        Returns:
+            an array of scores, one for each game
+
+        """
+        if num_workers > 1:
+            if env_fn is None:
+                raise ValueError('`env_fn` is required to play with workers')
+            # select the actions of every worker in a single batch
+            return self._play_parallel(games, env_fn, num_workers,
+                lambda states: self.predict_batch(states, exploration_rate)
+            )
+        # the progress bar for the operation
+        progress = tqdm(range(games), unit='game')
+        progress.set_postfix(score='?')
+
+        # a list to keep track of the scores
+        scores = np.zeros(games)
+        # iterate over the number of games
+        for game in progress:
+            done = False
+            score = 0
+            # reset the game and get the initial state
+            state = self._initial_state()
+
+            while not done:
+                # predict the best action based on the current state
+                action = self.predict(state, exploration_rate)
+                # hold the action for the number of frames
+                state, reward, done = self._next_state(action)
+                score += reward
+            # push the score onto the history
+            scores[game] = score
+            # update the progress bar
+            progress.set_postfix(score=score)
+
+        progress.close()
+
+        return scores
+
+
+# explicitly define the outward facing API of this module
+__all__ = [PolicyAgent.__name__]
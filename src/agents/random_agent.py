@@ -1,4 +1,5 @@
 """An implementation of Deep Q-Learning."""
+from typing import Callable
 import numpy as np
 from tqdm import tqdm
 from .agent import Agent
@@ -7,17 +8,32 @@ from .agent import Agent
 class RandomAgent(Agent):
     """An agent that behaves randomly."""
 
-    def play(self, games: int=100) -> np.ndarray:
+    def play(self,
+        games: int=100,
+        num_workers: int=1,
+        env_fn: Callable=None,
+    ) -> np.ndarray:
         """
         Run the agent.
 
         Args:
             games: the number of games to play
+            num_workers: the number of worker processes to play the games
+                in parallel in (1 plays in `self.env`)
+            env_fn: a picklable function that builds the environment of a
+                worker, e.g., `functools.partial(setup_env, env_id)`
+                (required for more than one worker)
 
         Returns:
             an array of scores
 
         """
+        if num_workers > 1:
+            if env_fn is None:
+                raise ValueError('`env_fn` is required to play with workers')
+            return self._play_parallel(games, env_fn, num_workers,
+                lambda states: np.random.randint(self.env.action_space.n, size=len(states))
+            )
         # a list to keep track of the scores
         scores = np.zeros(games)
         # iterate over the number of games
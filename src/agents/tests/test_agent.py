@@ -0,0 +1,75 @@
+"""Unit tests for the Agent class."""
+from types import SimpleNamespace
+from unittest import TestCase
+import numpy as np
+from ..agent import Agent
+
+
+class EpisodeEnv(object):
+    """A picklable environment whose episodes end on action 1."""
+
+    observation_space = SimpleNamespace(shape=(1, 1, 1))
+    action_space = SimpleNamespace(n=2)
+
+    def __init__(self) -> None:
+        self.steps = 0
+        self.score = 0
+        # the real scores of the episodes (like RewardCacheEnv)
+        self.episode_rewards = []
+        self.unwrapped = self
+
+    def seed(self, seed: int) -> None:
+        pass
+
+    def _observation(self) -> np.ndarray:
+        return np.full(self.observation_space.shape, self.steps, dtype=np.uint8)
+
+    def reset(self) -> np.ndarray:
+        self.steps = 0
+        self.score = 0
+        return self._observation()
+
+    def step(self, action: int) -> tuple:
+        self.steps += 1
+        done = action == 1
+        # the score of an episode is its length plus 100 for each episode
+        # that the environment played before it
+        reward = 1 + (100 * len(self.episode_rewards) if done else 0)
+        self.score += reward
+        if done:
+            # the real score is 10 times the (clipped) score of the agent
+            self.episode_rewards.append(10 * self.score)
+        return self._observation(), reward, done, {}
+
+    def close(self) -> None:
+        pass
+
+
+class Agent_should_play_games_in_parallel_in_order(TestCase):
+    def test(self):
+        env = EpisodeEnv()
+        env.episode_rewards.append(-1)
+        agent = Agent(env)
+        # the episodes of the worker at index i last 2 + i steps
+        lengths = np.array([2, 3, 4])
+
+        def select_actions(states: np.ndarray) -> np.ndarray:
+            return (states[:, 0, 0, 0] + 1 == lengths).astype(int)
+
+        scores = agent._play_parallel(7, EpisodeEnv, 3, select_actions)
+        # the games are numbered in the order they start: games 0, 1, 2 on
+        # workers 0, 1, 2, then game 3 on worker 0 (step 2), game 4 on
+        # worker 1 (step 3), games 5 and 6 on workers 0 and 2 (step 4)
+        expected = [2, 3, 4, 102, 103, 202, 104]
+        self.assertEqual(expected, list(scores))
+        # the real scores of the workers are appended in game order
+        self.assertEqual([-1] + [10 * score for score in expected], env.episode_rewards)
+
+
+class Agent_should_play_fewer_games_than_workers(TestCase):
+    def test(self):
+        env = EpisodeEnv()
+        agent = Agent(env)
+        scores = agent._play_parallel(2, EpisodeEnv, 4, lambda states: np.ones(len(states), dtype=int))
+        self.assertEqual([1, 1], list(scores))
+        self.assertEqual([10, 10], env.episode_rewards)
@@ -0,0 +1,99 @@
+"""Unit tests for the Ape-X actors."""
+from unittest import TestCase
+import numpy as np
+from ..ape_x import _encode, ApeXActors, exploration_rates
+
+
+def segment(length: int, done: bool=False, history: int=4) -> tuple:
+    """
+    Return a segment of consecutive experiences of random frames.
+
+    Args:
+        length: the number of experiences in the segment
+        done: whether the episode ends with the last experience
+        history: the number of frames in a state
+
+    Returns:
+        a tuple of:
+            - the consecutive frames of the segment
+            - the list of (s, a, r, d, s2) experiences of the segment
+
+    """
+    random = np.random.RandomState(length)
+    frames = random.randint(0, 256, (length + history, 5, 6), dtype=np.uint8)
+    states = [np.stack(frames[i:i + history], axis=-1) for i in range(length + 1)]
+    actions = random.randint(0, 3, length)
+    rewards = random.randint(-1, 2, length)
+    dones = [False] * (length - 1) + [done]
+    experiences = list(zip(states[:-1], actions, rewards, dones, states[1:]))
+    return frames, experiences
+
+
+class exploration_rates_should_spread_rates(TestCase):
+    def test(self):
+        self.assertEqual([0.4], list(exploration_rates(1)))
+        rates = exploration_rates(8)
+        self.assertEqual(8, len(rates))
+        self.assertAlmostEqual(0.4, rates[0])
+        self.assertAlmostEqual(0.4**4, rates[3])
+        self.assertAlmostEqual(0.4**8, rates[-1])
+        self.assertTrue(np.all(np.diff(rates) < 0))
+        self.assertTrue(np.allclose(0.5**(1 + 3 * np.arange(4) / 3), exploration_rates(4, 0.5, 3)))
+
+
+class encode_should_send_each_frame_once(TestCase):
+    def test(self):
+        frames, experiences = segment(10, done=True)
+        values = np.random.RandomState(1).randn(11, 3).astype(np.float32)
+        encoded, actions, rewards, dones, td_errors = _encode(experiences, values, 0.9)
+        self.assertTrue(np.array_equal(frames, encoded))
+        self.assertEqual([a for _, a, *_ in experiences], list(actions))
+        self.assertEqual([r for _, _, r, *_ in experiences], list(rewards))
+        self.assertEqual([False] * 9 + [True], list(dones))
+        self.assertEqual(np.float32, td_errors.dtype)
+        for index, (_, a, r, d, _) in enumerate(experiences):
+            target = r + (0 if d else 0.9 * values[index + 1].max())
+            self.assertAlmostEqual(target - values[index, a], td_errors[index], places=5)
+
+
+class ApeXActors__init__(TestCase):
+    def test(self):
+        self.assertRaises(TypeError, ApeXActors, None, None, 1, 1.0)
+        self.assertRaises(ValueError, ApeXActors, None, None, 1, 0)
+        self.assertRaises(ValueError, ApeXActors, None, None, 1, 2, rates=[0.1])
+        actors = ApeXActors(None, None, 1, 2, segment_length=8, seed=3)
+        self.assertEqual('ApeXActors(num_actors=2, segment_length=8, seed=3)', repr(actors))
+        self.assertEqual(2, len(actors.rates))
+        actors.close()
+        self.assertTrue(actors.closed)
+
+
+class ApeXActors_should_receive_encoded_segments(TestCase):
+    def test(self):
+        # the actors aren't started, the segments are put on the queue of
+        # the actors like an actor process does
+        actors = ApeXActors(None, None, 1, 2)
+        try:
+            for index, (length, done) in enumerate([(12, False), (7, True)]):
+                _, experiences = segment(length, done=done)
+                values = np.zeros((length + 1, 3), dtype=np.float32)
+                actors.segments.put((index, *_encode(experiences, values, 0.99), [float(length)]))
+                received = actors.receive()
+                self.assertEqual(1, len(received))
+                actor, s, a, r, d, s2, td_errors, scores = received[0]
+                self.assertEqual(index, actor)
+                self.assertEqual((length, 5, 6, 4), s.shape)
+                self.assertEqual((length, 5, 6, 4), s2.shape)
+                # the stacks of frames are rebuilt exactly
+                for experience, *actual in zip(experiences, s, a, r, d, s2):
+                    self.assertTrue(np.array_equal(experience[0], actual[0]))
+                    self.assertEqual(experience[1], actual[1])
+                    self.assertEqual(experience[2], actual[2])
+                    self.assertEqual(experience[3], actual[3])
+                    self.assertTrue(np.array_equal(experience[4], actual[4]))
+                self.assertEqual(length, len(td_errors))
+                self.assertEqual([float(length)], scores)
+                # the states are views of the frames of the segment
+                self.assertFalse(s.flags.writeable)
+        finally:
+            actors.close()
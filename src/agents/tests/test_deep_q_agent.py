@@ -0,0 +1,101 @@
+"""Unit tests for the pipelined training of the DeepQAgent class."""
+import time
+from types import SimpleNamespace
+from unittest import TestCase
+import numpy as np
+from src.base import ReplayQueue
+from ..deep_q_agent import DeepQAgent
+
+
+class StubModel(object):
+    """A stand-in for a keras model that only has weights."""
+
+    def __init__(self) -> None:
+        self.weights = [np.zeros(1)]
+
+    def _make_predict_function(self) -> None:
+        pass
+
+    def _make_train_function(self) -> None:
+        pass
+
+    def get_weights(self) -> list:
+        return [weight.copy() for weight in self.weights]
+
+    def set_weights(self, weights: list) -> None:
+        self.weights = weights
+
+
+class StubAgent(DeepQAgent):
+    """A Deep Q agent with stand-in models, environment, and learning."""
+
+    def __init__(self, episode_length: int=10, fail_at: int=None) -> None:
+        # the agent isn't initialized with the models and replay queue of
+        # DeepQAgent, the methods that use them are replaced below
+        self.env = SimpleNamespace(action_space=SimpleNamespace(sample=lambda: 1))
+        self.update_frequency = 4
+        # the actor always acts with its (stand-in) policy
+        self.exploration_rate = SimpleNamespace(value=0., step=lambda: None)
+        self.model = StubModel()
+        self.target_model = StubModel()
+        self.actor_model = StubModel()
+        self.actor_policy = lambda states: np.zeros(len(states), dtype=int)
+        self.queue = ReplayQueue(10)
+        self.prefetch_batches = None
+        self._train_step = None
+        self.frames_played = 0
+        self.episode_length = episode_length
+        # the frame to raise an error at (None to never raise)
+        self.fail_at = fail_at
+        self.steps = 0
+        self.remembered = 0
+        # the number of updates that the actor played ahead of the learner
+        # at the start of each update
+        self.ahead = []
+
+    def _initial_state(self) -> np.ndarray:
+        self.steps = 0
+        return np.zeros((1, 1, 1), dtype=np.uint8)
+
+    def _next_state(self, action: int) -> tuple:
+        self.steps += 1
+        if self.frames_played + 1 == self.fail_at:
+            raise RuntimeError('the emulator failed')
+        done = self.steps == self.episode_length
+        return np.zeros((1, 1, 1), dtype=np.uint8), 1, done
+
+    def _remember(self, *experience) -> None:
+        self.remembered += 1
+
+    def _learn(self, frame: int, batch_size: int, batch: tuple) -> tuple:
+        # the updates before this one are done
+        updates = frame // self.update_frequency - 1
+        self.ahead.append(self.frames_played / self.update_frequency - updates)
+        # learning is slower than acting, the actor runs ahead
+        time.sleep(0.002)
+        return 1, batch
+
+
+class DeepQAgent_train_pipelined_should_bound_the_actor_lag(TestCase):
+    def test(self):
+        agent = StubAgent()
+        scores = []
+        callback = lambda agent, score, loss: scores.append(score)
+        agent.train_pipelined(frames_to_play=400, callback=callback, sync_every=5, max_lag=3)
+        self.assertEqual(400, agent.frames_played)
+        self.assertEqual(400, agent.remembered)
+        self.assertEqual(100, len(agent.ahead))
+        # the actor plays ahead, but never more than max_lag updates
+        self.assertGreater(max(agent.ahead), 0)
+        self.assertLessEqual(max(agent.ahead), 3)
+        self.assertEqual([10] * 40, scores)
+
+
+class DeepQAgent_train_pipelined_should_raise_errors_of_the_actor(TestCase):
+    def test(self):
+        agent = StubAgent(fail_at=50)
+        with self.assertRaises(RuntimeError):
+            agent.train_pipelined(frames_to_play=400, max_lag=3)
+        # the learner stops at the frames the actor played before the error
+        self.assertEqual(49, agent.frames_played)
+        self.assertLessEqual(len(agent.ahead), 49 // agent.update_frequency)
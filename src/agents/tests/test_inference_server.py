@@ -0,0 +1,101 @@
+"""Unit tests for the InferenceServer class."""
+import multiprocessing
+from functools import partial
+import numpy as np
+from unittest import TestCase
+from ..inference_server import InferenceServer
+
+
+class LinearModel(object):
+    """A model whose Q values are a linear function of the mean pixels."""
+
+    def __init__(self, num_actions: int) -> None:
+        self.weights = [np.arange(num_actions, dtype=np.float32)]
+
+    def get_weights(self) -> list:
+        return self.weights
+
+    def set_weights(self, weights: list) -> None:
+        self.weights = weights
+
+    def predict_on_batch(self, inputs: list) -> np.ndarray:
+        states, mask = inputs
+        means = states.reshape(len(states), -1).mean(axis=1, keepdims=True)
+        return mask * np.cos(means / 10 + self.weights[0])
+
+
+def expected_action(state: np.ndarray, weights: np.ndarray) -> int:
+    """Return the action of the linear model for a state."""
+    return int(np.argmax(np.cos(state.mean() / 10 + weights)))
+
+
+def states(count: int, seed: int) -> np.ndarray:
+    """Return a batch of random states."""
+    return np.random.RandomState(seed).randint(0, 256, (count, 4, 4, 2), dtype=np.uint8)
+
+
+def predict_all(client, seed: int, results) -> None:
+    """Predict the actions of some states with a client (in a process)."""
+    results.put((seed, [client.predict(state) for state in states(20, seed)]))
+    client.close()
+
+
+class InferenceServer__init__(TestCase):
+    def test(self):
+        model_fn = partial(LinearModel, 3)
+        self.assertRaises(TypeError, InferenceServer, model_fn, (4, 4, 2), 3, 1.0)
+        self.assertRaises(ValueError, InferenceServer, model_fn, (4, 4, 2), 3, 0)
+        self.assertRaises(ValueError, InferenceServer, model_fn, (4, 4, 2), 3, 2, batch_size=3)
+        self.assertRaises(ValueError, InferenceServer, model_fn, (4, 4, 2), 3, 2, max_latency=-1)
+
+
+class InferenceServer_should_serve_processes_in_batches(TestCase):
+    def test(self):
+        server = InferenceServer(partial(LinearModel, 5), (4, 4, 2), 5, 3, max_latency=60)
+        self.assertEqual('InferenceServer(num_clients=3, batch_size=3, max_latency=60)', repr(server))
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        processes = [
+            context.Process(target=predict_all, args=(server.client(index), index, results))
+            for index in range(3)
+        ]
+        for process in processes:
+            process.start()
+        actions = dict(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+            self.assertEqual(0, process.exitcode)
+        for seed in range(3):
+            expected = [expected_action(state, np.arange(5)) for state in states(20, seed)]
+            self.assertEqual(expected, actions[seed])
+        # the clients are in lockstep, i.e., every batch waits to be full
+        metrics = server.metrics()
+        self.assertEqual(20, metrics['batches'])
+        self.assertEqual(60, metrics['requests'])
+        self.assertEqual([0, 0, 0, 20], list(metrics['batch_sizes']))
+        self.assertEqual(1.0, metrics['fill_rate'])
+        server.close()
+
+
+class InferenceServer_should_serve_partial_batches_after_deadline(TestCase):
+    def test(self):
+        server = InferenceServer(partial(LinearModel, 4), (4, 4, 2), 4, 2, max_latency=0.01)
+        client = server.client(0)
+        for state in states(5, 1):
+            self.assertEqual(expected_action(state, np.arange(4)), client.predict(state))
+        metrics = server.metrics()
+        self.assertEqual([0, 5, 0], list(metrics['batch_sizes']))
+        self.assertEqual(0.5, metrics['fill_rate'])
+        self.assertGreaterEqual(metrics['mean_latency'], 0.01)
+        server.close()
+
+
+class InferenceServer_should_set_weights(TestCase):
+    def test(self):
+        server = InferenceServer(partial(LinearModel, 4), (4, 4, 2), 4, 1, max_latency=0)
+        client = server.client(0)
+        weights = np.array([3, 0, 1, 2], dtype=np.float32)
+        server.set_weights([weights])
+        for state in states(10, 2):
+            self.assertEqual(expected_action(state, weights), client.predict(state))
+        server.close()
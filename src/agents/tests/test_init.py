@@ -0,0 +1,18 @@
+"""Unit tests for the imports of the agents package."""
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+
+# the root of the repository that `src` is a package of
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+
+class agents_should_import_without_keras(TestCase):
+    def test(self):
+        # import the package in a fresh interpreter, the interpreter of the
+        # tests may have imported Keras already
+        code = 'import sys, src.agents; print(sorted({"keras", "tensorflow"} & set(sys.modules)))'
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT)
+        self.assertEqual('[]', output.decode().strip())
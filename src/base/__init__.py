@@ -1,12 +1,28 @@
 """Base components for the project."""
 from .annealing_variable import AnnealingVariable
+from .compressed_replay_queue import CompressedReplayQueue
+from .frame_replay_queue import FrameReplayQueue
+from .memmap_replay_queue import MemmapReplayQueue
+from .numpy_policy import NumPyPolicy
+from .prefetching_replay_queue import PrefetchingReplayQueue
 from .prioritized_replay_queue import PrioritizedReplayQueue
 from .replay_queue import ReplayQueue
+from .shared_replay_queue import SharedReplayQueue
+from .sum_tree import SumTree
+from .synchronized_replay_queue import SynchronizedReplayQueue
 
 
 # explicitly define the outward facing API for the package.
 __all__ = [
     AnnealingVariable.__name__,
+    CompressedReplayQueue.__name__,
+    FrameReplayQueue.__name__,
+    MemmapReplayQueue.__name__,
+    NumPyPolicy.__name__,
+    PrefetchingReplayQueue.__name__,
     PrioritizedReplayQueue.__name__,
     ReplayQueue.__name__,
+    SharedReplayQueue.__name__,
+    SumTree.__name__,
+    SynchronizedReplayQueue.__name__,
 ]
@@ -0,0 +1,85 @@
+"""Methods for reading and writing large arrays in chunks."""
+import numpy as np
+
+
+# the default number of bytes to copy at a time
+CHUNK_BYTES = 64 * 2**20
+
+
+def _chunks(array: np.ndarray, chunk_bytes: int) -> range:
+    """Return a range over the starts of the chunks of an array."""
+    row_bytes = max(1, array[:1].nbytes)
+    return range(0, len(array), max(1, chunk_bytes // row_bytes))
+
+
+def save_array(filename: str,
+    array: np.ndarray,
+    chunk_bytes: int=CHUNK_BYTES,
+) -> None:
+    """
+    Save an array to a `.npy` file in chunks.
+
+    Notes:
+        the chunks bound the extra memory of the write, i.e., arrays that
+        are memory-mapped from disk are never loaded into memory at once
+
+    Args:
+        filename: the name of the `.npy` file to write
+        array: the array to write
+        chunk_bytes: the max number of bytes to copy at a time
+
+    Returns:
+        None
+
+    """
+    out = np.lib.format.open_memmap(filename, 'w+', array.dtype, array.shape)
+    if array.ndim == 0:
+        out[...] = array
+    else:
+        step = _chunks(array, chunk_bytes).step
+        for start in _chunks(array, chunk_bytes):
+            out[start:start + step] = array[start:start + step]
+    out.flush()
+    del out
+
+
+def load_array(filename: str,
+    out: np.ndarray=None,
+    chunk_bytes: int=CHUNK_BYTES,
+) -> np.ndarray:
+    """
+    Load an array from a `.npy` file in chunks.
+
+    Args:
+        filename: the name of the `.npy` file to read
+        out: an optional array to read into. If None, a new array is made
+        chunk_bytes: the max number of bytes to copy at a time
+
+    Returns:
+        the array with the contents of the file
+
+    """
+    array = np.load(filename, mmap_mode='r')
+    if out is None:
+        out = np.empty(array.shape, dtype=array.dtype)
+    elif out.shape != array.shape or out.dtype != array.dtype:
+        msg = 'array in {} has shape {} and type {}, expected {} and {}'
+        raise ValueError(msg.format(
+            filename,
+            array.shape,
+            array.dtype,
+            out.shape,
+            out.dtype,
+        ))
+    if array.ndim == 0:
+        out[...] = array
+    else:
+        step = _chunks(array, chunk_bytes).step
+        for start in _chunks(array, chunk_bytes):
+            out[start:start + step] = array[start:start + step]
+
+    return out
+
+
+# explicitly define the outward facing API of this module
+__all__ = [save_array.__name__, load_array.__name__]
@@ -0,0 +1,729 @@
+"""A queue that stores each frame of previous experiences only once."""
+import os
+import numpy as np
+from .array_io import save_array, load_array
+
+
+class FrameReplayQueue(object):
+    """A replay queue that de-duplicates the frames of stacked states."""
+
+    def __init__(self,
+        size: int,
+        frame_capacity: int=None,
+        n_step: int=1,
+        discount_factor: float=0.99,
+        streams: int=1,
+    ) -> None:
+        """
+        Initialize a new frame replay buffer with a given size.
+
+        Notes:
+            States are expected as stacks of frames along the last axis, i.e.
+            (height, width, frames), like the observations of FrameStackEnv.
+            Each single frame is stored once in a ring of frames and the
+            states are rebuilt from frame numbers when sampling.
+
+        Args:
+            size: the size of the replay buffer
+                  (the number of previous experiences to store)
+            frame_capacity: the number of single frames to store. if None,
+                  the capacity is `size` plus room for an extra frame at the
+                  start of every hundred experiences and two frame stacks
+                  per stream
+            n_step: the number of steps, n, of the returns to sample. if
+                above 1, each sample has the discounted reward of the next n
+                steps (cut short at the end of an episode), the terminal flag
+                of the last step, and the next state after n steps
+            discount_factor: the discount factor, γ, of n-step returns
+            streams: the number of environments that push their experiences
+                in turns, e.g., the environments of a VecEnv (see `push`)
+
+        Returns:
+            None
+
+        """
+        # type check the n_step parameter
+        if not isinstance(n_step, int):
+            raise TypeError('`n_step` must be of type int')
+        # ensure the n_step is within a legal range of values
+        if n_step <= 0:
+            raise ValueError('`n_step` must be > 0')
+        # type check the streams parameter
+        if not isinstance(streams, int):
+            raise TypeError('`streams` must be of type int')
+        # ensure the streams is within a legal range of values
+        if streams <= 0:
+            raise ValueError('`streams` must be > 0')
+        self.size = size
+        self.frame_capacity = frame_capacity
+        self.n_step = n_step
+        self.discount_factor = discount_factor
+        self.streams = streams
+        # the discount of the reward of each step of an n-step return
+        self._discounts = discount_factor**np.arange(n_step, dtype=np.float32)
+        # the storage arrays are allocated on the first push (when the shape
+        # of the frames is known)
+        self.frames = None
+        self.s_frames = None
+        self.s2_frames = None
+        self.actions = None
+        self.rewards = None
+        self.dones = None
+        # the shape of a single frame, i.e. (height, width)
+        self.frame_shape = None
+        # setup variables for the index and top
+        self.index = 0
+        self.top = 0
+        # the number of frames written over the lifetime of the queue. frames
+        # are addressed by this number, i.e. frame n is in slot n % capacity
+        self.frame_count = 0
+        # the frame numbers of the last next state that each stream pushed
+        self._last = [None] * streams
+        # the frame IDs of the last next states (for states from FrameStackEnv)
+        self._last_ids = [None] * streams
+        # the index of the experience whose current state ends with each
+        # frame slot, i.e., the experience after the experience whose next
+        # state ends with the frame (allocated with the frames)
+        self._followers = None
+        # a reusable buffer of frames for gathering the frames of states
+        self._gather_buffer = None
+
+    def __repr__(self) -> str:
+        """Return an executable string representation of self."""
+        return '{}(size={})'.format(self.__class__.__name__, self.size)
+
+    @property
+    def arrays(self) -> dict:
+        """Return a dictionary of the storage arrays keyed by name."""
+        if self.frames is None:
+            return {}
+        return {
+            'frames': self.frames,
+            's_frames': self.s_frames,
+            's2_frames': self.s2_frames,
+            'actions': self.actions,
+            'rewards': self.rewards,
+            'dones': self.dones,
+        }
+
+    @property
+    def nbytes(self) -> int:
+        """Return the number of bytes allocated by the queue."""
+        return sum(array.nbytes for array in self.arrays.values())
+
+    @property
+    def memory_stats(self) -> dict:
+        """Return a dictionary of statistics about the memory of the queue."""
+        frames = min(self.frame_count, self.frame_capacity or 0)
+        frame_bytes = frames * int(np.prod(self.frame_shape or ()))
+        stored_frame_bytes = self._stored_frame_bytes
+        return {
+            'size': self.size,
+            'experiences': self.top,
+            'frames': frames,
+            'frame_bytes': frame_bytes,
+            'stored_frame_bytes': stored_frame_bytes,
+            'compression_ratio': frame_bytes / max(1, stored_frame_bytes),
+            'nbytes': self.nbytes,
+        }
+
+    @property
+    def _stored_frame_bytes(self) -> int:
+        """Return the number of bytes used to store the frames in the ring."""
+        frames = min(self.frame_count, self.frame_capacity or 0)
+        return frames * int(np.prod(self.frame_shape or ()))
+
+    @property
+    def state(self) -> dict:
+        """Return a dictionary of the counters of the queue keyed by name."""
+        history = 0 if self.s_frames is None else self.s_frames.shape[1]
+        # the last next state of each stream (-1 for streams without one)
+        last = np.full((self.streams, history), -1, dtype=np.int64)
+        for stream, numbers in enumerate(self._last):
+            if numbers is not None:
+                last[stream] = numbers
+        return {
+            'index': self.index,
+            'top': self.top,
+            'frame_count': self.frame_count,
+            'last': last,
+        }
+
+    def save(self, directory: str) -> None:
+        """
+        Save the contents of the queue to a directory.
+
+        Notes:
+            Each storage array is written to a `.npy` file in chunks and the
+            counters of the queue to a `state.npz` file.
+
+        Args:
+            directory: the directory to save the queue to
+
+        Returns:
+            None
+
+        """
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        for name, array in self.arrays.items():
+            save_array('{}/{}.npy'.format(directory, name), array)
+        np.savez('{}/state.npz'.format(directory), **self.state)
+
+    def load(self, directory: str) -> None:
+        """
+        Load the contents of the queue from a directory.
+
+        Args:
+            directory: the directory to load the queue from (see `save`)
+
+        Returns:
+            None
+
+        """
+        with np.load('{}/state.npz'.format(directory)) as state:
+            state = {key: state[key] for key in state.files}
+        # an empty queue has no arrays to load
+        if int(state['frame_count']):
+            self._load_arrays(directory)
+        self._restore_state(state)
+
+    def _load_arrays(self, directory: str) -> None:
+        """
+        Load the storage arrays of the queue from a directory.
+
+        Args:
+            directory: the directory to load the arrays from (see `save`)
+
+        Returns:
+            None
+
+        """
+        frames = np.load('{}/frames.npy'.format(directory), mmap_mode='r')
+        s_frames = np.load('{}/s_frames.npy'.format(directory), mmap_mode='r')
+        if len(s_frames) != self.size:
+            msg = 'saved queue has size {}, expected {}'
+            raise ValueError(msg.format(len(s_frames), self.size))
+        # allocate storage arrays that match the saved arrays
+        if self.frames is None or self.frames.shape != frames.shape:
+            self.frame_capacity = len(frames)
+            self._setup((*frames.shape[1:], s_frames.shape[1]))
+        for name, array in self.arrays.items():
+            load_array('{}/{}.npy'.format(directory, name), out=array)
+
+    def _restore_state(self, state: dict) -> None:
+        """
+        Restore the counters of the queue.
+
+        Args:
+            state: a dictionary of counters from the `state` property
+
+        Returns:
+            None
+
+        """
+        self.index = int(state['index'])
+        self.top = int(state['top'])
+        self.frame_count = int(state['frame_count'])
+        last = state['last']
+        # queues saved before streams have the last next state of one stream
+        if last.ndim == 1:
+            last = last[np.newaxis] if len(last) else np.empty((0, 0), np.int64)
+        self._last = [None] * self.streams
+        for stream, numbers in enumerate(last[:self.streams]):
+            if len(numbers) and numbers[0] >= 0:
+                self._last[stream] = numbers
+        self._last_ids = [None] * self.streams
+        # find the experience after each experience again
+        if self.frames is not None:
+            live = (self.index - self.top + np.arange(self.top)) % self.size
+            self._followers[:] = -1
+            self._followers[self.s_frames[live, -1] % self.frame_capacity] = live
+
+    def _allocate(self, name: str, shape: tuple, dtype: np.dtype) -> np.ndarray:
+        """
+        Allocate a new storage array for the queue.
+
+        Args:
+            name: the name of the array to allocate
+            shape: the shape of the array to allocate
+            dtype: the data-type of the array to allocate
+
+        Returns:
+            a zero filled array with given shape and type
+
+        """
+        return np.zeros(shape, dtype=dtype)
+
+    def _setup(self, shape: tuple) -> None:
+        """
+        Allocate the storage arrays for states of a given shape.
+
+        Args:
+            shape: the shape of a single state, i.e. (height, width, frames)
+
+        Returns:
+            None
+
+        """
+        *frame_shape, history = shape
+        self.frame_shape = tuple(frame_shape)
+        if self.frame_capacity is None:
+            self.frame_capacity = self.size + self.size // 100 + 2 * history * self.streams
+        # the frames of the current state need to survive the writes for the
+        # next state, i.e. the capacity has to fit at least two frame stacks
+        if self.frame_capacity < 2 * history:
+            raise ValueError('`frame_capacity` must fit two frame stacks')
+        frames_shape = (self.frame_capacity, *frame_shape)
+        self.frames = self._allocate('frames', frames_shape, np.uint8)
+        self.s_frames = self._allocate('s_frames', (self.size, history), np.int64)
+        self.s2_frames = self._allocate('s2_frames', (self.size, history), np.int64)
+        self.actions = self._allocate('actions', (self.size,), np.uint8)
+        self.rewards = self._allocate('rewards', (self.size,), np.float32)
+        self.dones = self._allocate('dones', (self.size,), np.bool_)
+        self._followers = np.full(self.frame_capacity, -1, dtype=np.int64)
+
+    def _evict(self) -> None:
+        """Remove the oldest experience from the queue."""
+        self.top -= 1
+
+    def _write_frame(self, frame: np.ndarray) -> int:
+        """
+        Write a single frame to the ring of frames.
+
+        Args:
+            frame: the frame to write
+
+        Returns:
+            the number of the frame that was written
+
+        """
+        number = self.frame_count
+        # evict the oldest experiences that reference the frame this write
+        # replaces
+        oldest = number - self.frame_capacity
+        while self.top and self._oldest_frame() <= oldest:
+            self._evict()
+        self._set_frame(number, frame)
+        self.frame_count += 1
+
+        return number
+
+    def _oldest_frame(self) -> int:
+        """
+        Return the number of the oldest frame of the oldest experiences.
+
+        Notes:
+            Experiences reference their frames in push order, so the oldest
+            frame of a queue is the first frame of its oldest state. With
+            streams that push in turns, a state continues the frames that
+            its stream wrote up to `streams` pushes per frame ago, i.e., the
+            oldest frame is the first frame of one of the oldest
+            `streams * (history + 1)` states
+
+        Returns:
+            the number of the oldest frame that experiences reference
+
+        """
+        first = self.index - self.top
+        if self.streams == 1:
+            return self.s_frames[first % self.size, 0]
+        oldest = min(self.top, self.streams * (self.s_frames.shape[1] + 1))
+        return self.s_frames[(first + np.arange(oldest)) % self.size, 0].min()
+
+    def _set_frame(self, number: int, frame: np.ndarray) -> None:
+        """
+        Store a single frame in the ring of frames.
+
+        Args:
+            number: the number of the frame to store
+            frame: the frame to store
+
+        Returns:
+            None
+
+        """
+        self.frames[number % self.frame_capacity] = frame
+
+    def _get_frame(self, number: int) -> np.ndarray:
+        """
+        Return a single frame from the ring of frames.
+
+        Args:
+            number: the number of the frame to return
+
+        Returns:
+            the frame with the given number
+
+        """
+        return self.frames[number % self.frame_capacity]
+
+    def _write_stack(self, stack: np.ndarray, ids: np.ndarray=None) -> np.ndarray:
+        """
+        Write a stack of frames to the ring of frames.
+
+        Args:
+            stack: the stack of frames to write (frames on the last axis)
+            ids: the optional IDs of the frames in the stack
+
+        Returns:
+            a vector with the number of each frame in the stack
+
+        """
+        numbers = np.empty(stack.shape[-1], dtype=np.int64)
+        for index in range(stack.shape[-1]):
+            # stacks at the start of an episode repeat the initial frame, only
+            # write one copy of repeated frames
+            if not index:
+                repeated = False
+            elif ids is not None:
+                repeated = ids[index] == ids[index - 1]
+            else:
+                repeated = np.array_equal(stack[..., index], stack[..., index - 1])
+            if repeated:
+                numbers[index] = numbers[index - 1]
+            else:
+                numbers[index] = self._write_frame(stack[..., index])
+
+        return numbers
+
+    def _is_stored(self,
+        stack: np.ndarray,
+        numbers: np.ndarray,
+        ids: np.ndarray=None,
+        stored_ids: np.ndarray=None,
+    ) -> bool:
+        """
+        Return True if the given stack matches a stored stack of frames.
+
+        Args:
+            stack: the stack of frames to compare (frames on the last axis)
+            numbers: the numbers of the stored frames to compare against
+            ids: the optional IDs of the frames in the stack
+            stored_ids: the optional IDs of the stored frames. if both sets
+                of IDs are given, they're compared instead of the frames
+
+        Returns:
+            True if the stack matches the stored frames, False otherwise
+
+        """
+        # make sure the frames are still in the ring
+        if numbers[0] <= self.frame_count - self.frame_capacity:
+            return False
+        if ids is not None and stored_ids is not None:
+            return np.array_equal(ids, stored_ids)
+        for index, number in enumerate(numbers):
+            if not np.array_equal(stack[..., index], self._get_frame(number)):
+                return False
+
+        return True
+
+    def _is_shifted(self,
+        s: np.ndarray,
+        s2: np.ndarray,
+        s_ids: np.ndarray=None,
+        s2_ids: np.ndarray=None,
+    ) -> bool:
+        """
+        Return True if a next state is the current state with one new frame.
+
+        Args:
+            s: the current stack of frames (frames on the last axis)
+            s2: the next stack of frames (frames on the last axis)
+            s_ids: the optional IDs of the frames of `s`
+            s2_ids: the optional IDs of the frames of `s2`. if both sets of
+                IDs are given, they're compared instead of the frames
+
+        Returns:
+            True if the first frames of `s2` are the last frames of `s`
+
+        """
+        if s_ids is not None and s2_ids is not None:
+            return np.array_equal(s2_ids[:-1], s_ids[1:])
+        for index in range(s.shape[-1] - 1):
+            if not np.array_equal(s2[..., index], s[..., index + 1]):
+                return False
+
+        return True
+
+    def _gather(self,
+        frames: np.ndarray,
+        slots: np.ndarray,
+        out: np.ndarray=None,
+    ) -> np.ndarray:
+        """
+        Return a batch of states from a batch of frame slots.
+
+        Args:
+            frames: the array of frames to gather from
+            slots: a matrix of slots in frames with a state in each row
+            out: an optional array to write the states to
+
+        Returns:
+            a batch of states with the frames of each state on the last axis
+
+        """
+        if out is None:
+            shape = (len(slots), *frames.shape[1:], slots.shape[1])
+            out = np.empty(shape, dtype=frames.dtype)
+        shape = (len(slots), *frames.shape[1:])
+        if self._gather_buffer is None or self._gather_buffer.shape != shape:
+            self._gather_buffer = np.empty(shape, dtype=frames.dtype)
+        # `take` buffers its output to raise on out-of-range indexes, check
+        # the range here so it can write in place with `mode='clip'`
+        if slots.size and (slots.min() < 0 or slots.max() >= len(frames)):
+            raise IndexError('frame slot out of range for {} frames'.format(len(frames)))
+        # gather one frame of each state at a time, this is much faster than
+        # a transpose of the gathered frames into the layout of the states.
+        # `take` only writes to its output without a temporary array when
+        # the output is contiguous, i.e., gather into the buffer first
+        for index in range(slots.shape[1]):
+            np.take(frames, slots[:, index], axis=0, out=self._gather_buffer, mode='clip')
+            out[..., index] = self._gather_buffer
+
+        return out
+
+    def _stack(self, numbers: np.ndarray, out: np.ndarray=None) -> np.ndarray:
+        """
+        Return a batch of states from a batch of frame numbers.
+
+        Args:
+            numbers: a matrix of frame numbers with a state in each row
+            out: an optional array to write the states to
+
+        Returns:
+            a batch of states with the frames of each state on the last axis
+
+        """
+        return self._gather(self.frames, numbers % self.frame_capacity, out=out)
+
+    def push(self,
+        s: np.ndarray,
+        a: int,
+        r: int,
+        d: bool,
+        s2: np.ndarray,
+        stream: int=0,
+    ) -> None:
+        """
+        Push a new experience onto the queue.
+
+        Args:
+            s: the current state
+            a: the action to get from current state `s` to next state `s2`
+            r: the reward resulting from taking action `a` in state `s`
+            d: the flag denoting whether the episode ended after action `a`
+            s2: the next state from taking action `a` in state `s`
+            stream: the index of the environment of the experience. the
+                current state of an experience is compared to the last next
+                state of its stream, i.e., streams that push in turns store
+                each of their frames only once
+
+        Notes:
+            states from FrameStackEnv have the IDs of their frames, frames
+            are compared by ID instead of by pixel
+
+        Returns:
+            None
+
+        """
+        if not 0 <= stream < self.streams:
+            raise ValueError('`stream` must be in [0, {})'.format(self.streams))
+        s_ids = getattr(s, 'frame_ids', None)
+        s2_ids = getattr(s2, 'frame_ids', None)
+        s = np.asarray(s)
+        s2 = np.asarray(s2)
+        if self.frames is None:
+            self._setup(s.shape)
+        # the experience at the index is replaced when the queue is full
+        if self.top == self.size:
+            self._evict()
+        # the current state is usually the last next state, otherwise (i.e.,
+        # at the start of an episode) write the frames of the current state
+        last, last_ids = self._last[stream], self._last_ids[stream]
+        if last is not None and self._is_stored(s, last, s_ids, last_ids):
+            s_frames = last
+        else:
+            s_frames = self._write_stack(s, s_ids)
+        # the next state is usually the current state with one new frame
+        if self._is_shifted(s, s2, s_ids, s2_ids):
+            s2_frames = np.append(s_frames[1:], self._write_frame(s2[..., -1]))
+        else:
+            s2_frames = self._write_stack(s2, s2_ids)
+        # push the variables onto the queue
+        self.s_frames[self.index] = s_frames
+        self.s2_frames[self.index] = s2_frames
+        self.actions[self.index] = a
+        self.rewards[self.index] = r
+        self.dones[self.index] = d
+        self._followers[s_frames[-1] % self.frame_capacity] = self.index
+        self._last[stream] = s2_frames
+        self._last_ids[stream] = s2_ids
+        # increment the index
+        self.index = (self.index + 1) % self.size
+        # increment the top pointer
+        self.top += 1
+
+    def empty_batch(self, size: int) -> tuple:
+        """
+        Return a batch of empty arrays to sample experiences into.
+
+        Args:
+            size: the number of experiences in the batch
+
+        Returns:
+            a tuple of empty arrays for (s, a, r, d, s2) to pass as the `out`
+            argument of `sample`
+
+        """
+        if self.frames is None:
+            raise ValueError('the shape of states is unknown until a push')
+        shape = (size, *self.frame_shape, self.s_frames.shape[1])
+        return (
+            np.empty(shape, dtype=np.uint8),
+            np.empty(size, dtype=np.uint8),
+            # n-step returns are discounted sums of rewards
+            np.empty(size, dtype=np.int8 if self.n_step == 1 else np.float32),
+            np.empty(size, dtype=np.bool_),
+            np.empty(shape, dtype=np.uint8),
+        )
+
+    def _windows(self, indexes: np.ndarray) -> tuple:
+        """
+        Return the n-step windows of experiences starting at given indexes.
+
+        Notes:
+            The window of an experience is the experiences pushed after it
+            in the same episode, i.e., each experience whose current state
+            is the next state of the experience before it (the experiences
+            of other streams may be pushed in between). A window is cut
+            short by a terminal flag. A window is incomplete when it reaches
+            the newest experience (or a break in the episode) before n steps
+
+        Args:
+            indexes: the indexes of the first experience of each window
+
+        Returns:
+            a tuple of:
+                - a flag for each window that is True if it's complete
+                - the discounted return of each window
+                - the terminal flag of the last step of each window
+                - the index of the last experience of each window
+
+        """
+        windows = np.empty((len(indexes), self.n_step), dtype=np.int64)
+        windows[:, 0] = indexes
+        continued = np.ones(windows.shape, dtype=np.bool_)
+        for step in range(1, self.n_step):
+            previous = windows[:, step - 1]
+            # the experience whose current state ends with the last frame of
+            # the next state of the step before
+            following = self._followers[self.s2_frames[previous, -1] % self.frame_capacity]
+            # the experiences after the newest experience aren't in the window
+            position = (following - self.index + self.top) % self.size
+            # each step continues from the next state of the step before it
+            continued[:, step] = (following >= 0) & (position < self.top) & np.all(
+                self.s_frames[following] == self.s2_frames[previous],
+                axis=-1,
+            )
+            # a window that breaks repeats its last step (it's incomplete)
+            windows[:, step] = np.where(continued[:, step], following, previous)
+        # the steps after a terminal step aren't in the window
+        dones = self.dones[windows]
+        alive = np.ones(windows.shape, dtype=np.bool_)
+        alive[:, 1:] = ~np.logical_or.accumulate(dones[:, :-1], axis=1)
+        complete = np.all(~alive[:, 1:] | continued[:, 1:], axis=1)
+        # discount the rewards of the steps in the window
+        returns = np.sum(alive * self._discounts * self.rewards[windows], axis=1)
+        last = windows[np.arange(len(windows)), np.sum(alive, axis=1) - 1]
+
+        return complete, returns, self.dones[last], last
+
+    def _complete(self, indexes: np.ndarray, draw) -> tuple:
+        """
+        Replace the indexes of incomplete n-step windows with new draws.
+
+        Args:
+            indexes: the indexes of the first experience of each window
+                (replaced in place)
+            draw: a callable that returns a given number of new indexes
+
+        Returns:
+            the n-step windows of the indexes (see `_windows`) or None if
+            the queue samples single steps
+
+        """
+        if self.n_step == 1:
+            return None
+        # the newest experiences complete their windows as the episode goes
+        # on, i.e. they're only skipped until their window is complete
+        for _ in range(100):
+            windows = self._windows(indexes)
+            incomplete = ~windows[0]
+            if not incomplete.any():
+                return windows
+            indexes[incomplete] = draw(np.count_nonzero(incomplete))
+        raise ValueError('the queue has too few complete n-step windows')
+
+    def _batch(self,
+        indexes: np.ndarray,
+        out: tuple=None,
+        windows: tuple=None,
+    ) -> tuple:
+        """
+        Return a batch of experiences from the queue.
+
+        Args:
+            indexes: the indexes of the experiences in the queue
+            out: an optional batch of arrays to write the experiences to
+                (see `empty_batch`)
+            windows: the n-step windows of the indexes if already known
+
+        Returns:
+            a tuple of arrays with each component of the experiences
+
+        """
+        if out is None:
+            out = self.empty_batch(len(indexes))
+        s, a, r, d, s2 = out
+        self._stack(self.s_frames[indexes], out=s)
+        np.take(self.actions, indexes, out=a)
+        if self.n_step == 1:
+            r[:] = self.rewards[indexes]
+            np.take(self.dones, indexes, out=d)
+        else:
+            if windows is None:
+                windows = self._windows(indexes)
+            # the next state is the next state after the last step
+            _, r[:], d[:], indexes = windows
+        self._stack(self.s2_frames[indexes], out=s2)
+
+        return s, a, r, d, s2
+
+    def sample(self, size: int=32, out: tuple=None) -> tuple:
+        """
+        Return a random sample of items from the queue.
+
+        Args:
+            size: the number of items to sample and return
+            out: an optional batch of arrays to write the sample to, i.e.,
+                to reuse between samples (see `empty_batch`)
+
+        Returns:
+            A random sample from the queue sampled uniformly
+
+        """
+        def draw(size: int) -> np.ndarray:
+            """Return the indexes of a given number of random experiences."""
+            # the oldest experience is `top` experiences behind the index
+            indexes = np.random.randint(0, self.top, size)
+            return (self.index - self.top + indexes) % self.size
+
+        indexes = draw(size)
+        windows = self._complete(indexes, draw)
+
+        return self._batch(indexes, out=out, windows=windows)
+
+
+# explicitly define the outward facing API of this module
+__all__ = [FrameReplayQueue.__name__]
@@ -0,0 +1,130 @@
+"""A disk-backed queue for storing previous experiences to sample from."""
+import mmap
+import os
+import numpy as np
+from .frame_replay_queue import FrameReplayQueue
+
+
+class MemmapReplayQueue(FrameReplayQueue):
+    """A replay queue that stores experiences in memory-mapped files."""
+
+    def __init__(self,
+        size: int,
+        directory: str,
+        frame_capacity: int=None,
+        n_step: int=1,
+        discount_factor: float=0.99,
+        streams: int=1,
+    ) -> None:
+        """
+        Initialize a new memory-mapped replay buffer with a given size.
+
+        Notes:
+            Each storage array of the queue is a `.npy` file in `directory`
+            that is memory-mapped, i.e., the OS page cache holds the recently
+            used parts of the queue in memory and the rest stays on disk.
+
+        Args:
+            size: the size of the replay buffer
+                  (the number of previous experiences to store)
+            directory: the directory to store the memory-mapped files in
+            frame_capacity: the number of single frames to store. if None,
+                defaults to the capacity of FrameReplayQueue
+            n_step: the number of steps, n, of the returns to sample
+            discount_factor: the discount factor, γ, of n-step returns
+            streams: the number of environments that push their experiences
+                in turns (see `FrameReplayQueue`)
+
+        Returns:
+            None
+
+        """
+        super().__init__(size,
+            frame_capacity=frame_capacity,
+            n_step=n_step,
+            discount_factor=discount_factor,
+            streams=streams,
+        )
+        self.directory = directory
+
+    def __repr__(self) -> str:
+        """Return an executable string representation of self."""
+        return '{}(size={}, directory={})'.format(
+            self.__class__.__name__,
+            self.size,
+            repr(self.directory),
+        )
+
+    def _allocate(self, name: str, shape: tuple, dtype: np.dtype) -> np.ndarray:
+        """
+        Allocate a new storage array for the queue.
+
+        Args:
+            name: the name of the array to allocate
+            shape: the shape of the array to allocate
+            dtype: the data-type of the array to allocate
+
+        Returns:
+            a zero filled memory-mapped array with given shape and type
+
+        """
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        filename = '{}/{}.npy'.format(self.directory, name)
+        array = np.lib.format.open_memmap(filename, 'w+', dtype, shape)
+        # samples access random frames, disable the read-ahead of the OS so
+        # that it doesn't fill the page cache with unused neighbors
+        if hasattr(mmap, 'MADV_RANDOM'):
+            array._mmap.madvise(mmap.MADV_RANDOM)
+
+        return array
+
+    def _prefetch(self, slots: np.ndarray) -> None:
+        """
+        Advise the OS to start reading the frames in the given slots.
+
+        Args:
+            slots: a sorted vector of unique frame slots to read
+
+        Returns:
+            None
+
+        """
+        if not hasattr(mmap, 'MADV_WILLNEED'):
+            return
+        # the offset of the array from the start of the memory-map
+        offset = self.frames.offset % mmap.ALLOCATIONGRANULARITY
+        frame_size = self.frames[0].nbytes
+        starts = offset + slots * frame_size
+        # align the start of each frame to the page that contains it
+        aligned = starts - starts % mmap.PAGESIZE
+        for start, length in zip(aligned, starts - aligned + frame_size):
+            self.frames._mmap.madvise(mmap.MADV_WILLNEED, int(start), int(length))
+
+    def _stack(self, numbers: np.ndarray, out: np.ndarray=None) -> np.ndarray:
+        """
+        Return a batch of states from a batch of frame numbers.
+
+        Args:
+            numbers: a matrix of frame numbers with a state in each row
+            out: an optional array to write the states to
+
+        Returns:
+            a batch of states with the frames of each state on the last axis
+
+        """
+        # read each frame once, in the order of the file, after asking the OS
+        # to read all of them at once
+        slots, inverse = np.unique(numbers % self.frame_capacity, return_inverse=True)
+        self._prefetch(slots)
+        frames = np.asarray(self.frames[slots])
+        return self._gather(frames, inverse.reshape(numbers.shape), out=out)
+
+    def flush(self) -> None:
+        """Write any changes in the memory-maps to disk."""
+        for array in self.arrays.values():
+            array.flush()
+
+
+# explicitly define the outward facing API of this module
+__all__ = [MemmapReplayQueue.__name__]
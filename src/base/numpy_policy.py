@@ -0,0 +1,122 @@
+"""A policy that selects greedy actions with a Q network in pure NumPy."""
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+
+def _conv2d(x: np.ndarray, kernel: np.ndarray, bias: np.ndarray, strides: tuple) -> np.ndarray:
+    """
+    Return the 'valid' convolution of a batch of images (im2col).
+
+    Args:
+        x: the batch of images in (batch, height, width, channels) order
+        kernel: the kernel in (height, width, in channels, out channels)
+            order (the order of Keras `Conv2D` layers)
+        bias: the bias of each out channel
+        strides: the strides of the convolution in (height, width) order
+
+    Returns:
+        the convolved batch in (batch, height, width, out channels) order
+
+    """
+    n, h, w, c = x.shape
+    kh, kw = kernel.shape[:2]
+    rows = (h - kh) // strides[0] + 1
+    cols = (w - kw) // strides[1] + 1
+    s = x.strides
+    # a view of the patch under each position of the kernel, the patches
+    # flatten in the (height, width, channels) order of the kernel
+    patches = as_strided(x,
+        shape=(n, rows, cols, kh, kw, c),
+        strides=(s[0], s[1] * strides[0], s[2] * strides[1], s[1], s[2], s[3]),
+        writeable=False,
+    )
+    patches = patches.reshape(n * rows * cols, kh * kw * c)
+    y = patches @ kernel.reshape(kh * kw * c, -1) + bias
+
+    return y.reshape(n, rows, cols, -1)
+
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    """Return the rectified linear units of an array (in place)."""
+    return np.maximum(x, 0, out=x)
+
+
+class NumPyPolicy(object):
+    """A policy that selects greedy actions with a Q network in NumPy."""
+
+    def __init__(self, path: str) -> None:
+        """
+        Load the weights of a Q network from a `.npz` file.
+
+        Notes:
+            The file is written by `src.models.export_numpy_weights` and
+            holds the kernel and bias of each layer of the DeepMind CNN or
+            its dueling variant. The forward pass never imports TensorFlow,
+            i.e., a process that plays with the policy starts in a fraction
+            of the time and memory of building the Keras models
+
+        Args:
+            path: the path of a file from `export_numpy_weights`
+
+        Returns:
+            None
+
+        """
+        self.path = path
+        with np.load(path) as weights:
+            self.weights = {key: weights[key] for key in weights.files}
+        self.dueling = bool(self.weights['dueling'])
+        self.conv_strides = [tuple(s) for s in self.weights['conv_strides']]
+
+    def __repr__(self) -> str:
+        """Return an executable string representation of self."""
+        return '{}(path={})'.format(self.__class__.__name__, repr(self.path))
+
+    def _head(self, x: np.ndarray, prefix: str) -> np.ndarray:
+        """Return the output of a hidden and output dense layer pair."""
+        w = self.weights
+        x = _relu(x @ w[prefix + 'hidden_kernel'] + w[prefix + 'hidden_bias'])
+        return x @ w[prefix + 'output_kernel'] + w[prefix + 'output_bias']
+
+    def q_values(self, states: np.ndarray) -> np.ndarray:
+        """
+        Return the Q values of a batch of stacks of frames.
+
+        Args:
+            states: the batch of stacks of frames
+
+        Returns:
+            the Q values of each action for each stack
+
+        """
+        # scale the frames like the `Lambda` layer of the network
+        x = np.asarray(states, dtype=np.float32) / np.float32(255)
+        for index, strides in enumerate(self.conv_strides):
+            kernel = self.weights['conv_{}_kernel'.format(index)]
+            bias = self.weights['conv_{}_bias'.format(index)]
+            x = _relu(_conv2d(x, kernel, bias, strides))
+        x = x.reshape(len(x), -1)
+        if not self.dueling:
+            return self._head(x, '')
+        value = self._head(x, 'value_')
+        advantage = self._head(x, 'advantage_')
+        # the network averages the advantages over the whole batch (the
+        # mean has no axis), it shifts every Q value by the same constant
+        return advantage - advantage.mean(keepdims=True) + value
+
+    def __call__(self, states: np.ndarray) -> np.ndarray:
+        """
+        Return the greedy action of each stack of frames in a batch.
+
+        Args:
+            states: the batch of stacks of frames
+
+        Returns:
+            the action with the highest Q value for each stack
+
+        """
+        return np.argmax(self.q_values(states), axis=1)
+
+
+# explicitly define the outward facing API of this module
+__all__ = [NumPyPolicy.__name__]
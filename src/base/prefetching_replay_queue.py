@@ -0,0 +1,177 @@
+"""A wrapper that samples batches from a replay queue in the background."""
+import queue
+import threading
+import numpy as np
+
+
+class PrefetchingReplayQueue(object):
+    """A replay queue wrapper that prepares batches in a background thread."""
+
+    def __init__(self, replay_queue, prefetch: int=2) -> None:
+        """
+        Initialize a new prefetching wrapper around a replay queue.
+
+        Notes:
+            A background thread samples batches from the replay queue into
+            `prefetch` + 1 reusable buffers while the learner trains, i.e.,
+            `sample` only pops a batch that is ready. The arrays of a batch
+            are valid until the next call to `sample`. Methods that change
+            the replay queue hold a lock shared with the background thread.
+
+        Args:
+            replay_queue: the replay queue to sample batches from
+            prefetch: the number of batches to keep ready
+
+        Returns:
+            None
+
+        """
+        # type check the prefetch parameter
+        if not isinstance(prefetch, int):
+            raise TypeError('`prefetch` must be of type int')
+        # ensure the prefetch is within a legal range of values
+        if prefetch <= 0:
+            raise ValueError('`prefetch` must be > 0')
+        self.replay_queue = replay_queue
+        self.prefetch = prefetch
+        # the lock that guards the replay queue
+        self.lock = threading.Lock()
+        # the reusable buffers (allocated by the first batch) and the queues
+        # of indexes of the free and ready buffers
+        self._buffers = None
+        self._free = queue.Queue()
+        self._ready = queue.Queue()
+        # the index of the buffer the learner is using
+        self._current = None
+        # the size of the batches to sample (set by the first sample)
+        self._size = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._error = None
+
+    def __repr__(self) -> str:
+        """Return an executable string representation of self."""
+        return '{}(replay_queue={}, prefetch={})'.format(
+            self.__class__.__name__,
+            self.replay_queue,
+            self.prefetch,
+        )
+
+    def __getattr__(self, name: str):
+        """Return an attribute of the wrapped replay queue."""
+        # guard against recursion before the replay queue is set
+        if name == 'replay_queue':
+            raise AttributeError(name)
+        return getattr(self.replay_queue, name)
+
+    def push(self, *args, **kwargs) -> None:
+        """Push a new experience onto the replay queue (see its `push`)."""
+        with self.lock:
+            self.replay_queue.push(*args, **kwargs)
+
+    def update_priorities(self, *args, **kwargs) -> None:
+        """Update the priorities of experiences (see the replay queue)."""
+        with self.lock:
+            self.replay_queue.update_priorities(*args, **kwargs)
+
+    def save(self, directory: str) -> None:
+        """Save the contents of the replay queue to a directory."""
+        with self.lock:
+            self.replay_queue.save(directory)
+
+    def load(self, directory: str) -> None:
+        """Load the contents of the replay queue from a directory."""
+        with self.lock:
+            self.replay_queue.load(directory)
+
+    def _fill(self) -> None:
+        """Sample batches into free buffers until stopped."""
+        try:
+            while not self._stop.is_set():
+                try:
+                    index = self._free.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                with self.lock:
+                    self.replay_queue.sample(self._size, out=self._buffers[index])
+                self._ready.put(index)
+        except Exception as error:
+            # pass the error to the learner (that's waiting on a batch)
+            self._error = error
+            self._ready.put(None)
+
+    def _start(self, size: int) -> None:
+        """
+        Allocate the buffers and start the background thread.
+
+        Args:
+            size: the number of experiences in each batch
+
+        Returns:
+            None
+
+        """
+        self._size = size
+        # allocate the buffers and sample the first batch
+        with self.lock:
+            self._buffers = [
+                self.replay_queue.empty_batch(size)
+                for _ in range(self.prefetch + 1)
+            ]
+            self.replay_queue.sample(size, out=self._buffers[0])
+        self._ready.put(0)
+        for index in range(1, len(self._buffers)):
+            self._free.put(index)
+        self._thread = threading.Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    def sample(self, size: int=32, out: tuple=None) -> tuple:
+        """
+        Return a random sample of items from the queue.
+
+        Args:
+            size: the number of items to sample and return. must be the same
+                for every call
+            out: an optional batch of arrays to copy the sample to. If None,
+                returns the reusable buffer of the batch
+
+        Returns:
+            a batch of experiences in the format of the replay queue
+
+        """
+        if self._thread is None:
+            self._start(size)
+        elif size != self._size:
+            msg = '`size` must be {} (the size of the first sample)'
+            raise ValueError(msg.format(self._size))
+        # release the buffer of the last batch for the next batch
+        if self._current is not None:
+            self._free.put(self._current)
+        self._current = self._ready.get()
+        if self._current is None:
+            raise self._error
+        batch = tuple(self._buffers[self._current])
+        if out is None:
+            return batch
+        for buffer, array in zip(out, batch):
+            np.copyto(buffer, array)
+
+        return out
+
+    def close(self) -> None:
+        """Stop the background thread."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        # reset the buffers for the next sample
+        self._stop.clear()
+        self._free = queue.Queue()
+        self._ready = queue.Queue()
+        self._current = None
+        self._buffers = None
+
+
+# explicitly define the outward facing API of this module
+__all__ = [PrefetchingReplayQueue.__name__]
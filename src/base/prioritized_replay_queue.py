@@ -1,18 +1,42 @@
 """A priority queue for storing previous experiences to sample from."""
-import itertools
-from heapq import heappush, heappushpop
 import numpy as np
+from .annealing_variable import AnnealingVariable
+from .frame_replay_queue import FrameReplayQueue
+from .sum_tree import SumTree
 
 
-class PrioritizedReplayQueue(object):
+class PrioritizedReplayQueue(FrameReplayQueue):
     """A prioritized replay queue for replaying previous experiences."""
 
-    def __init__(self, size: int) -> None:
+    def __init__(self,
+        size: int,
+        alpha: float=0.6,
+        beta: AnnealingVariable=None,
+        epsilon: float=1e-6,
+        frame_capacity: int=None,
+        n_step: int=1,
+        discount_factor: float=0.99,
+        streams: int=1,
+    ) -> None:
         """
         Initialize a new prioritized replay buffer with a given size.
 
         Args:
             size: the max number of experiences to store in the queue
+            alpha: the exponent, α, that determines how much prioritization
+                is used. 0 is uniform sampling, 1 is full prioritization
+            beta: the exponent, β, of the importance sampling weights that
+                correct the bias of prioritization, expected as an
+                AnnealingVariable that steps once per sample. If None,
+                anneals from 0.4 to 1 over 1000000 samples
+            epsilon: a small constant added to the TD-errors so that every
+                experience has a chance of being sampled
+            frame_capacity: the number of single frames to store. if None,
+                defaults to the capacity of FrameReplayQueue
+            n_step: the number of steps, n, of the returns to sample
+            discount_factor: the discount factor, γ, of n-step returns
+            streams: the number of environments that push their experiences
+                in turns (see `FrameReplayQueue`)
 
         Returns:
             None
@@ -24,24 +48,72 @@ class PrioritizedReplayQueue(object):
         # ensure the size is within a legal range of values
         if size <= 0:
             raise ValueError('`size` must be > 0')
-        self.size = size
-        # initialize the priority queue as a heap
-        self.heap = []
-        # create a counter for resolving issues of equal priority. multi-
-        # dimensional numpy arrays can't be directly compared, thus rendering
-        # a value error if we try to compare them. Thus adding a unique count
-        # as the secondary comparison (after priority) prevents the comparison
-        # of numpy arrays altogether
-        self.counter = itertools.count()
-
-    def __repr__(self) -> str:
-        """Return an executable string representation of priority queue."""
-        return '{}(size={})'.format(self.__class__.__name__, self.size)
+        super().__init__(size,
+            frame_capacity=frame_capacity,
+            n_step=n_step,
+            discount_factor=discount_factor,
+            streams=streams,
+        )
+        self.alpha = alpha
+        if beta is None:
+            beta = AnnealingVariable(0.4, 1., 1000000)
+        self.beta = beta
+        self.epsilon = epsilon
+        # the tree of priorities, i.e., (|TD-error| + ε)^α, of experiences
+        self.priorities = SumTree(size)
+        # the largest absolute TD-error seen by the queue
+        self.max_priority = 1.0
+        # the number of experiences pushed over the lifetime of the queue.
+        # experiences are identified by their push number, i.e., experience
+        # n is in slot n % size until it's overwritten
+        self.pushes = 0
 
     @property
-    def top(self)-> int:
-        """Return the index of the top element in the queue."""
-        return len(self.heap)
+    def arrays(self) -> dict:
+        """Return a dictionary of the storage arrays keyed by name."""
+        arrays = super().arrays
+        if arrays:
+            arrays['priorities'] = self.priorities.tree
+        return arrays
+
+    @property
+    def state(self) -> dict:
+        """Return a dictionary of the counters of the queue keyed by name."""
+        return {
+            **super().state,
+            'max_priority': self.max_priority,
+            'beta': self.beta.value,
+            'pushes': self.pushes,
+        }
+
+    def _restore_state(self, state: dict) -> None:
+        """
+        Restore the counters of the queue.
+
+        Args:
+            state: a dictionary of counters from the `state` property
+
+        Returns:
+            None
+
+        """
+        super()._restore_state(state)
+        self.max_priority = float(state['max_priority'])
+        self.beta.value = float(state['beta'])
+        # queues saved without the counter identify experiences by slot
+        self.pushes = int(state.get('pushes', self.index))
+
+    def _evict(self) -> None:
+        """Remove the oldest experience from the queue."""
+        # clear the priority so the experience can't be sampled
+        self.priorities.update([(self.index - self.top) % self.size], 0)
+        super()._evict()
+
+    def _ids(self, indexes: np.ndarray) -> np.ndarray:
+        """Return the push number of the experience in each slot."""
+        # the slots are written in order, i.e., the last push to a slot is
+        # the latest push that is congruent to it
+        return self.pushes - 1 - (self.pushes - 1 - indexes) % self.size
 
     def push(self,
         s: np.ndarray,
@@ -49,7 +121,8 @@ class PrioritizedReplayQueue(object):
         r: int,
         d: bool,
         s2: np.ndarray,
-        priority: float
+        priority: float,
+        stream: int=0,
     ) -> None:
         """
         Push a new experience onto the queue.
@@ -60,59 +133,115 @@ class PrioritizedReplayQueue(object):
             r: the reward resulting from taking action `a` in state `s`
             d: the flag denoting whether the episode ended after action `a`
             s2: the next state from taking action `a` in state `s`
-            priority: the priority of the item to push to the queue
+            priority: the priority (TD-error) of the item to push to the queue
+            stream: the index of the environment of the experience (see
+                `FrameReplayQueue.push`)
 
         Returns:
             None
 
         """
-        # get the unique count for this item
-        count = next(self.counter)
-        # if the heap has arrived at capacity, use push pop to add new items
-        if len(self.heap) == self.size:
-            heappushpop(self.heap, (priority, count, (s, a, r, d, s2)))
-        # otherwise heap push the item onto the queue
-        else:
-            heappush(self.heap, (priority, count, (s, a, r, d, s2)))
-
-    def sample(self, size: int=32) -> bool:
+        super().push(s, a, r, d, s2, stream=stream)
+        self.pushes += 1
+        self.update_priorities([self.pushes - 1], [priority])
+
+    def update_priorities(self,
+        indexes: np.ndarray,
+        td_errors: np.ndarray
+    ) -> None:
         """
-        Return a random sample of items from the queue.
+        Update the priorities of experiences in the queue.
+
+        Notes:
+            Experiences that were evicted or overwritten since they were
+            sampled keep their priorities, i.e., a late TD-error (e.g., of a
+            prefetched batch) never replaces the max priority of the new
+            experience in the slot
 
         Args:
-            size: the number of items to sample and return
+            indexes: the IDs of the experiences to update (see `sample`)
+            td_errors: the new TD-error of each experience
 
         Returns:
-            A random sample from the queue sampled uniformly
+            None
+
+        """
+        ids = np.asarray(indexes)
+        td_errors = np.abs(td_errors)
+        indexes = ids % self.size
+        # ignore experiences that were evicted or overwritten since they
+        # were sampled
+        live = (indexes - self.index + self.top) % self.size < self.top
+        live &= self._ids(indexes) == ids
+        indexes, td_errors = indexes[live], td_errors[live]
+        if not len(indexes):
+            return
+        self.max_priority = max(self.max_priority, np.max(td_errors))
+        self.priorities.update(indexes, (td_errors + self.epsilon)**self.alpha)
+
+    def empty_batch(self, size: int) -> tuple:
+        """
+        Return a batch of empty arrays to sample experiences into.
+
+        Args:
+            size: the number of experiences in the batch
+
+        Returns:
+            a tuple of empty arrays for (s, a, r, d, s2, w, indexes) to pass
+            as the `out` argument of `sample`
 
         """
-        # extract a sample from the heap (priorities are in increasing order)
-        # i.e. the lowest priority value is the first item in the sample.
-        # ignore the first two values in each heap item (priority & count)
-        sample_batch = [experience for (_, _, experience) in self.heap[-size:]]
-        # initialize lists for each component of the batch
-        s = [None] * len(sample_batch)
-        a = [None] * len(sample_batch)
-        r = [None] * len(sample_batch)
-        d = [None] * len(sample_batch)
-        s2 = [None] * len(sample_batch)
-        # iterate over the indexes and copy references to the arrays
-        for batch, sample in enumerate(sample_batch):
-            _s, _a, _r, _d, _s2 = sample
-            s[batch] = np.array(_s, copy=False)
-            a[batch] = _a
-            r[batch] = _r
-            d[batch] = _d
-            s2[batch] = np.array(_s2, copy=False)
-        # convert the lists to arrays for returning for training
         return (
-            np.array(s),
-            np.array(a, dtype=np.uint8),
-            np.array(r, dtype=np.int8),
-            np.array(d, dtype=np.bool),
-            np.array(s2),
+            *super().empty_batch(size),
+            np.empty(size, dtype=np.float32),
+            np.empty(size, dtype=np.int64),
         )
 
+    def sample(self, size: int=32, out: tuple=None) -> tuple:
+        """
+        Return a random sample of items from the queue.
+
+        Args:
+            size: the number of items to sample and return
+            out: an optional batch of arrays to write the sample to, i.e.,
+                to reuse between samples (see `empty_batch`)
+
+        Returns:
+            a tuple of:
+                - a random sample from the queue sampled proportionally to
+                  the priority of each experience, i.e. (s, a, r, d, s2)
+                - the importance sampling weight of each experience
+                - the ID of each experience (to update priorities with),
+                  i.e., its push number (its index modulo the size)
+
+        """
+        if out is None:
+            out = self.empty_batch(size)
+        *batch, weights, indexes = out
+        total = self.priorities.total
+
+        def draw(size: int) -> np.ndarray:
+            """Return the indexes of a given number of random experiences."""
+            return self.priorities.find(np.random.random(size) * total)
+
+        # split the total priority into a segment for each item and sample a
+        # value uniformly from each segment (stratified sampling)
+        values = (np.arange(size) + np.random.random(size)) * total / size
+        indexes[:] = self.priorities.find(values)
+        # replace the experiences without a complete n-step window
+        windows = self._complete(indexes, draw)
+        # calculate the importance sampling weights, normalized by the max
+        # weight in the batch so that weights only ever scale updates down
+        probabilities = self.priorities[indexes] / total
+        weights[:] = (self.top * probabilities)**-self.beta.value
+        weights /= weights.max()
+        self.beta.step()
+
+        batch = self._batch(indexes, out=batch, windows=windows)
+        indexes[:] = self._ids(indexes)
+
+        return (*batch, weights, indexes)
+
 
 # explicitly define the outward facing API of this module
 __all__ = [PrioritizedReplayQueue.__name__]
@@ -1,4 +1,6 @@
 """A queue for storing previous experiences to sample from."""
+import os
+import pickle
 import numpy as np
 
 
@@ -32,12 +34,48 @@ class ReplayQueue(object):
         """Return the size of the queue."""
         return len(self.queue)
 
+    def save(self, directory: str) -> None:
+        """
+        Save the contents of the queue to a directory.
+
+        Args:
+            directory: the directory to save the queue to
+
+        Returns:
+            None
+
+        """
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        with open('{}/queue.pkl'.format(directory), 'wb') as queue_file:
+            state = self.queue, self.index, self.top
+            pickle.dump(state, queue_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, directory: str) -> None:
+        """
+        Load the contents of the queue from a directory.
+
+        Args:
+            directory: the directory to load the queue from (see `save`)
+
+        Returns:
+            None
+
+        """
+        with open('{}/queue.pkl'.format(directory), 'rb') as queue_file:
+            queue, index, top = pickle.load(queue_file)
+        if len(queue) != self.size:
+            msg = 'saved queue has size {}, expected {}'
+            raise ValueError(msg.format(len(queue), self.size))
+        self.queue, self.index, self.top = queue, index, top
+
     def push(self,
         s: np.ndarray,
         a: int,
         r: int,
         d: bool,
         s2: np.ndarray,
+        stream: int=0,
     ) -> None:
         """
         Push a new experience onto the queue.
@@ -48,6 +86,8 @@ class ReplayQueue(object):
             r: the reward resulting from taking action `a` in state `s`
             d: the flag denoting whether the episode ended after action `a`
             s2: the next state from taking action `a` in state `s`
+            stream: the index of the environment of the experience (unused,
+                each experience holds its own states)
 
         Returns:
             None
@@ -61,39 +101,51 @@ class ReplayQueue(object):
         if self.top < self.size:
             self.top += 1
 
-    def sample(self, size: int=32) -> tuple:
+    def empty_batch(self, size: int) -> tuple:
+        """
+        Return a batch of empty arrays to sample experiences into.
+
+        Args:
+            size: the number of experiences in the batch
+
+        Returns:
+            a tuple of empty arrays for (s, a, r, d, s2) to pass as the `out`
+            argument of `sample`
+
+        """
+        if not self.top:
+            raise ValueError('the shape of states is unknown until a push')
+        state = np.asarray(self.queue[0][0])
+        shape = (size, *state.shape)
+        return (
+            np.empty(shape, dtype=state.dtype),
+            np.empty(size, dtype=np.uint8),
+            np.empty(size, dtype=np.int8),
+            np.empty(size, dtype=np.bool_),
+            np.empty(shape, dtype=state.dtype),
+        )
+
+    def sample(self, size: int=32, out: tuple=None) -> tuple:
         """
         Return a random sample of items from the queue.
 
         Args:
             size: the number of items to sample and return
+            out: an optional batch of arrays to write the sample to, i.e.,
+                to reuse between samples (see `empty_batch`)
 
         Returns:
             A random sample from the queue sampled uniformly
 
         """
-        # initialize lists for each component of the batch
-        s = [None] * size
-        a = [None] * size
-        r = [None] * size
-        d = [None] * size
-        s2 = [None] * size
-        # iterate over the indexes and copy references to the arrays
+        if out is None:
+            out = self.empty_batch(size)
+        s, a, r, d, s2 = out
+        # iterate over the indexes and copy each experience into the batch
         for batch, sample in enumerate(np.random.randint(0, self.top, size)):
-            _s, _a, _r, _d, _s2 = self.queue[sample]
-            s[batch] = np.array(_s, copy=False)
-            a[batch] = _a
-            r[batch] = _r
-            d[batch] = _d
-            s2[batch] = np.array(_s2, copy=False)
-        # convert the lists to arrays for returning for training
-        return (
-            np.array(s),
-            np.array(a, dtype=np.uint8),
-            np.array(r, dtype=np.int8),
-            np.array(d, dtype=np.bool),
-            np.array(s2),
-        )
+            s[batch], a[batch], r[batch], d[batch], s2[batch] = self.queue[sample]
+
+        return s, a, r, d, s2
 
 
 # explicitly define the outward facing API of this module
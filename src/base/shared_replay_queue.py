@@ -0,0 +1,328 @@
+"""A queue in shared memory for actors in many processes to push to."""
+import multiprocessing
+import numpy as np
+from .frame_replay_queue import FrameReplayQueue
+
+
+# the columns of the counters of each partition
+_INDEX, _TOP, _FRAME_COUNT = range(3)
+
+
+class _SharedPartition(FrameReplayQueue):
+    """The partition of a shared replay queue that one writer pushes to."""
+
+    def __init__(self,
+        size: int,
+        frame_capacity: int,
+        views: dict,
+        counters: np.ndarray,
+    ) -> None:
+        """
+        Initialize a new partition of a shared replay queue.
+
+        Args:
+            size: the number of experiences in the partition
+            frame_capacity: the number of frames in the partition
+            views: the storage arrays of the partition keyed by name
+            counters: the shared vector of counters of the partition
+
+        Returns:
+            None
+
+        """
+        self._views = views
+        self._counters = counters
+        # keep the counters of a partition that was pushed to before
+        state = counters.copy()
+        super().__init__(size, frame_capacity=frame_capacity)
+        counters[:] = state
+
+    @property
+    def index(self) -> int:
+        """Return the index of the next experience to push."""
+        return int(self._counters[_INDEX])
+
+    @index.setter
+    def index(self, value: int) -> None:
+        """Set the index of the next experience to push."""
+        self._counters[_INDEX] = value
+
+    @property
+    def top(self) -> int:
+        """Return the number of experiences in the partition."""
+        return int(self._counters[_TOP])
+
+    @top.setter
+    def top(self, value: int) -> None:
+        """Set the number of experiences in the partition."""
+        self._counters[_TOP] = value
+
+    @property
+    def frame_count(self) -> int:
+        """Return the number of frames written to the partition."""
+        return int(self._counters[_FRAME_COUNT])
+
+    @frame_count.setter
+    def frame_count(self, value: int) -> None:
+        """Set the number of frames written to the partition."""
+        self._counters[_FRAME_COUNT] = value
+
+    def _allocate(self, name: str, shape: tuple, dtype: np.dtype) -> np.ndarray:
+        """
+        Return the shared storage array of the partition with a given name.
+
+        Args:
+            name: the name of the array to allocate
+            shape: the shape of the array to allocate
+            dtype: the data-type of the array to allocate
+
+        Returns:
+            the view of the array in shared memory
+
+        """
+        view = self._views[name]
+        if view.shape != shape or view.dtype != dtype:
+            msg = '{} of the shared queue has shape {} and type {}, expected {} and {}'
+            raise ValueError(msg.format(name, view.shape, view.dtype, shape, dtype))
+        return view
+
+
+class SharedReplayQueue(object):
+    """A replay queue in shared memory with a partition for each writer."""
+
+    def __init__(self,
+        size: int,
+        shape: tuple,
+        writers: int=1,
+        frame_capacity: int=None,
+        margin: int=None,
+        start_method: str='spawn',
+    ) -> None:
+        """
+        Initialize a new shared replay buffer with a given size.
+
+        Notes:
+            Each writer (e.g. an actor process) pushes to a partition of its
+            own with `queue.writer(index).push(...)`, i.e., writers never
+            wait on each other. The counters of each partition are in shared
+            memory too, so a learner samples from every partition with no
+            copies or pickling. Samples skip the oldest `margin` experiences
+            of each partition, which writers may be replacing mid-sample.
+            The storage is a multiprocessing RawArray for each array, i.e.,
+            pass the queue to other processes as an argument when they start
+            and they share the same memory. The training modes keep their
+            replay in the learner (e.g. the priorities of Ape-X are in the
+            sum tree of the learner), this queue is a storage layer for
+            uniform replay with many writers.
+
+        Args:
+            size: the size of the replay buffer
+                  (the number of previous experiences to store)
+            shape: the shape of a single state, i.e. (height, width, frames)
+            writers: the number of writers, i.e. partitions of the queue
+            frame_capacity: the number of single frames to store in each
+                partition. if None, defaults to the capacity of
+                FrameReplayQueue for the size of a partition
+            margin: the number of oldest experiences of each partition to
+                skip when sampling. if None, 1% of the partition
+            start_method: the start method of the processes to share the
+                queue with as either 'spawn', 'forkserver', or 'fork'
+
+        Returns:
+            None
+
+        """
+        # type check the writers parameter
+        if not isinstance(writers, int):
+            raise TypeError('`writers` must be of type int')
+        # ensure the writers is within a legal range of values
+        if writers <= 0:
+            raise ValueError('`writers` must be > 0')
+        if size < writers:
+            raise ValueError('`size` must be >= `writers`')
+        *frame_shape, history = shape
+        partition_size = size // writers
+        if frame_capacity is None:
+            frame_capacity = partition_size + partition_size // 100 + 2 * history
+        if margin is None:
+            margin = partition_size // 100 + 1
+        self.size = size
+        self.shape = tuple(shape)
+        self.writers = writers
+        self.partition_size = partition_size
+        self.frame_capacity = frame_capacity
+        self.margin = margin
+        self.frame_shape = tuple(frame_shape)
+        # make a shared array of bytes for each storage array
+        context = multiprocessing.get_context(start_method)
+        self._arrays = {}
+        for name, (array_shape, dtype) in self._layout.items():
+            nbytes = max(1, int(np.prod(array_shape)) * np.dtype(dtype).itemsize)
+            self._arrays[name] = context.RawArray('B', nbytes)
+        self._setup()
+
+    def __repr__(self) -> str:
+        """Return an executable string representation of self."""
+        return '{}(size={}, shape={}, writers={})'.format(
+            self.__class__.__name__,
+            self.size,
+            self.shape,
+            self.writers,
+        )
+
+    def __getstate__(self) -> dict:
+        """Return the state to pickle, i.e., without the views of the arrays."""
+        state = self.__dict__.copy()
+        for name in ['arrays', 'counters', '_partitions', '_gather_buffer']:
+            del state[name]
+
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """View the shared arrays of a pickled queue."""
+        self.__dict__.update(state)
+        self._setup()
+
+    @property
+    def _layout(self) -> dict:
+        """Return the shape and data-type of each array keyed by name."""
+        experiences = self.writers * self.partition_size
+        history = self.shape[-1]
+        return {
+            'frames': ((self.writers * self.frame_capacity, *self.frame_shape), np.uint8),
+            's_frames': ((experiences, history), np.int64),
+            's2_frames': ((experiences, history), np.int64),
+            'actions': ((experiences,), np.uint8),
+            'rewards': ((experiences,), np.float32),
+            'dones': ((experiences,), np.bool_),
+            'counters': ((self.writers, 3), np.int64),
+        }
+
+    def _setup(self) -> None:
+        """Make the NumPy arrays that view the shared arrays."""
+        self.arrays = {}
+        for name, (shape, dtype) in self._layout.items():
+            count = int(np.prod(shape))
+            array = np.frombuffer(self._arrays[name], dtype=dtype, count=count)
+            self.arrays[name] = array.reshape(shape)
+        self.counters = self.arrays.pop('counters')
+        # the writer of each partition (attached on demand)
+        self._partitions = {}
+        # a reusable buffer of frames for gathering the frames of states
+        self._gather_buffer = None
+
+    @property
+    def nbytes(self) -> int:
+        """Return the number of bytes of shared memory used by the queue."""
+        return sum(array.nbytes for array in self.arrays.values()) + self.counters.nbytes
+
+    @property
+    def top(self) -> int:
+        """Return the number of experiences in the queue."""
+        return int(self.counters[:, _TOP].sum())
+
+    def writer(self, index: int) -> FrameReplayQueue:
+        """
+        Return the writer of a partition of the queue.
+
+        Args:
+            index: the index of the partition to write to
+
+        Returns:
+            a replay queue that pushes to the partition of the shared memory
+
+        """
+        if index not in self._partitions:
+            experiences = slice(index * self.partition_size, (index + 1) * self.partition_size)
+            frames = slice(index * self.frame_capacity, (index + 1) * self.frame_capacity)
+            views = {name: array[experiences] for name, array in self.arrays.items()}
+            views['frames'] = self.arrays['frames'][frames]
+            self._partitions[index] = _SharedPartition(
+                self.partition_size,
+                self.frame_capacity,
+                views,
+                self.counters[index],
+            )
+
+        return self._partitions[index]
+
+    def push(self, *args, **kwargs) -> None:
+        """Push a new experience onto the partition of the first writer."""
+        self.writer(0).push(*args, **kwargs)
+
+    # gather the frames of states like a FrameReplayQueue
+    _gather = FrameReplayQueue._gather
+
+    def empty_batch(self, size: int) -> tuple:
+        """
+        Return a batch of empty arrays to sample experiences into.
+
+        Args:
+            size: the number of experiences in the batch
+
+        Returns:
+            a tuple of empty arrays for (s, a, r, d, s2) to pass as the `out`
+            argument of `sample`
+
+        """
+        shape = (size, *self.shape)
+        return (
+            np.empty(shape, dtype=np.uint8),
+            np.empty(size, dtype=np.uint8),
+            np.empty(size, dtype=np.int8),
+            np.empty(size, dtype=np.bool_),
+            np.empty(shape, dtype=np.uint8),
+        )
+
+    def sample(self, size: int=32, out: tuple=None) -> tuple:
+        """
+        Return a random sample of items from the queue.
+
+        Args:
+            size: the number of items to sample and return
+            out: an optional batch of arrays to write the sample to, i.e.,
+                to reuse between samples (see `empty_batch`)
+
+        Returns:
+            A random sample from the queue sampled uniformly
+
+        """
+        # take a snapshot of the counters, writers keep pushing
+        counters = self.counters.copy()
+        tops = np.maximum(counters[:, _TOP] - self.margin, 0)
+        ends = np.cumsum(tops)
+        if not ends[-1]:
+            raise ValueError('the queue has too few experiences to sample')
+        # draw experiences uniformly from all partitions
+        draws = np.random.randint(0, ends[-1], size)
+        partitions = np.searchsorted(ends, draws, side='right')
+        offsets = draws - (ends - tops)[partitions]
+        # the drawn experience is `offset` experiences after the oldest
+        # experience that isn't in the margin
+        indexes = (counters[partitions, _INDEX] - tops[partitions] + offsets)
+        indexes = partitions * self.partition_size + indexes % self.partition_size
+        # the frame slots of each partition follow the slots before it
+        first_slots = (partitions * self.frame_capacity)[:, None]
+        if out is None:
+            out = self.empty_batch(size)
+        s, a, r, d, s2 = out
+        s_slots = self.arrays['s_frames'][indexes] % self.frame_capacity + first_slots
+        self._gather(self.arrays['frames'], s_slots, out=s)
+        np.take(self.arrays['actions'], indexes, out=a)
+        r[:] = self.arrays['rewards'][indexes]
+        np.take(self.arrays['dones'], indexes, out=d)
+        s2_slots = self.arrays['s2_frames'][indexes] % self.frame_capacity + first_slots
+        self._gather(self.arrays['frames'], s2_slots, out=s2)
+
+        return s, a, r, d, s2
+
+    def close(self) -> None:
+        """Release the shared memory of the queue (in this process)."""
+        self.arrays = {}
+        self.counters = None
+        self._partitions = {}
+        self._arrays = {}
+
+
+# explicitly define the outward facing API of this module
+__all__ = [SharedReplayQueue.__name__]
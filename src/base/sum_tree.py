@@ -0,0 +1,85 @@
+"""A binary tree of sums for sampling items proportionally to their values."""
+import numpy as np
+
+
+class SumTree(object):
+    """A binary tree where each parent node holds the sum of its children."""
+
+    def __init__(self, size: int) -> None:
+        """
+        Initialize a new sum tree with a given number of leaves.
+
+        Args:
+            size: the number of values (leaves) to store in the tree
+
+        Returns:
+            None
+
+        """
+        self.size = size
+        # round the number of leaves up to a power of two so that every leaf
+        # is at the same depth. nodes are stored breadth first starting at 1,
+        # i.e. the children of node i are at 2i and 2i + 1
+        self.depth = max(0, size - 1).bit_length()
+        self.capacity = 1 << self.depth
+        self.tree = np.zeros(2 * self.capacity, dtype=np.float64)
+
+    def __repr__(self) -> str:
+        """Return an executable string representation of self."""
+        return '{}(size={})'.format(self.__class__.__name__, self.size)
+
+    def __getitem__(self, indexes: np.ndarray) -> np.ndarray:
+        """Return the values of the leaves at the given indexes."""
+        return self.tree[np.asarray(indexes) + self.capacity]
+
+    @property
+    def total(self) -> float:
+        """Return the sum of all the values in the tree."""
+        return self.tree[1]
+
+    def update(self, indexes: np.ndarray, values: np.ndarray) -> None:
+        """
+        Set the values of the leaves at the given indexes.
+
+        Args:
+            indexes: a vector of leaf indexes to update
+            values: the new values for each leaf
+
+        Returns:
+            None
+
+        """
+        indexes = np.asarray(indexes, dtype=np.int64) + self.capacity
+        self.tree[indexes] = values
+        # propagate the sums up one level of the tree at a time
+        for _ in range(self.depth):
+            indexes = np.unique(indexes // 2)
+            self.tree[indexes] = self.tree[2 * indexes] + self.tree[2 * indexes + 1]
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """
+        Return the leaves where the cumulative sums of the tree reach values.
+
+        Args:
+            values: a vector of prefix sums in [0, total)
+
+        Returns:
+            a vector with the index of the leaf for each value
+
+        """
+        # keep values within the total to guard against rounding errors
+        values = np.minimum(values, np.nextafter(self.total, 0))
+        indexes = np.ones(len(values), dtype=np.int64)
+        # descend the tree one level at a time, going right when the value
+        # is beyond the sum of the left sub-tree
+        for _ in range(self.depth):
+            left = self.tree[2 * indexes]
+            right = values >= left
+            values = values - left * right
+            indexes = 2 * indexes + right
+
+        return indexes - self.capacity
+
+
+# explicitly define the outward facing API of this module
+__all__ = [SumTree.__name__]
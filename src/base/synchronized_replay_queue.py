@@ -0,0 +1,70 @@
+"""A wrapper that makes a replay queue safe to share between threads."""
+import threading
+
+
+class SynchronizedReplayQueue(object):
+    """A replay queue wrapper that guards the queue with a lock."""
+
+    def __init__(self, replay_queue) -> None:
+        """
+        Initialize a new synchronized wrapper around a replay queue.
+
+        Notes:
+            Each method that reads or changes the replay queue holds a lock,
+            i.e., one thread can push experiences while another samples
+            batches and updates priorities. The arrays of a batch sampled
+            without `out` belong to the caller
+
+        Args:
+            replay_queue: the replay queue to guard
+
+        Returns:
+            None
+
+        """
+        self.replay_queue = replay_queue
+        # the lock that guards the replay queue
+        self.lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        """Return an executable string representation of self."""
+        return '{}(replay_queue={})'.format(
+            self.__class__.__name__,
+            self.replay_queue,
+        )
+
+    def __getattr__(self, name: str):
+        """Return an attribute of the wrapped replay queue."""
+        # guard against recursion before the replay queue is set
+        if name == 'replay_queue':
+            raise AttributeError(name)
+        return getattr(self.replay_queue, name)
+
+    def push(self, *args, **kwargs) -> None:
+        """Push a new experience onto the replay queue (see its `push`)."""
+        with self.lock:
+            self.replay_queue.push(*args, **kwargs)
+
+    def sample(self, *args, **kwargs) -> tuple:
+        """Return a random sample of the replay queue (see its `sample`)."""
+        with self.lock:
+            return self.replay_queue.sample(*args, **kwargs)
+
+    def update_priorities(self, *args, **kwargs) -> None:
+        """Update the priorities of experiences (see the replay queue)."""
+        with self.lock:
+            self.replay_queue.update_priorities(*args, **kwargs)
+
+    def save(self, directory: str) -> None:
+        """Save the contents of the replay queue to a directory."""
+        with self.lock:
+            self.replay_queue.save(directory)
+
+    def load(self, directory: str) -> None:
+        """Load the contents of the replay queue from a directory."""
+        with self.lock:
+            self.replay_queue.load(directory)
+
+
+# explicitly define the outward facing API of this module
+__all__ = [SynchronizedReplayQueue.__name__]
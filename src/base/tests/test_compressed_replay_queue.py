@@ -0,0 +1,81 @@
+"""Unit tests for the CompressedReplayQueue class."""
+import tempfile
+import numpy as np
+from unittest import TestCase
+from ..compressed_replay_queue import CompressedReplayQueue
+from .test_frame_replay_queue import ones, episode
+
+
+def flat_episode(length: int, k: int=4) -> list:
+    """Return a list of experiences from an episode of flat color frames."""
+    experiences = episode(length, k)
+    # replace the random noise of each state with blocks of flat color
+    return [
+        (s // 64 * 64, a, r, d, s2 // 64 * 64)
+        for s, a, r, d, s2 in experiences
+    ]
+
+
+class CompressedReplayQueue__repr__(TestCase):
+    def test(self):
+        arb = CompressedReplayQueue(1234)
+        self.assertEqual("CompressedReplayQueue(size=1234, compression='zlib')", repr(arb))
+
+
+class CompressedReplayQueue_should_check_compression(TestCase):
+    def test(self):
+        self.assertRaises(ValueError, CompressedReplayQueue, 10, compression='rle')
+
+
+class CompressedReplayQueue_should_store_episodes(TestCase):
+    def test(self):
+        np.random.seed(1)
+        for workers in [0, 2]:
+            arb = CompressedReplayQueue(50, workers=workers)
+            experiences = episode(30) + episode(30)
+            for experience in experiences:
+                arb.push(*experience)
+            self.assertEqual(50, arb.top)
+
+            indexes = (arb.index + np.arange(50)) % arb.size
+            s, a, r, d, s2 = arb._batch(indexes)
+            for index, (exp_s, exp_a, exp_r, exp_d, exp_s2) in enumerate(experiences[-50:]):
+                self.assertTrue(np.array_equal(exp_s, s[index]))
+                self.assertEqual(exp_a, a[index])
+                self.assertEqual(exp_r, r[index])
+                self.assertEqual(exp_d, d[index])
+                self.assertTrue(np.array_equal(exp_s2, s2[index]))
+
+
+class CompressedReplayQueue_should_compress_flat_frames(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = CompressedReplayQueue(50)
+        for experience in [ones()] + flat_episode(30):
+            arb.push(*experience)
+        stats = arb.memory_stats
+        self.assertEqual(50, stats['size'])
+        self.assertEqual(31, stats['experiences'])
+        self.assertEqual(arb.frame_count, stats['frames'])
+        self.assertEqual(stats['frames'] * 84 * 84, stats['frame_bytes'])
+        self.assertEqual(arb.compressed_bytes, stats['stored_frame_bytes'])
+        self.assertGreater(stats['compression_ratio'], 2)
+        self.assertEqual(arb.nbytes, stats['nbytes'])
+
+
+class CompressedReplayQueue_should_save_and_load(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = CompressedReplayQueue(20)
+        for experience in flat_episode(15) + flat_episode(15):
+            arb.push(*experience)
+        with tempfile.TemporaryDirectory() as directory:
+            arb.save(directory)
+            loaded = CompressedReplayQueue(20)
+            loaded.load(directory)
+        self.assertEqual(arb.top, loaded.top)
+        self.assertEqual(arb.compressed_bytes, loaded.compressed_bytes)
+        self.assertEqual(list(arb.frames), list(loaded.frames))
+        indexes = np.arange(20)
+        for exp, act in zip(arb._batch(indexes), loaded._batch(indexes)):
+            self.assertTrue(np.array_equal(exp, act))
@@ -0,0 +1,504 @@
+"""Unit tests for the FrameReplayQueue class."""
+import tempfile
+import numpy as np
+from unittest import TestCase
+from ..frame_replay_queue import FrameReplayQueue
+
+
+def ones() -> tuple:
+    """Return an arbitrary state of ones."""
+    s = np.ones((84, 84, 4), dtype=np.uint8)
+    a = 1
+    r = 1
+    d = True
+    s2 = np.ones((84, 84, 4), dtype=np.uint8)
+    return s, a, r, d, s2
+
+
+def zeros() -> tuple:
+    """Return an arbitrary state of zeros."""
+    s = np.zeros((84, 84, 4), dtype=np.uint8)
+    a = 0
+    r = 0
+    d = False
+    s2 = np.zeros((84, 84, 4), dtype=np.uint8)
+    return s, a, r, d, s2
+
+
+def random_state() -> tuple:
+    """Return an arbitrary randomized state"""
+    s = np.random.randint(0, 256, (84, 84, 4)).astype(np.uint8)
+    a = np.random.randint(6)
+    r = np.random.randint(2) - 1
+    d = bool(np.random.randint(1))
+    s2 = np.random.randint(0, 256, (84, 84, 4)).astype(np.uint8)
+    return s, a, r, d, s2
+
+
+def episode(length: int, k: int=4) -> list:
+    """Return a list of experiences from a random frame stacked episode."""
+    frames = np.random.randint(0, 256, (length + 1, 84, 84)).astype(np.uint8)
+    # the initial state repeats the first frame like FrameStackEnv
+    stack = [frames[0]] * k
+    experiences = []
+    for index in range(1, length + 1):
+        s = np.stack(stack, axis=2)
+        stack = stack[1:] + [frames[index]]
+        s2 = np.stack(stack, axis=2)
+        a = np.random.randint(6)
+        r = np.random.randint(3) - 1
+        d = index == length
+        experiences.append((s, a, r, d, s2))
+    return experiences
+
+
+class IdStack(np.ndarray):
+    """A stack of frames with the IDs of its frames (like FrameStack)."""
+
+    def __array_finalize__(self, obj) -> None:
+        self.frame_ids = None
+
+
+def with_ids(experiences: list, first_id: int=0) -> list:
+    """Return experiences of an episode with the IDs of their frames."""
+    k = experiences[0][0].shape[-1]
+    # the initial state repeats the first frame
+    ids = [first_id] * k
+    stacks = []
+    for s, a, r, d, s2 in experiences:
+        s = s.view(IdStack)
+        s.frame_ids = np.array(ids)
+        ids = ids[1:] + [ids[-1] + 1]
+        s2 = s2.view(IdStack)
+        s2.frame_ids = np.array(ids)
+        stacks.append((s, a, r, d, s2))
+    return stacks
+
+
+class FrameReplayQueue__init__(TestCase):
+    def test(self):
+        self.assertIsInstance(FrameReplayQueue(10), object)
+        self.assertIsInstance(FrameReplayQueue(size=10), object)
+
+
+class FrameReplayQueue__repr__(TestCase):
+    def test(self):
+        self.assertEqual('FrameReplayQueue(size=4321)', repr(FrameReplayQueue(4321)))
+        self.assertEqual('FrameReplayQueue(size=1234)', repr(FrameReplayQueue(size=1234)))
+
+
+class FrameReplayQueue__len__(TestCase):
+    def test(self):
+        arb = FrameReplayQueue(10)
+        self.assertEqual(0, arb.top)
+        arb.push(*zeros())
+        self.assertEqual(1, arb.top)
+
+        for index in range(2, 30):
+            if index < 10:
+                arb.push(*zeros())
+                self.assertEqual(index, arb.top)
+            else:
+                arb.push(*ones())
+                self.assertEqual(10, arb.top)
+
+
+class FrameReplayQueue_is_bound(TestCase):
+    def test(self):
+        arb = FrameReplayQueue(10)
+        for i in range(25):
+            if i == 15:
+                arb.push(*ones())
+            else:
+                arb.push(*zeros())
+
+        # there should only be 10 elements
+        self.assertEqual(10, arb.top)
+        # the frames should be bound by the frame capacity
+        self.assertEqual(18, len(arb.frames))
+
+
+class FrameReplayQueue_sample(TestCase):
+    def test(self):
+        arb = FrameReplayQueue(1000)
+        for i in range(1000):
+            arb.push(*ones())
+
+        s, a, r, d, s2 = arb.sample()
+
+        self.assertEqual(s.dtype, np.uint8)
+        self.assertEqual(a.dtype, np.uint8)
+        self.assertEqual(r.dtype, np.int8)
+        self.assertEqual(d.dtype, np.bool_)
+        self.assertEqual(s2.dtype, np.uint8)
+        self.assertEqual((32, 84, 84, 4), s.shape)
+        self.assertEqual((32, 84, 84, 4), s2.shape)
+
+        sample_size = len(s)
+
+        exp_s, exp_a, exp_r, exp_d, exp_s2 = ones()
+
+        self.assertEqual([exp_a] * sample_size, list(a))
+        self.assertEqual([exp_r] * sample_size, list(r))
+        self.assertEqual([exp_d] * sample_size, list(d))
+
+        for index in range(sample_size):
+            self.assertTrue(np.array_equal(exp_s, s[index]))
+            self.assertTrue(np.array_equal(exp_s2, s2[index]))
+
+
+class FrameReplayQueue_should_store_unrelated_states(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = FrameReplayQueue(10, frame_capacity=80)
+        experiences = [random_state() for _ in range(10)]
+        for experience in experiences:
+            arb.push(*experience)
+
+        s, a, r, d, s2 = arb._batch(np.arange(10))
+        for index, (exp_s, exp_a, exp_r, exp_d, exp_s2) in enumerate(experiences):
+            self.assertTrue(np.array_equal(exp_s, s[index]))
+            self.assertEqual(exp_a, a[index])
+            self.assertEqual(exp_r, r[index])
+            self.assertEqual(exp_d, d[index])
+            self.assertTrue(np.array_equal(exp_s2, s2[index]))
+
+
+class FrameReplayQueue_should_store_episodes(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = FrameReplayQueue(100)
+        experiences = episode(30) + episode(1) + episode(60) + episode(40)
+        for experience in experiences:
+            arb.push(*experience)
+        # the queue should hold the last 100 experiences
+        self.assertEqual(100, arb.top)
+        # one frame per experience plus an initial frame per episode
+        self.assertEqual(131 + 4, arb.frame_count)
+
+        indexes = (arb.index + np.arange(100)) % arb.size
+        s, a, r, d, s2 = arb._batch(indexes)
+        for index, (exp_s, exp_a, exp_r, exp_d, exp_s2) in enumerate(experiences[-100:]):
+            self.assertTrue(np.array_equal(exp_s, s[index]))
+            self.assertEqual(exp_a, a[index])
+            self.assertEqual(exp_r, r[index])
+            self.assertEqual(exp_d, d[index])
+            self.assertTrue(np.array_equal(exp_s2, s2[index]))
+
+
+class FrameReplayQueue_should_evict_experiences_with_overwritten_frames(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = FrameReplayQueue(10, frame_capacity=12)
+        experiences = episode(8) + episode(8)
+        for experience in experiences:
+            arb.push(*experience)
+        # each episode writes 9 frames, the second episode overwrites frames
+        # of the last experiences from the first episode, which are evicted
+        self.assertEqual(18, arb.frame_count)
+        self.assertEqual(8, arb.top)
+
+        indexes = (arb.index - arb.top + np.arange(arb.top)) % arb.size
+        s, _, _, _, s2 = arb._batch(indexes)
+        for index, (exp_s, _, _, _, exp_s2) in enumerate(experiences[-8:]):
+            self.assertTrue(np.array_equal(exp_s, s[index]))
+            self.assertTrue(np.array_equal(exp_s2, s2[index]))
+
+
+class FrameReplayQueue_should_deduplicate_frames(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = FrameReplayQueue(200)
+        for experience in episode(200):
+            arb.push(*experience)
+        # a list of 200 experiences stores 8 frames per experience
+        self.assertLess(arb.nbytes, 200 * 8 * 84 * 84 / 7)
+
+
+class FrameReplayQueue_should_deduplicate_frames_by_id(TestCase):
+    def test(self):
+        np.random.seed(1)
+        experiences = episode(20) + episode(20)
+        arb = FrameReplayQueue(50)
+        for experience in experiences:
+            arb.push(*experience)
+        arb_ids = FrameReplayQueue(50)
+        for experience in with_ids(experiences[:20]) + with_ids(experiences[20:], 100):
+            arb_ids.push(*experience)
+        self.assertEqual(arb.frame_count, arb_ids.frame_count)
+        for expected, actual in zip(arb._batch(np.arange(40)), arb_ids._batch(np.arange(40))):
+            self.assertTrue(np.array_equal(expected, actual))
+
+
+class FrameReplayQueue_should_compare_frames_by_id(TestCase):
+    def test(self):
+        np.random.seed(1)
+        s, a, r, d, s2 = with_ids(episode(1))[0]
+        arb = FrameReplayQueue(10)
+        arb.push(s, a, r, d, s2)
+        # the IDs of the next state match the last next state, the (changed)
+        # frames aren't compared
+        s3 = (s2 + 1).view(IdStack)
+        s3.frame_ids = s2.frame_ids
+        s4 = np.concatenate([s3[..., 1:], s3[..., :1]], axis=2).view(IdStack)
+        s4.frame_ids = np.append(s3.frame_ids[1:], s3.frame_ids[-1] + 1)
+        frame_count = arb.frame_count
+        arb.push(s3, a, r, d, s4)
+        # only the new frame of the next state is written
+        self.assertEqual(frame_count + 1, arb.frame_count)
+
+
+class FrameReplayQueue_should_save_and_load(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = FrameReplayQueue(20)
+        for experience in episode(15) + episode(15):
+            arb.push(*experience)
+        with tempfile.TemporaryDirectory() as directory:
+            arb.save(directory)
+            loaded = FrameReplayQueue(20)
+            loaded.load(directory)
+        self.assertEqual(arb.index, loaded.index)
+        self.assertEqual(arb.top, loaded.top)
+        self.assertEqual(arb.frame_count, loaded.frame_count)
+        self.assertEqual(arb.frame_capacity, loaded.frame_capacity)
+        self.assertTrue(np.array_equal(arb._last[0], loaded._last[0]))
+        for name, array in arb.arrays.items():
+            self.assertTrue(np.array_equal(array, loaded.arrays[name]))
+        # the loaded queue should continue the episode of the saved queue
+        s, a, r, d, s2 = episode(1)[0]
+        s = arb.frames[arb._last[0] % arb.frame_capacity].transpose(1, 2, 0)
+        arb.push(s, a, r, d, s2)
+        loaded.push(s, a, r, d, s2)
+        self.assertEqual(arb.frame_count, loaded.frame_count)
+
+
+class FrameReplayQueue_should_save_and_load_empty_queue(TestCase):
+    def test(self):
+        arb = FrameReplayQueue(20)
+        with tempfile.TemporaryDirectory() as directory:
+            arb.save(directory)
+            loaded = FrameReplayQueue(20)
+            loaded.load(directory)
+        self.assertEqual(0, loaded.top)
+        self.assertIsNone(loaded.frames)
+
+
+class FrameReplayQueue_load_should_check_size(TestCase):
+    def test(self):
+        arb = FrameReplayQueue(20)
+        arb.push(*ones())
+        with tempfile.TemporaryDirectory() as directory:
+            arb.save(directory)
+            self.assertRaises(ValueError, FrameReplayQueue(10).load, directory)
+
+
+class FrameReplayQueue_memory_stats(TestCase):
+    def test(self):
+        arb = FrameReplayQueue(20)
+        self.assertEqual(0, arb.memory_stats['frames'])
+        arb.push(*ones())
+        stats = arb.memory_stats
+        self.assertEqual(1, stats['experiences'])
+        # the repeated frame of s and the new frame of s2
+        self.assertEqual(2, stats['frames'])
+        self.assertEqual(2 * 84 * 84, stats['frame_bytes'])
+        self.assertEqual(2 * 84 * 84, stats['stored_frame_bytes'])
+        self.assertEqual(1, stats['compression_ratio'])
+        self.assertEqual(arb.nbytes, stats['nbytes'])
+
+
+class FrameReplayQueue_should_sample_into_out(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = FrameReplayQueue(50)
+        for experience in episode(30):
+            arb.push(*experience)
+        out = arb.empty_batch(16)
+        np.random.seed(2)
+        expected = arb.sample(size=16)
+        np.random.seed(2)
+        batch = arb.sample(size=16, out=out)
+        for exp, act, buffer in zip(expected, batch, out):
+            self.assertIs(buffer, act)
+            self.assertEqual(exp.dtype, act.dtype)
+            self.assertTrue(np.array_equal(exp, act))
+
+
+class FrameReplayQueue_empty_batch_should_require_a_push(TestCase):
+    def test(self):
+        self.assertRaises(ValueError, FrameReplayQueue(10).empty_batch, 32)
+
+
+def n_step_return(experiences: list, index: int, n: int, gamma: float) -> tuple:
+    """Return the n-step return, terminal flag, and next state of a step."""
+    value = 0
+    for step, (_, _, r, d, s2) in enumerate(experiences[index:index + n]):
+        value += gamma**step * r
+        if d:
+            break
+    return value, d, s2
+
+
+class FrameReplayQueue__init__n_step(TestCase):
+    def test(self):
+        self.assertRaises(TypeError, FrameReplayQueue, 10, n_step=1.5)
+        self.assertRaises(ValueError, FrameReplayQueue, 10, n_step=0)
+
+
+class FrameReplayQueue_should_sample_n_step_returns(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = FrameReplayQueue(50, n_step=3, discount_factor=0.5)
+        experiences = episode(10) + episode(10)
+        for experience in experiences:
+            arb.push(*experience)
+        complete, returns, dones, last = arb._windows(np.arange(20))
+        # the windows of the episode that ended are cut by its terminal step
+        self.assertTrue(np.all(complete))
+        for index in range(20):
+            value, d, s2 = n_step_return(experiences, index, 3, 0.5)
+            self.assertAlmostEqual(value, returns[index])
+            self.assertEqual(d, dones[index])
+            self.assertTrue(np.array_equal(s2, experiences[last[index]][4]))
+
+        s, a, r, d, s2 = arb._batch(np.arange(20))
+        self.assertEqual(np.float32, r.dtype)
+        for index in range(20):
+            value, exp_d, exp_s2 = n_step_return(experiences, index, 3, 0.5)
+            self.assertTrue(np.array_equal(experiences[index][0], s[index]))
+            self.assertAlmostEqual(value, r[index])
+            self.assertEqual(exp_d, d[index])
+            self.assertTrue(np.array_equal(exp_s2, s2[index]))
+
+
+class FrameReplayQueue_should_skip_incomplete_n_step_windows(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = FrameReplayQueue(50, n_step=3)
+        # the last two steps of an ongoing episode don't have 3 steps yet
+        experiences = episode(10)[:-1]
+        for experience in experiences:
+            arb.push(*experience)
+        complete, _, _, _ = arb._windows(np.arange(9))
+        self.assertEqual([True] * 7 + [False] * 2, list(complete))
+        s, _, _, _, _ = arb.sample(size=100)
+        for state in s:
+            self.assertFalse(np.array_equal(state, experiences[7][0]))
+            self.assertFalse(np.array_equal(state, experiences[8][0]))
+
+
+class FrameReplayQueue_should_cut_n_step_windows_at_breaks(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = FrameReplayQueue(50, n_step=2)
+        # interleave the steps of two episodes
+        first, second = episode(5), episode(5)
+        for experiences in zip(first, second):
+            for experience in experiences:
+                arb.push(*experience)
+        # only the terminal steps have complete windows (of one step)
+        complete, _, _, _ = arb._windows(np.arange(10))
+        self.assertEqual([False] * 8 + [True] * 2, list(complete))
+        _, _, _, d, _ = arb.sample()
+        self.assertTrue(np.all(d))
+
+
+class FrameReplayQueue_gather_should_raise_on_out_of_range_slots(TestCase):
+    def test(self):
+        arb = FrameReplayQueue(10)
+        frames = np.arange(6, dtype=np.uint8).reshape(6, 1, 1)
+        states = arb._gather(frames, np.array([[0, 5], [2, 3]]))
+        self.assertEqual([[0, 5]], states[0].reshape(1, -1).tolist())
+        self.assertRaises(IndexError, arb._gather, frames, np.array([[0, 6]]))
+        self.assertRaises(IndexError, arb._gather, frames, np.array([[-1, 0]]))
+
+
+def in_turns(streams: list) -> list:
+    """Return the (stream, experience) pairs of streams that push in turns."""
+    return [
+        (stream, experience)
+        for experiences in zip(*streams)
+        for stream, experience in enumerate(experiences)
+    ]
+
+
+class FrameReplayQueue__init__streams(TestCase):
+    def test(self):
+        self.assertRaises(TypeError, FrameReplayQueue, 10, streams=1.5)
+        self.assertRaises(ValueError, FrameReplayQueue, 10, streams=0)
+        arb = FrameReplayQueue(10, streams=2)
+        self.assertRaises(ValueError, arb.push, *ones(), stream=2)
+
+
+class FrameReplayQueue_should_deduplicate_frames_of_streams(TestCase):
+    def test(self):
+        np.random.seed(1)
+        streams = [episode(20) + episode(10), episode(30), episode(5) + episode(25)]
+        arb = FrameReplayQueue(100, streams=3)
+        pushes = in_turns(streams)
+        for stream, experience in pushes:
+            arb.push(*experience, stream=stream)
+        # one frame per experience plus an initial frame per episode
+        self.assertEqual(90 + 5, arb.frame_count)
+        s, a, r, d, s2 = arb._batch(np.arange(90))
+        for index, (_, (exp_s, exp_a, exp_r, exp_d, exp_s2)) in enumerate(pushes):
+            self.assertTrue(np.array_equal(exp_s, s[index]))
+            self.assertEqual(exp_a, a[index])
+            self.assertEqual(exp_r, r[index])
+            self.assertEqual(exp_d, d[index])
+            self.assertTrue(np.array_equal(exp_s2, s2[index]))
+
+
+class FrameReplayQueue_should_sample_n_step_returns_of_streams(TestCase):
+    def test(self):
+        np.random.seed(1)
+        streams = [episode(10) + episode(10), episode(22)[:20]]
+        arb = FrameReplayQueue(50, n_step=3, discount_factor=0.5, streams=2)
+        for stream, experience in in_turns(streams):
+            arb.push(*experience, stream=stream)
+        complete, returns, dones, last = arb._windows(np.arange(40))
+        # the windows of the first stream are complete, the last two steps
+        # of the ongoing episode of the second stream don't have 3 steps yet
+        self.assertEqual([True] * 37 + [False, True, False], list(complete))
+        next_states = arb._stack(arb.s2_frames[last])
+        for index in np.flatnonzero(complete):
+            value, d, s2 = n_step_return(streams[index % 2], index // 2, 3, 0.5)
+            self.assertAlmostEqual(value, returns[index])
+            self.assertEqual(d, dones[index])
+            self.assertTrue(np.array_equal(s2, next_states[index]))
+
+
+class FrameReplayQueue_should_evict_experiences_of_streams_with_overwritten_frames(TestCase):
+    def test(self):
+        np.random.seed(1)
+        lengths = [[7, 3, 12, 2], [1, 1, 20, 2], [4, 9, 6, 5]]
+        streams = [sum([episode(length) for length in stream], []) for stream in lengths]
+        arb = FrameReplayQueue(20, frame_capacity=24, streams=3)
+        pushes = in_turns(streams)
+        for count, (stream, experience) in enumerate(pushes, 1):
+            arb.push(*experience, stream=stream)
+            # every experience left in the queue has its own frames
+            indexes = (arb.index - arb.top + np.arange(arb.top)) % arb.size
+            s, _, _, _, s2 = arb._batch(indexes)
+            for index, (_, (exp_s, _, _, _, exp_s2)) in enumerate(pushes[count - arb.top:count]):
+                self.assertTrue(np.array_equal(exp_s, s[index]))
+                self.assertTrue(np.array_equal(exp_s2, s2[index]))
+
+
+class FrameReplayQueue_should_save_and_load_streams(TestCase):
+    def test(self):
+        np.random.seed(1)
+        streams = [episode(15), episode(16)[:15]]
+        arb = FrameReplayQueue(40, n_step=2, streams=2)
+        for stream, experience in in_turns(streams):
+            arb.push(*experience, stream=stream)
+        with tempfile.TemporaryDirectory() as directory:
+            arb.save(directory)
+            loaded = FrameReplayQueue(40, n_step=2, streams=2)
+            loaded.load(directory)
+        for expected, actual in zip(arb._last, loaded._last):
+            self.assertTrue(np.array_equal(expected, actual))
+        # the loaded queue should find the windows of the saved queue
+        complete, _, _, _ = loaded._windows(np.arange(30))
+        self.assertEqual([True] * 29 + [False], list(complete))
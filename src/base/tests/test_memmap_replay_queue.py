@@ -0,0 +1,67 @@
+"""Unit tests for the MemmapReplayQueue class."""
+import os
+import tempfile
+import numpy as np
+from unittest import TestCase
+from ..memmap_replay_queue import MemmapReplayQueue
+from .test_frame_replay_queue import ones, episode
+
+
+class MemmapReplayQueue__repr__(TestCase):
+    def test(self):
+        arb = MemmapReplayQueue(1234, directory='replay')
+        self.assertEqual("MemmapReplayQueue(size=1234, directory='replay')", repr(arb))
+
+
+class MemmapReplayQueue_should_store_arrays_in_files(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            arb = MemmapReplayQueue(10, directory=directory)
+            arb.push(*ones())
+            arb.flush()
+            for name in arb.arrays.keys():
+                filename = '{}/{}.npy'.format(directory, name)
+                self.assertTrue(os.path.exists(filename))
+            frames = np.load('{}/frames.npy'.format(directory), mmap_mode='r')
+            self.assertEqual((18, 84, 84), frames.shape)
+            self.assertTrue(np.array_equal(np.ones((84, 84)), frames[0]))
+
+
+class MemmapReplayQueue_should_store_episodes(TestCase):
+    def test(self):
+        np.random.seed(1)
+        with tempfile.TemporaryDirectory() as directory:
+            arb = MemmapReplayQueue(50, directory=directory)
+            experiences = episode(30) + episode(30)
+            for experience in experiences:
+                arb.push(*experience)
+            self.assertEqual(50, arb.top)
+
+            indexes = (arb.index + np.arange(50)) % arb.size
+            s, a, r, d, s2 = arb._batch(indexes)
+            for index, (exp_s, exp_a, exp_r, exp_d, exp_s2) in enumerate(experiences[-50:]):
+                self.assertTrue(np.array_equal(exp_s, s[index]))
+                self.assertEqual(exp_a, a[index])
+                self.assertEqual(exp_r, r[index])
+                self.assertEqual(exp_d, d[index])
+                self.assertTrue(np.array_equal(exp_s2, s2[index]))
+
+            s, a, r, d, s2 = arb.sample()
+            self.assertEqual((32, 84, 84, 4), s.shape)
+            self.assertEqual((32, 84, 84, 4), s2.shape)
+
+
+class MemmapReplayQueue_should_load_saved_queue(TestCase):
+    def test(self):
+        np.random.seed(1)
+        with tempfile.TemporaryDirectory() as directory:
+            arb = MemmapReplayQueue(20, directory='{}/replay'.format(directory))
+            for experience in episode(15):
+                arb.push(*experience)
+            arb.save('{}/checkpoint'.format(directory))
+            loaded = MemmapReplayQueue(20, directory='{}/loaded'.format(directory))
+            loaded.load('{}/checkpoint'.format(directory))
+            self.assertEqual(arb.top, loaded.top)
+            for name, array in arb.arrays.items():
+                self.assertIsInstance(loaded.arrays[name], np.memmap)
+                self.assertTrue(np.array_equal(array, loaded.arrays[name]))
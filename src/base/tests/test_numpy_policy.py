@@ -0,0 +1,112 @@
+"""Unit tests for the NumPyPolicy class."""
+import os
+import tempfile
+import numpy as np
+from unittest import TestCase
+from ..numpy_policy import _conv2d
+from ..numpy_policy import NumPyPolicy
+
+
+def random_weights(dueling: bool, num_actions: int=6) -> dict:
+    """Return random weights of the DeepMind CNN for 84x84x4 frames."""
+    random = np.random.RandomState(1)
+
+    def weight(*shape):
+        return (random.normal(size=shape) / np.sqrt(np.prod(shape[:-1]))).astype(np.float32)
+
+    weights = {
+        'dueling': np.array(dueling),
+        'conv_strides': np.array([(4, 4), (2, 2), (1, 1)]),
+        'conv_0_kernel': weight(8, 8, 4, 32), 'conv_0_bias': weight(32),
+        'conv_1_kernel': weight(4, 4, 32, 64), 'conv_1_bias': weight(64),
+        'conv_2_kernel': weight(3, 3, 64, 64), 'conv_2_bias': weight(64),
+    }
+    heads = {'value_': 1, 'advantage_': num_actions} if dueling else {'': num_actions}
+    for prefix, units in heads.items():
+        weights[prefix + 'hidden_kernel'] = weight(3136, 512)
+        weights[prefix + 'hidden_bias'] = weight(512)
+        weights[prefix + 'output_kernel'] = weight(512, units)
+        weights[prefix + 'output_bias'] = weight(units)
+    return weights
+
+
+def naive_conv2d(x, kernel, bias, strides):
+    """Return the 'valid' convolution of a batch of images with loops."""
+    kh, kw = kernel.shape[:2]
+    rows = (x.shape[1] - kh) // strides[0] + 1
+    cols = (x.shape[2] - kw) // strides[1] + 1
+    y = np.zeros((len(x), rows, cols, kernel.shape[-1]), dtype=np.float32)
+    for i in range(rows):
+        for j in range(cols):
+            patch = x[:, i * strides[0]:i * strides[0] + kh, j * strides[1]:j * strides[1] + kw]
+            y[:, i, j] = np.tensordot(patch, kernel, axes=3) + bias
+    return y
+
+
+def naive_q_values(weights: dict, states: np.ndarray) -> np.ndarray:
+    """Return the Q values of the network one layer at a time."""
+    x = states.astype(np.float32) / 255
+    for index, strides in enumerate(weights['conv_strides']):
+        kernel = weights['conv_{}_kernel'.format(index)]
+        bias = weights['conv_{}_bias'.format(index)]
+        x = np.maximum(naive_conv2d(x, kernel, bias, strides), 0)
+    x = x.reshape(len(x), -1)
+
+    def head(prefix):
+        h = np.maximum(x.dot(weights[prefix + 'hidden_kernel']) + weights[prefix + 'hidden_bias'], 0)
+        return h.dot(weights[prefix + 'output_kernel']) + weights[prefix + 'output_bias']
+
+    if not weights['dueling']:
+        return head('')
+    advantage = head('advantage_')
+    return advantage - np.mean(advantage) + head('value_')
+
+
+def load_policy(directory: str, weights: dict) -> NumPyPolicy:
+    """Save weights to a file and load a policy from it."""
+    path = os.path.join(directory, 'weights.npz')
+    np.savez(path, **weights)
+    return NumPyPolicy(path)
+
+
+class _conv2d_should_match_naive_convolution(TestCase):
+    def test(self):
+        random = np.random.RandomState(1)
+        x = random.normal(size=(2, 11, 9, 3)).astype(np.float32)
+        kernel = random.normal(size=(3, 2, 3, 5)).astype(np.float32)
+        bias = random.normal(size=5).astype(np.float32)
+        for strides in [(1, 1), (2, 3)]:
+            expected = naive_conv2d(x, kernel, bias, strides)
+            actual = _conv2d(x, kernel, bias, strides)
+            self.assertEqual(expected.shape, actual.shape)
+            self.assertTrue(np.allclose(expected, actual, atol=1e-5))
+
+
+class NumPyPolicy_should_match_deep_q_model(TestCase):
+    def test(self):
+        weights = random_weights(dueling=False)
+        states = np.random.RandomState(2).randint(0, 256, (3, 84, 84, 4), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            policy = load_policy(directory, weights)
+        expected = naive_q_values(weights, states)
+        self.assertTrue(np.allclose(expected, policy.q_values(states), atol=1e-4))
+        self.assertTrue(np.array_equal(np.argmax(expected, axis=1), policy(states)))
+
+
+class NumPyPolicy_should_match_dueling_deep_q_model(TestCase):
+    def test(self):
+        weights = random_weights(dueling=True)
+        states = np.random.RandomState(2).randint(0, 256, (3, 84, 84, 4), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            policy = load_policy(directory, weights)
+        expected = naive_q_values(weights, states)
+        self.assertTrue(policy.dueling)
+        self.assertTrue(np.allclose(expected, policy.q_values(states), atol=1e-4))
+        self.assertTrue(np.array_equal(np.argmax(expected, axis=1), policy(states)))
+
+
+class NumPyPolicy__repr__(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            policy = load_policy(directory, random_weights(dueling=False))
+            self.assertEqual('NumPyPolicy(path={})'.format(repr(policy.path)), repr(policy))
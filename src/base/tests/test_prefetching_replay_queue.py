@@ -0,0 +1,75 @@
+"""Unit tests for the PrefetchingReplayQueue class."""
+import numpy as np
+from unittest import TestCase
+from ..frame_replay_queue import FrameReplayQueue
+from ..prefetching_replay_queue import PrefetchingReplayQueue
+from ..prioritized_replay_queue import PrioritizedReplayQueue
+from .test_frame_replay_queue import ones, episode
+
+
+class PrefetchingReplayQueue__init__(TestCase):
+    def test(self):
+        self.assertRaises(TypeError, PrefetchingReplayQueue, FrameReplayQueue(10), '2')
+        self.assertRaises(ValueError, PrefetchingReplayQueue, FrameReplayQueue(10), 0)
+
+
+class PrefetchingReplayQueue__repr__(TestCase):
+    def test(self):
+        arb = PrefetchingReplayQueue(FrameReplayQueue(10))
+        expected = 'PrefetchingReplayQueue(replay_queue=FrameReplayQueue(size=10), prefetch=2)'
+        self.assertEqual(expected, repr(arb))
+
+
+class PrefetchingReplayQueue_should_wrap_queue(TestCase):
+    def test(self):
+        arb = PrefetchingReplayQueue(FrameReplayQueue(10))
+        arb.push(*ones())
+        self.assertEqual(1, arb.top)
+        self.assertEqual(1, arb.index)
+        self.assertEqual(10, arb.size)
+
+
+class PrefetchingReplayQueue_should_sample_batches(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = PrefetchingReplayQueue(FrameReplayQueue(100), prefetch=2)
+        experiences = episode(50)
+        for experience in experiences:
+            arb.push(*experience)
+        for _ in range(10):
+            s, a, r, d, s2 = arb.sample(size=16)
+            self.assertEqual((16, 84, 84, 4), s.shape)
+            self.assertEqual((16, 84, 84, 4), s2.shape)
+            # each state of the batch should be a state of the episode
+            for state in s:
+                self.assertTrue(any(np.array_equal(e[0], state) for e in experiences))
+            # pushing while prefetching should be safe
+            arb.push(*experiences[-1])
+        self.assertRaises(ValueError, arb.sample, 8)
+        arb.close()
+        s, a, r, d, s2 = arb.sample(size=8)
+        self.assertEqual((8, 84, 84, 4), s.shape)
+        arb.close()
+
+
+class PrefetchingReplayQueue_should_reuse_buffers(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = PrefetchingReplayQueue(FrameReplayQueue(100), prefetch=1)
+        for experience in episode(50):
+            arb.push(*experience)
+        buffers = set(id(arb.sample(size=4)[0]) for _ in range(10))
+        self.assertEqual(2, len(buffers))
+        arb.close()
+
+
+class PrefetchingReplayQueue_should_sample_prioritized_queue(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = PrefetchingReplayQueue(PrioritizedReplayQueue(100))
+        for experience in episode(50):
+            arb.push(*experience, priority=1)
+        s, a, r, d, s2, w, indexes = arb.sample(size=16)
+        self.assertEqual(np.float32, w.dtype)
+        arb.update_priorities(indexes, np.zeros(16))
+        arb.close()
@@ -1,8 +1,11 @@
 """Unit tests for the ReplyBuffer class."""
 import os
+import tempfile
 import numpy as np
 from unittest import TestCase
+from ..annealing_variable import AnnealingVariable
 from ..prioritized_replay_queue import PrioritizedReplayQueue
+from .test_frame_replay_queue import episode
 
 
 # the name of the directory housing this module
@@ -88,13 +91,14 @@ class ReplyBuffer_sample(TestCase):
         for i in range(1000):
             arb.push(*ones(), priority=i)
 
-        s, a, r, d, s2 = arb.sample()
+        s, a, r, d, s2, w, indexes = arb.sample()
 
         self.assertEqual(s.dtype, np.uint8)
         self.assertEqual(a.dtype, np.uint8)
         self.assertEqual(r.dtype, np.int8)
         self.assertEqual(d.dtype, np.bool)
         self.assertEqual(s2.dtype, np.uint8)
+        self.assertEqual(w.dtype, np.float32)
 
         sample_size = len(s)
 
@@ -116,13 +120,14 @@ class ReplyBuffer_sample_random(TestCase):
         for i in range(1000):
             arb.push(*random_state(), priority=i)
 
-        s, a, r, d, s2 = arb.sample()
+        s, a, r, d, s2, w, indexes = arb.sample()
 
         self.assertEqual(s.dtype, np.uint8)
         self.assertEqual(a.dtype, np.uint8)
         self.assertEqual(r.dtype, np.int8)
         self.assertEqual(d.dtype, np.bool)
         self.assertEqual(s2.dtype, np.uint8)
+        self.assertEqual(w.dtype, np.float32)
 
         # save the arrays as the expected arrays
         # np.save('{}/arrays/s_np_prio.npy'.format(DIR), s)
@@ -160,3 +165,130 @@ class ReplyBuffer_should_push_items_with_uniform_priority(TestCase):
             else:
                 arb.push(*ones(), priority=0)
                 self.assertEqual(10, arb.top)
+
+
+class ReplyBuffer_should_sample_proportional_to_priority(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = PrioritizedReplayQueue(4, alpha=1, epsilon=0)
+        arb.push(*zeros(), priority=1)
+        arb.push(*zeros(), priority=0)
+        arb.push(*ones(), priority=3)
+        arb.push(*zeros(), priority=0)
+
+        counts = np.zeros(4)
+        for _ in range(250):
+            _, _, _, _, _, _, indexes = arb.sample()
+            counts += np.bincount(indexes, minlength=4)
+
+        self.assertEqual(0, counts[1])
+        self.assertEqual(0, counts[3])
+        self.assertAlmostEqual(0.25, counts[0] / counts.sum(), places=2)
+        self.assertAlmostEqual(0.75, counts[2] / counts.sum(), places=2)
+
+
+class ReplyBuffer_should_update_priorities(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = PrioritizedReplayQueue(4, alpha=1, epsilon=0)
+        for _ in range(4):
+            arb.push(*zeros(), priority=1)
+        arb.update_priorities([0, 1, 2], [0, 0, -2])
+        self.assertEqual(3, arb.priorities.total)
+        self.assertEqual(2, arb.max_priority)
+
+        _, _, _, _, _, w, indexes = arb.sample(size=100)
+        self.assertEqual({2, 3}, set(indexes))
+        # the least likely experience has the largest weight
+        self.assertTrue(np.all(w[indexes == 3] == 1))
+        self.assertTrue(np.all(w[indexes == 2] < 1))
+
+
+class ReplyBuffer_should_clear_priorities_of_evicted_items(TestCase):
+    def test(self):
+        arb = PrioritizedReplayQueue(4, alpha=1, epsilon=0)
+        for index in range(6):
+            arb.push(*zeros(), priority=index)
+        self.assertEqual(4, arb.top)
+        self.assertEqual(2 + 3 + 4 + 5, arb.priorities.total)
+
+
+class ReplyBuffer_should_save_and_load_priorities(TestCase):
+    def test(self):
+        arb = PrioritizedReplayQueue(4, alpha=1, epsilon=0)
+        for index in range(6):
+            arb.push(*random_state(), priority=index)
+        arb.sample()
+        with tempfile.TemporaryDirectory() as directory:
+            arb.save(directory)
+            loaded = PrioritizedReplayQueue(4, alpha=1, epsilon=0)
+            loaded.load(directory)
+        self.assertEqual(arb.top, loaded.top)
+        self.assertEqual(arb.max_priority, loaded.max_priority)
+        self.assertEqual(arb.beta.value, loaded.beta.value)
+        self.assertEqual(arb.priorities.total, loaded.priorities.total)
+        self.assertTrue(np.array_equal(arb.priorities.tree, loaded.priorities.tree))
+
+
+class ReplyBuffer_should_sample_into_out(TestCase):
+    def test(self):
+        arb = PrioritizedReplayQueue(10, beta=AnnealingVariable(0.5, 0.5, 1))
+        for index in range(12):
+            arb.push(*random_state(), priority=index)
+        out = arb.empty_batch(32)
+        np.random.seed(2)
+        expected = arb.sample()
+        np.random.seed(2)
+        batch = arb.sample(out=out)
+        for exp, act, buffer in zip(expected, batch, out):
+            self.assertIs(buffer, act)
+            self.assertEqual(exp.dtype, act.dtype)
+            self.assertTrue(np.array_equal(exp, act))
+
+
+class ReplyBuffer_should_sample_complete_n_step_windows(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = PrioritizedReplayQueue(10, n_step=3)
+        # the last two steps of an ongoing episode don't have 3 steps yet
+        for experience in episode(11)[:-1]:
+            arb.push(*experience, priority=1)
+        arb.update_priorities([8], [100])
+        _, _, r, _, _, w, indexes = arb.sample(size=100)
+        self.assertEqual(np.float32, r.dtype)
+        self.assertNotIn(8, indexes)
+        self.assertNotIn(9, indexes)
+
+
+class ReplyBuffer_should_ignore_updates_of_overwritten_items(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = PrioritizedReplayQueue(4, alpha=1, epsilon=0)
+        for _ in range(4):
+            arb.push(*zeros(), priority=1)
+        _, _, _, _, _, _, indexes = arb.sample(size=4)
+        # overwrite two experiences before the TD-errors of the batch arrive
+        arb.push(*ones(), priority=5)
+        arb.push(*ones(), priority=5)
+        arb.update_priorities(indexes, np.zeros(4))
+        # the new experiences keep the priorities they were pushed with
+        self.assertEqual(5, arb.priorities[0])
+        self.assertEqual(5, arb.priorities[1])
+        self.assertEqual(10, arb.priorities.total)
+        # the IDs of the new experiences update them
+        arb.update_priorities([4, 5], [2, 3])
+        self.assertEqual(5, arb.priorities.total)
+
+
+class ReplyBuffer_should_save_and_load_ids(TestCase):
+    def test(self):
+        arb = PrioritizedReplayQueue(4, alpha=1, epsilon=0)
+        for index in range(6):
+            arb.push(*zeros(), priority=index)
+        with tempfile.TemporaryDirectory() as directory:
+            arb.save(directory)
+            loaded = PrioritizedReplayQueue(4, alpha=1, epsilon=0)
+            loaded.load(directory)
+        self.assertEqual(6, loaded.pushes)
+        loaded.update_priorities([1, 5], [0, 0])
+        self.assertEqual(2 + 3 + 4, loaded.priorities.total)
@@ -1,5 +1,6 @@
 """Unit tests for the ReplyBuffer class."""
 import os
+import tempfile
 import numpy as np
 from unittest import TestCase
 from ..replay_queue import ReplayQueue
@@ -148,3 +149,38 @@ class ReplyBuffer_sample_random(TestCase):
         self.assertTrue(np.array_equal(exp_r, r))
         self.assertTrue(np.array_equal(exp_d, d))
         self.assertTrue(np.array_equal(exp_s2, s2))
+
+
+class ReplyBuffer_should_save_and_load(TestCase):
+    def test(self):
+        arb = ReplayQueue(10)
+        for _ in range(12):
+            arb.push(*random_state())
+        with tempfile.TemporaryDirectory() as directory:
+            arb.save(directory)
+            loaded = ReplayQueue(10)
+            loaded.load(directory)
+            self.assertRaises(ValueError, ReplayQueue(5).load, directory)
+        self.assertEqual(arb.index, loaded.index)
+        self.assertEqual(arb.top, loaded.top)
+        for exp, act in zip(arb.queue, loaded.queue):
+            self.assertTrue(np.array_equal(exp[0], act[0]))
+            self.assertEqual(exp[1:4], act[1:4])
+            self.assertTrue(np.array_equal(exp[4], act[4]))
+
+
+class ReplyBuffer_should_sample_into_out(TestCase):
+    def test(self):
+        arb = ReplayQueue(10)
+        self.assertRaises(ValueError, arb.empty_batch, 32)
+        for _ in range(12):
+            arb.push(*random_state())
+        out = arb.empty_batch(32)
+        np.random.seed(2)
+        expected = arb.sample()
+        np.random.seed(2)
+        batch = arb.sample(out=out)
+        for exp, act, buffer in zip(expected, batch, out):
+            self.assertIs(buffer, act)
+            self.assertEqual(exp.dtype, act.dtype)
+            self.assertTrue(np.array_equal(exp, act))
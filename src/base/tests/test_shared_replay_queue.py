@@ -0,0 +1,116 @@
+"""Unit tests for the SharedReplayQueue class."""
+import multiprocessing
+from multiprocessing.reduction import ForkingPickler
+import numpy as np
+from unittest import TestCase
+from ..shared_replay_queue import SharedReplayQueue
+from .test_frame_replay_queue import episode
+
+
+def push_all(queue: SharedReplayQueue, index: int, experiences: list) -> None:
+    """Push experiences to a partition of a shared queue (in a process)."""
+    writer = queue.writer(index)
+    for experience in experiences:
+        writer.push(*experience)
+    queue.close()
+
+
+def find(experiences: list, s: np.ndarray) -> tuple:
+    """Return the experience with a given state."""
+    for experience in experiences:
+        if np.array_equal(experience[0], s):
+            return experience
+    raise AssertionError('sampled a state that was never pushed')
+
+
+class SharedReplayQueue__repr__(TestCase):
+    def test(self):
+        arb = SharedReplayQueue(100, (84, 84, 4), writers=2)
+        self.assertEqual('SharedReplayQueue(size=100, shape=(84, 84, 4), writers=2)', repr(arb))
+        arb.close()
+
+
+class SharedReplayQueue_should_check_writers(TestCase):
+    def test(self):
+        self.assertRaises(TypeError, SharedReplayQueue, 10, (84, 84, 4), writers=1.0)
+        self.assertRaises(ValueError, SharedReplayQueue, 10, (84, 84, 4), writers=0)
+        self.assertRaises(ValueError, SharedReplayQueue, 10, (84, 84, 4), writers=11)
+
+
+class SharedReplayQueue_should_raise_before_enough_experiences(TestCase):
+    def test(self):
+        arb = SharedReplayQueue(100, (84, 84, 4), margin=5)
+        self.assertRaises(ValueError, arb.sample, 4)
+        for experience in episode(5):
+            arb.push(*experience)
+        self.assertRaises(ValueError, arb.sample, 4)
+        arb.close()
+
+
+class SharedReplayQueue_should_sample_pushed_experiences(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = SharedReplayQueue(100, (84, 84, 4), writers=2, margin=2)
+        experiences = [episode(20), episode(30)]
+        for index, partition in enumerate(experiences):
+            for experience in partition:
+                arb.writer(index).push(*experience)
+        self.assertEqual(50, arb.top)
+        s, a, r, d, s2 = arb.sample(64)
+        self.assertEqual((64, 84, 84, 4), s.shape)
+        # the two oldest experiences of each partition are in the margin
+        allowed = experiences[0][2:] + experiences[1][2:]
+        for index in range(64):
+            exp_s, exp_a, exp_r, exp_d, exp_s2 = find(allowed, s[index])
+            self.assertEqual(exp_a, a[index])
+            self.assertEqual(exp_r, r[index])
+            self.assertEqual(exp_d, d[index])
+            self.assertTrue(np.array_equal(exp_s2, s2[index]))
+        arb.close()
+
+
+class SharedReplayQueue_should_wrap_partitions(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = SharedReplayQueue(20, (84, 84, 4), writers=2, margin=1)
+        experiences = episode(25)
+        for experience in experiences:
+            arb.writer(1).push(*experience)
+        self.assertEqual(10, arb.top)
+        batch = arb.empty_batch(32)
+        s, a, r, d, s2 = arb.sample(32, out=batch)
+        self.assertIs(batch[0], s)
+        for index in range(32):
+            find(experiences[-9:], s[index])
+        arb.close()
+
+
+class SharedReplayQueue_should_share_only_with_starting_processes(TestCase):
+    def test(self):
+        arb = SharedReplayQueue(40, (84, 84, 4), margin=1)
+        # shared arrays pass to processes by inheritance only, i.e., not
+        # through pipes or queues
+        self.assertRaises(RuntimeError, ForkingPickler.dumps, arb)
+        arb.close()
+
+
+class SharedReplayQueue_should_share_with_processes(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = SharedReplayQueue(100, (84, 84, 4), writers=2, margin=1)
+        experiences = [episode(20), episode(20)]
+        context = multiprocessing.get_context('spawn')
+        processes = [
+            context.Process(target=push_all, args=(arb, index, partition))
+            for index, partition in enumerate(experiences)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            self.assertEqual(0, process.exitcode)
+        self.assertEqual(40, arb.top)
+        s, *_ = arb.sample(32)
+        for index in range(32):
+            find(experiences[0][1:] + experiences[1][1:], s[index])
+        arb.close()
@@ -0,0 +1,44 @@
+"""Unit tests for the SumTree class."""
+import numpy as np
+from unittest import TestCase
+from ..sum_tree import SumTree
+
+
+class SumTree__init__(TestCase):
+    def test(self):
+        tree = SumTree(5)
+        self.assertEqual(5, tree.size)
+        self.assertEqual(8, tree.capacity)
+        self.assertEqual(3, tree.depth)
+        self.assertEqual(0, tree.total)
+
+
+class SumTree__repr__(TestCase):
+    def test(self):
+        self.assertEqual('SumTree(size=10)', repr(SumTree(10)))
+
+
+class SumTree_should_update_sums(TestCase):
+    def test(self):
+        tree = SumTree(5)
+        tree.update([0, 1, 4], [1., 2., 3.])
+        self.assertEqual(6, tree.total)
+        tree.update([1], [0.5])
+        self.assertEqual(4.5, tree.total)
+        self.assertEqual([1., 0.5, 0., 0., 3.], list(tree[np.arange(5)]))
+
+
+class SumTree_should_find_leaves(TestCase):
+    def test(self):
+        tree = SumTree(5)
+        tree.update([0, 1, 4], [1., 2., 3.])
+        values = np.array([0., 0.99, 1., 2.99, 3., 5.99, 6.])
+        self.assertEqual([0, 0, 1, 1, 4, 4, 4], list(tree.find(values)))
+
+
+class SumTree_should_support_a_single_leaf(TestCase):
+    def test(self):
+        tree = SumTree(1)
+        tree.update([0], [2.])
+        self.assertEqual(2, tree.total)
+        self.assertEqual([0, 0], list(tree.find(np.array([0., 1.9]))))
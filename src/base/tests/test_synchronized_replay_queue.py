@@ -0,0 +1,59 @@
+"""Unit tests for the SynchronizedReplayQueue class."""
+import threading
+import numpy as np
+from unittest import TestCase
+from ..frame_replay_queue import FrameReplayQueue
+from ..prioritized_replay_queue import PrioritizedReplayQueue
+from ..synchronized_replay_queue import SynchronizedReplayQueue
+from .test_frame_replay_queue import ones, episode
+
+
+class SynchronizedReplayQueue__repr__(TestCase):
+    def test(self):
+        arb = SynchronizedReplayQueue(FrameReplayQueue(10))
+        expected = 'SynchronizedReplayQueue(replay_queue=FrameReplayQueue(size=10))'
+        self.assertEqual(expected, repr(arb))
+
+
+class SynchronizedReplayQueue_should_wrap_queue(TestCase):
+    def test(self):
+        arb = SynchronizedReplayQueue(FrameReplayQueue(10))
+        arb.push(*ones())
+        self.assertEqual(1, arb.top)
+        self.assertEqual(1, arb.index)
+        self.assertEqual(10, arb.size)
+
+
+class SynchronizedReplayQueue_should_sample_while_pushing(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = SynchronizedReplayQueue(FrameReplayQueue(100))
+        experiences = episode(60)
+        for experience in experiences[:10]:
+            arb.push(*experience)
+
+        def push():
+            for experience in experiences[10:]:
+                arb.push(*experience)
+
+        thread = threading.Thread(target=push)
+        thread.start()
+        batch = arb.empty_batch(8)
+        for _ in range(50):
+            s, a, r, d, s2 = arb.sample(size=8, out=batch)
+            # each state of the batch should be a state of the episode
+            for state in s:
+                self.assertTrue(any(np.array_equal(e[0], state) for e in experiences))
+        thread.join()
+        self.assertEqual(60, arb.top)
+
+
+class SynchronizedReplayQueue_should_sample_prioritized_queue(TestCase):
+    def test(self):
+        np.random.seed(1)
+        arb = SynchronizedReplayQueue(PrioritizedReplayQueue(100))
+        for experience in episode(50):
+            arb.push(*experience, priority=1)
+        s, a, r, d, s2, w, indexes = arb.sample(size=16)
+        self.assertEqual(np.float32, w.dtype)
+        arb.update_priorities(indexes, np.zeros(16))
@@ -28,6 +28,47 @@ _CMD_LINE_ARGS = {
         'default': False,
         'help': 'whether to monitor the operation (record frames)',
     },
+    ('--replay_on_disk', '-R'): {
+        'action': 'store_true',
+        'help': 'whether to store the replay memory on disk (train mode)',
+    },
+    ('--compress_replay', '-C'): {
+        'action': 'store_true',
+        'help': 'whether to compress the frames of the replay memory (train mode)',
+    },
+    ('--resume', '-r'): {
+        'type': str,
+        'default': None,
+        'help': 'a results directory to resume training from (train mode)',
+    },
+    ('--num_envs', '-n'): {
+        'type': int,
+        'default': 1,
+        'help': 'the number of environments to step in parallel processes',
+    },
+    ('--pipelined', '-P'): {
+        'action': 'store_true',
+        'help': 'whether to act and learn in parallel threads (train mode)',
+    },
+    ('--num_actors', '-A'): {
+        'type': int,
+        'default': 0,
+        'help': 'the number of Ape-X actor processes, 0 to act in the learner (train mode)',
+    },
+    ('--quantize', '-q'): {
+        'type': str,
+        'default': None,
+        'help': 'the precision to quantize the network to (play mode)',
+        'choices': ['int8', 'float16'],
+    },
+    ('--numpy', '-N'): {
+        'action': 'store_true',
+        'help': 'whether to play with the NumPy copy of the network (play mode)',
+    },
+    ('--fused', '-F'): {
+        'action': 'store_true',
+        'help': 'whether to preprocess Atari games with a single fused wrapper',
+    },
 }
 
 
@@ -53,17 +94,30 @@ def main() -> None:
             env_id=args.env,
             output_dir=args.output,
             monitor=args.monitor,
+            replay_on_disk=args.replay_on_disk,
+            compress_replay=args.compress_replay,
+            resume=args.resume,
+            num_envs=args.num_envs,
+            pipelined=args.pipelined,
+            num_actors=args.num_actors,
+            fused=args.fused,
         )
     elif mode == 'random':
         play_random(
             env_id=args.env,
             output_dir=args.output,
             monitor=args.monitor,
+            num_envs=args.num_envs,
+            fused=args.fused,
         )
     elif mode == 'play':
         play(
             results_dir=args.output,
             monitor=args.monitor,
+            quantization=args.quantize,
+            numpy_policy=args.numpy,
+            num_envs=args.num_envs,
+            fused=args.fused,
         )
 
 
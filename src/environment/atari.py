@@ -1,6 +1,7 @@
 """Methods for setting up an Atari environment."""
 import gym
 from src.environment.wrappers import (
+    AtariPipelineEnv,
     ClipRewardEnv,
     DownsampleEnv,
     FireResetEnv,
@@ -8,6 +9,7 @@ from src.environment.wrappers import (
     MaxFrameskipEnv,
     NoopResetEnv,
     PenalizeDeathEnv,
+    ResetCacheEnv,
     RewardCacheEnv,
 )
 
@@ -19,7 +21,10 @@ def build_atari_environment(game_name: str,
     skip_frames: int=4,
     death_penalty: int=-1,
     clip_rewards: bool=True,
-    agent_history_length: int=4
+    agent_history_length: int=4,
+    reset_cache_size: int=None,
+    reset_cache_refresh: int=10,
+    fused: bool=False,
 ):
     """
     Build and return a configured Atari environment.
@@ -33,6 +38,13 @@ def build_atari_environment(game_name: str,
         death_penatly: the penalty for losing a life in a game
         clip_rewards: whether to clip rewards in {-1, 0, +1}
         agent_history_length: the size of the frame buffer for the agent
+        reset_cache_size: the number of post-reset emulator states to keep in
+            a pool and restore on reset instead of replaying the no-ops and
+            fire actions. If None, every reset is replayed
+        reset_cache_refresh: the number of resets between resets that are
+            replayed to refresh the pool of post-reset states
+        fused: whether to preprocess with a single AtariPipelineEnv instead of
+            a stack of wrappers (the observations and rewards are identical)
 
     Returns:
         a gym environment configured for this experiment
@@ -43,6 +55,18 @@ def build_atari_environment(game_name: str,
         env = gym.make('{}NoFrameskip-v10'.format(game_name))
     else:
         env = gym.make('{}NoFrameskip-v4'.format(game_name))
+    # preprocess with the fused pipeline if enabled
+    if fused:
+        if reset_cache_size is not None:
+            raise ValueError('the fused pipeline has no reset cache')
+        return AtariPipelineEnv(env,
+            image_size=image_size,
+            noop_max=noop_max,
+            skip_frames=skip_frames,
+            death_penalty=death_penalty,
+            clip_rewards=clip_rewards,
+            agent_history_length=agent_history_length,
+        )
     # wrap the environment with a reward cacher
     env = RewardCacheEnv(env)
     # apply the no op max feature if enabled
@@ -54,6 +78,9 @@ def build_atari_environment(game_name: str,
     # apply the wrapper for firing at the beginning of games that require
     if 'FIRE' in env.unwrapped.get_action_meanings():
         env = FireResetEnv(env)
+    # restore resets from a pool of post-reset states if enabled
+    if reset_cache_size is not None:
+        env = ResetCacheEnv(env, size=reset_cache_size, refresh_every=reset_cache_refresh)
     # apply a down-sampler for the given game
     env = DownsampleEnv(env, image_size)
     # apply the death penalty feature if enabled
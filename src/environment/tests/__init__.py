@@ -0,0 +1 @@
+"""Test cases for the `environment` package."""
@@ -0,0 +1,143 @@
+"""Stand-in Atari and NES environments that need no emulator or ROMs."""
+import gym
+import numpy as np
+
+
+class _Ale(object):
+    """The part of the ALE interface that the wrappers use."""
+
+    def __init__(self, env) -> None:
+        self.env = env
+
+    def lives(self) -> int:
+        return self.env.lives
+
+
+class _StandInEnv(gym.Env):
+    """An environment of random tiles of palette colors (like game screens)."""
+
+    metadata = {'render.modes': []}
+
+    def __init__(self,
+        shape: tuple,
+        tile: int,
+        num_actions: int,
+        max_steps: int,
+    ) -> None:
+        """
+        Initialize a new stand-in environment.
+
+        Args:
+            shape: the (height, width) of the screen
+            tile: the size of the square tiles of the screen
+            num_actions: the number of actions of the environment
+            max_steps: the max number of steps of an episode
+
+        Returns:
+            None
+
+        """
+        self.observation_space = gym.spaces.Box(low=0, high=255, shape=(*shape, 3), dtype=np.uint8)
+        self.action_space = gym.spaces.Discrete(num_actions)
+        self.tile = tile
+        self.max_steps = max_steps
+        self.palette = np.random.RandomState(5).randint(0, 256, (16, 3)).astype(np.uint8)
+        self.np_random = np.random.RandomState(0)
+        self.tiles = None
+        self.steps = 0
+        # the keyword arguments of the last reset
+        self.reset_kwargs = None
+
+    def seed(self, seed: int=None) -> list:
+        self.np_random = np.random.RandomState(seed)
+        return [seed]
+
+    def _get_obs(self) -> np.ndarray:
+        """Return the screen (reading it doesn't change the emulator)."""
+        tiles = self.tiles.repeat(self.tile, axis=0).repeat(self.tile, axis=1)
+        return self.palette[tiles]
+
+    def _reset_emulator(self, **kwargs) -> None:
+        """Start the emulator of a new episode."""
+        self.reset_kwargs = kwargs
+        height, width, _ = self.observation_space.shape
+        shape = (height // self.tile, width // self.tile)
+        self.tiles = self.np_random.randint(0, 16, shape)
+        self.steps = 0
+
+    def _step_emulator(self, action: int) -> float:
+        """Advance the emulator with an action and return the reward."""
+        self.steps += 1
+        changes = self.np_random.randint(0, 2, self.tiles.shape) * (action + 1)
+        self.tiles = (self.tiles + changes) % 16
+        return float(self.np_random.randint(-1, 3) * (action + 1))
+
+
+class StandInAtariEnv(_StandInEnv):
+    """A stand-in for the gym ALE environment of an Atari game."""
+
+    def __init__(self, fire: bool=False, lives: int=3, max_steps: int=400) -> None:
+        """
+        Initialize a new stand-in Atari environment.
+
+        Args:
+            fire: whether the game fires on reset (like Breakout)
+            lives: the number of lives of an episode
+            max_steps: the max number of steps of an episode
+
+        Returns:
+            None
+
+        """
+        super().__init__((210, 160), 10, 4, max_steps)
+        self.fire = fire
+        self.max_lives = lives
+        self.lives = lives
+        self.ale = _Ale(self)
+
+    def get_action_meanings(self) -> list:
+        if self.fire:
+            return ['NOOP', 'FIRE', 'RIGHT', 'LEFT']
+        return ['NOOP', 'UP', 'RIGHT', 'LEFT']
+
+    def reset(self, **kwargs) -> np.ndarray:
+        self._reset_emulator(**kwargs)
+        self.lives = self.max_lives
+        return self._get_obs()
+
+    def step(self, action: int) -> tuple:
+        reward = self._step_emulator(action)
+        if self.np_random.random_sample() < 0.02:
+            self.lives -= 1
+        done = self.lives == 0 or self.steps >= self.max_steps
+        return self._get_obs(), reward, done, {'ale.lives': self.lives}
+
+
+class StandInNESEnv(_StandInEnv):
+    """A stand-in for a NES environment with discrete actions."""
+
+    def __init__(self, max_steps: int=400) -> None:
+        """
+        Initialize a new stand-in NES environment.
+
+        Args:
+            max_steps: the max number of steps of an episode
+
+        Returns:
+            None
+
+        """
+        super().__init__((240, 256), 8, 7, max_steps)
+
+    def reset(self, **kwargs) -> np.ndarray:
+        self._reset_emulator(**kwargs)
+        return self._get_obs()
+
+    def step(self, action: int) -> tuple:
+        reward = self._step_emulator(action)
+        done = self.np_random.random_sample() < 0.01 or self.steps >= self.max_steps
+        return self._get_obs(), reward, done, {}
+
+
+# explicitly define the outward facing API of this module
+__all__ = [StandInAtariEnv.__name__, StandInNESEnv.__name__]
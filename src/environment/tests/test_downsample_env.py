@@ -0,0 +1,44 @@
+"""Unit tests for the down-sampling of frames."""
+from unittest import TestCase
+import cv2
+import gym
+import numpy as np
+from ..wrappers.downsample_env import DownsampleEnv, downsample
+
+
+class FrameEnv(gym.Env):
+    """An environment with the RGB frames of the NES."""
+
+    observation_space = gym.spaces.Box(low=0, high=255, shape=(240, 256, 3), dtype=np.uint8)
+    action_space = gym.spaces.Discrete(2)
+
+
+def frames(count: int) -> np.ndarray:
+    """Return a batch of random RGB frames of the NES."""
+    return np.random.randint(0, 256, (count, 240, 256, 3)).astype(np.uint8)
+
+
+class downsample_should_match_DownsampleEnv(TestCase):
+    def test(self):
+        np.random.seed(1)
+        env = DownsampleEnv(FrameEnv(), (84, 84))
+        batch = frames(8)
+        out = np.empty((8, 84, 84, 1), dtype=np.uint8)
+        self.assertIs(out, downsample(batch, (84, 84), out=out))
+        for frame, actual in zip(batch, out):
+            self.assertTrue(np.array_equal(env.observation(frame), actual))
+            # the gray scale conversion and resize of a single frame
+            expected = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY), (84, 84))
+            self.assertTrue(np.array_equal(expected, actual[:, :, 0]))
+
+
+class downsample_should_resize_to_width_and_height(TestCase):
+    def test(self):
+        np.random.seed(1)
+        env = DownsampleEnv(FrameEnv(), (84, 110))
+        self.assertEqual((110, 84, 1), env.observation_space.shape)
+        batch = frames(3)
+        actual = downsample(batch, (84, 110))
+        self.assertEqual((3, 110, 84, 1), actual.shape)
+        for frame, state in zip(batch, actual):
+            self.assertTrue(np.array_equal(env.observation(frame), state))
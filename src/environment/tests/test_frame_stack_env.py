@@ -0,0 +1,117 @@
+"""Unit tests for the FrameStackEnv wrapper and its ring of frames."""
+from collections import deque
+from unittest import TestCase
+import gym
+import numpy as np
+from ..wrappers.frame_stack_env import FrameRing, FrameStack, FrameStackEnv
+
+
+def frame(value: int, shape: tuple=(3, 4, 2)) -> np.ndarray:
+    """Return a frame of random pixels seeded by a value."""
+    return np.random.RandomState(value).randint(0, 256, shape).astype(np.uint8)
+
+
+class CountingEnv(gym.Env):
+    """An environment whose nth frame (since the first reset) is frame(n)."""
+
+    observation_space = gym.spaces.Box(low=0, high=255, shape=(3, 4, 2), dtype=np.uint8)
+    action_space = gym.spaces.Discrete(2)
+
+    def __init__(self) -> None:
+        self.frames = 0
+
+    def reset(self) -> np.ndarray:
+        self.frames += 1
+        return frame(self.frames)
+
+    def step(self, action: int) -> tuple:
+        self.frames += 1
+        return frame(self.frames), 0, False, {}
+
+
+class FrameRing_should_stack_the_last_k_frames_after_wrapping(TestCase):
+    def test(self):
+        ring = FrameRing((3, 4, 2), 4)
+        expected = deque([frame(0)] * 4, maxlen=4)
+        ring.push(frame(0), repeat=4)
+        # the ring wraps around (2k slots) a few times
+        for value in range(1, 20):
+            ring.push(frame(value))
+            expected.append(frame(value))
+            stack = ring.stack()
+            self.assertIsInstance(stack, FrameStack)
+            self.assertEqual((3, 4, 8), stack.shape)
+            self.assertTrue(np.array_equal(np.concatenate(expected, axis=-1), stack))
+
+
+class FrameRing_should_repeat_a_frame_with_one_id(TestCase):
+    def test(self):
+        ring = FrameRing((3, 4, 2), 3)
+        ring.push(frame(1))
+        ring.push(frame(2), repeat=3)
+        stack = ring.stack()
+        self.assertTrue(np.array_equal(np.concatenate([frame(2)] * 3, axis=-1), stack))
+        self.assertEqual(1, len(set(stack.frame_ids)))
+        ring.push(frame(3), repeat=2)
+        stack = ring.stack()
+        expected = np.concatenate([frame(2), frame(3), frame(3)], axis=-1)
+        self.assertTrue(np.array_equal(expected, stack))
+        self.assertEqual(stack.frame_ids[1], stack.frame_ids[2])
+        self.assertLess(stack.frame_ids[0], stack.frame_ids[1])
+
+
+class FrameRing_should_carry_frame_ids_through_stack(TestCase):
+    def test(self):
+        ring = FrameRing((3, 4, 2), 4)
+        ring.push(frame(0), repeat=4)
+        ids = deque(ring.stack().frame_ids, maxlen=4)
+        for value in range(1, 10):
+            ring.push(frame(value))
+            stack = ring.stack()
+            # each push has a new ID that is larger than the ones before
+            self.assertGreater(stack.frame_ids[-1], ids[-1])
+            ids.append(stack.frame_ids[-1])
+            self.assertEqual(list(ids), list(stack.frame_ids))
+        # the IDs belong to the stack, not the buffer of the ring
+        stack = ring.stack()
+        ring.push(frame(10))
+        self.assertEqual(list(ids), list(stack.frame_ids))
+        # arrays derived from a stack have no frame IDs
+        self.assertIsNone(stack[..., :2].frame_ids)
+
+
+class FrameRing_should_return_views_without_copy(TestCase):
+    def test(self):
+        ring = FrameRing((3, 4, 2), 2, copy=False)
+        ring.push(frame(0), repeat=2)
+        ring.push(frame(1))
+        stack = ring.stack()
+        self.assertTrue(np.shares_memory(ring._buffer, stack))
+        self.assertTrue(np.array_equal(np.concatenate([frame(0), frame(1)], axis=-1), stack))
+        # the view is only valid until the next push
+        ring.push(frame(2))
+        self.assertFalse(np.array_equal(np.concatenate([frame(0), frame(1)], axis=-1), stack))
+        # a copied stack isn't changed by the next push
+        ring = FrameRing((3, 4, 2), 2)
+        ring.push(frame(0), repeat=2)
+        stack = ring.stack()
+        self.assertFalse(np.shares_memory(ring._buffer, stack))
+        ring.push(frame(1))
+        self.assertTrue(np.array_equal(np.concatenate([frame(0), frame(0)], axis=-1), stack))
+
+
+class FrameStackEnv_should_stack_frames(TestCase):
+    def test(self):
+        env = FrameStackEnv(CountingEnv(), 3)
+        self.assertEqual((3, 4, 6), env.observation_space.shape)
+        # the initial stack repeats the first frame
+        stack = env.reset()
+        self.assertTrue(np.array_equal(np.concatenate([frame(1)] * 3, axis=-1), stack))
+        self.assertEqual(1, len(set(stack.frame_ids)))
+        stack, *_ = env.step(0)
+        stack, *_ = env.step(0)
+        expected = np.concatenate([frame(1), frame(2), frame(3)], axis=-1)
+        self.assertTrue(np.array_equal(expected, stack))
+        # a reset starts a new stack of the first frame of the episode
+        stack = env.reset()
+        self.assertTrue(np.array_equal(np.concatenate([frame(4)] * 3, axis=-1), stack))
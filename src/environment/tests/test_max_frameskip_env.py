@@ -0,0 +1,93 @@
+"""Unit tests for the MaxFrameskipEnv wrapper."""
+from unittest import TestCase
+import numpy as np
+from ..wrappers.max_frameskip_env import MaxFrameskipEnv
+from .stand_in_env import StandInAtariEnv, StandInNESEnv
+
+
+class ReadingAtariEnv(StandInAtariEnv):
+    """A stand-in Atari environment that counts the screens it reads."""
+
+    def __init__(self, fail_at: int=None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        # the step to raise an error at (None to never raise)
+        self.fail_at = fail_at
+        # the number of screens read from the emulator
+        self.reads = 0
+
+    def _get_obs(self) -> np.ndarray:
+        self.reads += 1
+        return super()._get_obs()
+
+    def step(self, action: int) -> tuple:
+        if self.steps + 1 == self.fail_at:
+            raise RuntimeError('the emulator failed')
+        return super().step(action)
+
+
+def play(skip_screens: bool, steps: int=60) -> tuple:
+    """
+    Play a seeded stand-in Atari game with a max frame skip environment.
+
+    Args:
+        skip_screens: whether the wrapper skips the unobserved screens
+        steps: the number of steps to play (the game resets on done)
+
+    Returns:
+        a tuple of:
+            - the list of observations (copies of the reused buffer)
+            - the list of rewards
+            - the list of dones
+            - the number of screens read from the emulator
+
+    """
+    env = ReadingAtariEnv(max_steps=50)
+    env.seed(7)
+    wrapper = MaxFrameskipEnv(env, skip=4, skip_screens=skip_screens)
+    observations = [wrapper.reset().copy()]
+    rewards, dones = [], []
+    actions = np.random.RandomState(3).randint(0, 4, steps)
+    for action in actions:
+        observation, reward, done, _ = wrapper.step(action)
+        observations.append(observation.copy())
+        rewards.append(reward)
+        dones.append(done)
+        if done:
+            observations.append(wrapper.reset().copy())
+    return observations, rewards, dones, env.reads
+
+
+class MaxFrameskipEnv__init__(TestCase):
+    def test(self):
+        self.assertTrue(MaxFrameskipEnv(StandInAtariEnv()).skip_screens)
+        self.assertFalse(MaxFrameskipEnv(StandInAtariEnv(), skip_screens=False).skip_screens)
+        # only ALE environments can skip the screens
+        self.assertFalse(MaxFrameskipEnv(StandInNESEnv()).skip_screens)
+
+
+class MaxFrameskipEnv_should_skip_screens_without_changing_steps(TestCase):
+    def test(self):
+        observations, rewards, dones, reads = play(skip_screens=True)
+        expected_observations, expected_rewards, expected_dones, expected_reads = play(skip_screens=False)
+        self.assertTrue(any(dones))
+        self.assertEqual(len(expected_observations), len(observations))
+        for expected, actual in zip(expected_observations, observations):
+            self.assertTrue(np.array_equal(expected, actual))
+        self.assertEqual(expected_rewards, rewards)
+        self.assertEqual(expected_dones, dones)
+        # the screens of the first two frames of each step aren't read
+        self.assertLess(reads, expected_reads)
+
+
+class MaxFrameskipEnv_should_restore_get_obs_when_a_step_raises(TestCase):
+    def test(self):
+        env = ReadingAtariEnv(fail_at=2)
+        wrapper = MaxFrameskipEnv(env, skip=4)
+        wrapper.reset()
+        # the second frame of the step (with its screen skipped) raises
+        with self.assertRaises(RuntimeError):
+            wrapper.step(0)
+        self.assertNotIn('_get_obs', vars(env))
+        reads = env.reads
+        env._get_obs()
+        self.assertEqual(reads + 1, env.reads)
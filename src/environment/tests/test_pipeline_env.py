@@ -0,0 +1,85 @@
+"""Regression tests for the fused preprocessing pipelines."""
+from unittest import TestCase, mock
+import numpy as np
+from ..atari import build_atari_environment
+from ..wrappers import AtariPipelineEnv, NESPipelineEnv
+from .stand_in_env import StandInAtariEnv, StandInNESEnv
+
+
+def play(env, actions: np.ndarray, seed: int=1) -> list:
+    """Play a list of actions and return the observations and rewards."""
+    env.seed(seed)
+    results = [(np.array(env.reset()), 0, False)]
+    for action in actions:
+        obs, reward, done, _ = env.step(action)
+        results.append((np.array(obs), reward, done))
+        if done:
+            results.append((np.array(env.reset()), 0, False))
+    return results
+
+
+class PipelineEnv_should_match_wrappers(TestCase):
+    def assert_same(self, env, fused, steps: int=2000):
+        """Assert that a fused pipeline matches a stack of wrappers."""
+        np.random.seed(1)
+        actions = np.random.randint(0, env.action_space.n, steps)
+        self.assertEqual(env.observation_space.shape, fused.observation_space.shape)
+        expected = play(env, actions)
+        actual = play(fused, actions)
+        self.assertEqual(len(expected), len(actual))
+        for (exp_obs, exp_r, exp_d), (obs, r, d) in zip(expected, actual):
+            self.assertTrue(np.array_equal(exp_obs, obs))
+            self.assertEqual(exp_r, r)
+            self.assertEqual(exp_d, d)
+        self.assertEqual(env.unwrapped.episode_rewards, fused.unwrapped.episode_rewards)
+
+
+class AtariPipelineEnv_should_match_wrappers(PipelineEnv_should_match_wrappers):
+    def test(self):
+        # Pong doesn't fire on reset, Breakout does (and has lives)
+        for game in ['Pong', 'Breakout']:
+            env = build_atari_environment(game)
+            fused = build_atari_environment(game, fused=True)
+            self.assert_same(env, fused)
+
+
+class NESPipelineEnv_should_match_wrappers(PipelineEnv_should_match_wrappers):
+    def test(self):
+        import gym_super_mario_bros
+        from gym_super_mario_bros.actions import SIMPLE_MOVEMENT
+        from nes_py.wrappers import BinarySpaceToDiscreteSpaceEnv, wrap
+        env = gym_super_mario_bros.make('SuperMarioBros-v0')
+        env = wrap(BinarySpaceToDiscreteSpaceEnv(env, SIMPLE_MOVEMENT))
+        fused = gym_super_mario_bros.make('SuperMarioBros-v0')
+        fused = NESPipelineEnv(BinarySpaceToDiscreteSpaceEnv(fused, SIMPLE_MOVEMENT))
+        self.assert_same(env, fused, steps=500)
+
+
+def make_stand_in(env_id: str) -> StandInAtariEnv:
+    """Make a stand-in for an Atari game (instead of `gym.make`)."""
+    return StandInAtariEnv(fire='Breakout' in env_id)
+
+
+class AtariPipelineEnv_should_match_wrappers_of_stand_in(PipelineEnv_should_match_wrappers):
+    def test(self):
+        with mock.patch('gym.make', make_stand_in):
+            for game in ['Pong', 'Breakout']:
+                env = build_atari_environment(game)
+                fused = build_atari_environment(game, fused=True)
+                self.assertIsInstance(fused.unwrapped, StandInAtariEnv)
+                self.assert_same(env, fused)
+
+
+class NESPipelineEnv_should_match_wrappers_of_stand_in(PipelineEnv_should_match_wrappers):
+    def test(self):
+        from nes_py.wrappers import wrap
+        env = wrap(StandInNESEnv())
+        fused = NESPipelineEnv(StandInNESEnv())
+        self.assert_same(env, fused)
+
+
+class PipelineEnv_reset_should_forward_kwargs(TestCase):
+    def test(self):
+        for fused in [AtariPipelineEnv(StandInAtariEnv(fire=True)), NESPipelineEnv(StandInNESEnv())]:
+            fused.reset(level=2)
+            self.assertEqual({'level': 2}, fused.unwrapped.reset_kwargs)
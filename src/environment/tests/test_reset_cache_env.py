@@ -0,0 +1,129 @@
+"""Unit tests for the ResetCacheEnv wrapper."""
+from unittest import TestCase
+import gym
+from gym.wrappers import TimeLimit
+import numpy as np
+from ..wrappers.reset_cache_env import ResetCacheEnv
+
+
+class Ale(object):
+    """A stand-in for the emulator of an ALE environment."""
+
+    def __init__(self) -> None:
+        self.state = 0
+
+    def cloneState(self) -> int:
+        return self.state
+
+    def restoreState(self, state: int) -> None:
+        self.state = state
+
+
+class AleEnv(gym.Env):
+    """An environment with the snapshots of an ALE environment."""
+
+    observation_space = gym.spaces.Box(low=0, high=255, shape=(1,), dtype=np.uint8)
+    action_space = gym.spaces.Discrete(2)
+
+    def __init__(self) -> None:
+        self.ale = Ale()
+        self.np_random = np.random.RandomState(1)
+        # the number of real resets
+        self.resets = 0
+
+    def _observation(self) -> np.ndarray:
+        return np.array([self.ale.state % 256], dtype=np.uint8)
+
+    def reset(self) -> np.ndarray:
+        self.resets += 1
+        # each real reset starts at a new state of the emulator
+        self.ale.state = 10 * self.resets
+        return self._observation()
+
+    def step(self, action: int) -> tuple:
+        self.ale.state += 1
+        return self._observation(), 0, False, {}
+
+
+class CountingEnv(gym.Env):
+    """An environment without snapshots that counts its resets."""
+
+    observation_space = gym.spaces.Box(low=0, high=255, shape=(1,), dtype=np.uint8)
+    action_space = gym.spaces.Discrete(2)
+
+    def __init__(self) -> None:
+        self.resets = 0
+
+    def reset(self) -> np.ndarray:
+        self.resets += 1
+        return np.zeros(1, dtype=np.uint8)
+
+
+def build(size: int=4, refresh_every: int=None, max_episode_steps: int=5) -> ResetCacheEnv:
+    """Return a reset cache of an ALE environment with a time limit."""
+    env = TimeLimit(AleEnv(), max_episode_steps=max_episode_steps)
+    return ResetCacheEnv(env, size=size, refresh_every=refresh_every)
+
+
+class ResetCacheEnv_should_fill_the_pool_with_real_resets(TestCase):
+    def test(self):
+        env = build(size=4)
+        self.assertTrue(env.enabled)
+        observations = [int(env.reset()[0]) for _ in range(6)]
+        self.assertEqual(4, env.unwrapped.resets)
+        self.assertEqual([10, 20, 30, 40], observations[:4])
+        self.assertEqual([10, 20, 30, 40], [int(obs[0]) for _, obs in env.snapshots])
+        # the restored emulator matches the observation of its snapshot
+        for obs in observations[4:]:
+            self.assertIn(obs, [10, 20, 30, 40])
+        self.assertEqual(observations[-1], env.unwrapped.ale.state)
+
+
+class ResetCacheEnv_should_restore_snapshots_uniformly(TestCase):
+    def test(self):
+        env = build(size=4)
+        for _ in range(4):
+            env.reset()
+        counts = {10: 0, 20: 0, 30: 0, 40: 0}
+        for _ in range(4000):
+            counts[int(env.reset()[0])] += 1
+        self.assertEqual(4, env.unwrapped.resets)
+        for count in counts.values():
+            self.assertGreater(count, 900)
+            self.assertLess(count, 1100)
+
+
+class ResetCacheEnv_should_refresh_the_oldest_snapshot(TestCase):
+    def test(self):
+        env = build(size=3, refresh_every=4)
+        # the first 3 resets fill the pool, the 4th and 8th are real resets
+        for _ in range(8):
+            env.reset()
+        self.assertEqual(5, env.unwrapped.resets)
+        self.assertEqual([40, 50, 30], [int(obs[0]) for _, obs in env.snapshots])
+        for _ in range(8):
+            env.reset()
+        self.assertEqual(7, env.unwrapped.resets)
+        # the replacements wrap around to the first snapshot
+        self.assertEqual([70, 50, 60], [int(obs[0]) for _, obs in env.snapshots])
+
+
+class ResetCacheEnv_should_restart_the_time_limit(TestCase):
+    def test(self):
+        env = build(size=2, max_episode_steps=5)
+        for episode in range(10):
+            env.reset()
+            dones = [env.step(0)[2] for _ in range(5)]
+            # every episode lasts the steps of the limit, restored or not
+            self.assertEqual([False] * 4 + [True], dones)
+        self.assertEqual(2, env.unwrapped.resets)
+
+
+class ResetCacheEnv_should_always_reset_environments_without_snapshots(TestCase):
+    def test(self):
+        env = ResetCacheEnv(CountingEnv(), size=2)
+        self.assertFalse(env.enabled)
+        for _ in range(5):
+            env.reset()
+        self.assertEqual(5, env.unwrapped.resets)
+        self.assertEqual([], env.snapshots)
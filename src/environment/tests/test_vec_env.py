@@ -0,0 +1,76 @@
+"""Unit tests for the VecEnv class."""
+from types import SimpleNamespace
+from unittest import TestCase
+import numpy as np
+from ..vec_env import VecEnv
+
+
+class CountingEnv(object):
+    """A picklable environment whose observations count its steps."""
+
+    observation_space = SimpleNamespace(shape=(2, 3, 1))
+    action_space = SimpleNamespace(n=4)
+
+    def __init__(self, length: int=3) -> None:
+        self.length = length
+        self.offset = 0
+        self.steps = 0
+        self.episodes = 0
+        self.unwrapped = self
+
+    def seed(self, seed: int) -> None:
+        self.offset = 100 * seed
+
+    def _observation(self) -> np.ndarray:
+        value = self.offset + 10 * self.episodes + self.steps
+        return np.full(self.observation_space.shape, value % 256, dtype=np.uint8)
+
+    def reset(self) -> np.ndarray:
+        self.steps = 0
+        return self._observation()
+
+    def step(self, action: int) -> tuple:
+        self.steps += 1
+        done = self.steps == self.length
+        observation = self._observation()
+        if done:
+            self.episodes += 1
+        return observation, action, done, {'steps': self.steps}
+
+    def close(self) -> None:
+        pass
+
+
+class VecEnv__init__(TestCase):
+    def test(self):
+        self.assertRaises(TypeError, VecEnv, CountingEnv, 1.5)
+        self.assertRaises(ValueError, VecEnv, CountingEnv, 0)
+
+
+class VecEnv_should_step_environments_in_workers(TestCase):
+    def test(self):
+        vec_env = VecEnv(CountingEnv, 2, seed=1)
+        try:
+            self.assertEqual((2, 3, 1), vec_env.observation_space.shape)
+            self.assertEqual(4, vec_env.action_space.n)
+            states = vec_env.reset()
+            self.assertEqual((2, 2, 3, 1), states.shape)
+            self.assertEqual([100, 200], list(states[:, 0, 0, 0]))
+            states, rewards, dones, infos = vec_env.step(np.array([1, 2]))
+            self.assertEqual([101, 201], list(states[:, 0, 0, 0]))
+            self.assertEqual([1, 2], list(rewards))
+            self.assertEqual([False, False], list(dones))
+            self.assertEqual([{'steps': 1}, {'steps': 1}], infos)
+            vec_env.step(np.array([0, 0]))
+            # the last step of an episode restarts the environment, the
+            # last observation of the episode is a terminal observation
+            states, _, dones, _ = vec_env.step(np.array([3, 3]))
+            self.assertEqual([True, True], list(dones))
+            self.assertEqual([110, 210], list(states[:, 0, 0, 0]))
+            self.assertEqual([103, 203], list(vec_env.terminal_observations[:, 0, 0, 0]))
+            self.assertEqual([1, 1], vec_env.get_attr('episodes'))
+        finally:
+            vec_env.close()
+        self.assertTrue(vec_env.closed)
+        # closing twice does nothing
+        vec_env.close()
@@ -0,0 +1,237 @@
+"""A vector of environments that step in parallel in worker processes."""
+import multiprocessing
+from typing import Callable
+import numpy as np
+
+
+def _worker(remote, parent_remote,
+    env_fn: Callable,
+    index: int,
+    seed: int,
+    arrays: list,
+    shape: tuple,
+) -> None:
+    """
+    Run an environment in a worker process.
+
+    Args:
+        remote: the end of the pipe to receive commands on
+        parent_remote: the end of the pipe of the parent process
+        env_fn: a (picklable) function that builds the environment
+        index: the index of the environment in the vector
+        seed: the seed for the environment (None to leave it unseeded)
+        arrays: the shared arrays of the observations and the terminal
+            observations of the vector
+        shape: the shape of the observations of the vector
+
+    Returns:
+        None
+
+    """
+    parent_remote.close()
+    env = env_fn()
+    if seed is not None:
+        env.seed(seed + index)
+    # view the shared arrays of observations as NumPy arrays
+    observations, terminals = [
+        np.frombuffer(array, dtype=np.uint8).reshape(shape)
+        for array in arrays
+    ]
+    try:
+        while True:
+            command, data = remote.recv()
+            if command == 'step':
+                observation, reward, done, info = env.step(data)
+                if done:
+                    # keep the last observation of the episode for the
+                    # replay memory and start the next episode
+                    terminals[index] = observation
+                    observation = env.reset()
+                observations[index] = observation
+                remote.send((reward, done, info))
+            elif command == 'reset':
+                observations[index] = env.reset()
+                remote.send(None)
+            elif command == 'get_attr':
+                remote.send(getattr(env.unwrapped, data))
+            elif command == 'close':
+                break
+            else:
+                raise ValueError('invalid command: {}'.format(repr(command)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        env.close()
+        remote.close()
+
+
+class VecEnv(object):
+    """A vector of environments that step in parallel in worker processes."""
+
+    def __init__(self,
+        env_fn: Callable,
+        num_envs: int,
+        seed: int=None,
+        start_method: str='spawn',
+    ) -> None:
+        """
+        Initialize a new vector of environments.
+
+        Notes:
+            Workers write observations to an array in shared memory, i.e.,
+            only the actions, rewards, and flags pass through pipes. Each
+            worker resets its environment when an episode ends, the last
+            observation of the episode is in `terminal_observations`. The
+            arrays of observations are overwritten by the next step, copy
+            them to keep them. The vector builds (and closes) an environment
+            of its own to read the spaces of the environments before it
+            makes the shared arrays that the workers start with.
+
+        Args:
+            env_fn: a picklable function that builds an environment, e.g.,
+                `functools.partial(setup_env, env_id)`
+            num_envs: the number of environments (worker processes)
+            seed: a seed for the environments, the environment at index i is
+                seeded with `seed + i`. If None, environments are unseeded
+            start_method: the method of starting worker processes as either
+                'spawn', 'forkserver', or 'fork'
+
+        Returns:
+            None
+
+        """
+        # type check the num_envs parameter
+        if not isinstance(num_envs, int):
+            raise TypeError('`num_envs` must be of type int')
+        # ensure the num_envs is within a legal range of values
+        if num_envs <= 0:
+            raise ValueError('`num_envs` must be > 0')
+        self.num_envs = num_envs
+        self.seed = seed
+        # every environment in the vector has the spaces of a (temporary)
+        # environment of the function
+        env = env_fn()
+        self.observation_space, self.action_space = env.observation_space, env.action_space
+        env.close()
+        # make the arrays of observations in shared memory, the workers
+        # inherit them when they start
+        context = multiprocessing.get_context(start_method)
+        shape = (num_envs, *self.observation_space.shape)
+        self._arrays = [context.RawArray('B', int(np.prod(shape))) for _ in range(2)]
+        self.observations, self.terminal_observations = [
+            np.frombuffer(array, dtype=np.uint8).reshape(shape)
+            for array in self._arrays
+        ]
+        pipes = [context.Pipe() for _ in range(num_envs)]
+        self.remotes = [remote for remote, _ in pipes]
+        self.processes = []
+        for index, (remote, work_remote) in enumerate(pipes):
+            args = (work_remote, remote, env_fn, index, seed, self._arrays, shape)
+            process = context.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            work_remote.close()
+            self.processes.append(process)
+        self.closed = False
+
+    def __repr__(self) -> str:
+        """Return a debugging string of this vector of environments."""
+        return '{}(num_envs={}, seed={})'.format(
+            self.__class__.__name__,
+            self.num_envs,
+            self.seed,
+        )
+
+    def reset(self) -> np.ndarray:
+        """
+        Reset every environment in the vector.
+
+        Returns:
+            the array of the initial observation of each environment
+
+        """
+        for remote in self.remotes:
+            remote.send(('reset', None))
+        for remote in self.remotes:
+            remote.recv()
+
+        return self.observations
+
+    def step_async(self, actions: np.ndarray) -> None:
+        """
+        Start a step of every environment in the vector.
+
+        Args:
+            actions: the action for each environment
+
+        Returns:
+            None
+
+        """
+        for remote, action in zip(self.remotes, actions):
+            remote.send(('step', int(action)))
+
+    def step_wait(self) -> tuple:
+        """
+        Wait for the step started by `step_async` to finish.
+
+        Returns:
+            a tuple of:
+                - the array of the next observation of each environment
+                - the reward of each environment
+                - the done flag of each environment
+                - the info dictionary of each environment
+
+        """
+        results = [remote.recv() for remote in self.remotes]
+        rewards, dones, infos = zip(*results)
+        rewards = np.array(rewards, dtype=np.float32)
+        dones = np.array(dones, dtype=np.bool_)
+
+        return self.observations, rewards, dones, list(infos)
+
+    def step(self, actions: np.ndarray) -> tuple:
+        """
+        Step every environment in the vector.
+
+        Args:
+            actions: the action for each environment
+
+        Returns:
+            a tuple of:
+                - the array of the next observation of each environment
+                - the reward of each environment
+                - the done flag of each environment
+                - the info dictionary of each environment
+
+        """
+        self.step_async(actions)
+        return self.step_wait()
+
+    def get_attr(self, name: str) -> list:
+        """
+        Return an attribute of each unwrapped environment.
+
+        Args:
+            name: the name of the attribute to return
+
+        Returns:
+            a list with the attribute of each environment
+
+        """
+        for remote in self.remotes:
+            remote.send(('get_attr', name))
+        return [remote.recv() for remote in self.remotes]
+
+    def close(self) -> None:
+        """Close the environments and stop the worker processes."""
+        if self.closed:
+            return
+        for remote in self.remotes:
+            remote.send(('close', None))
+        for process in self.processes:
+            process.join()
+        self.closed = True
+
+
+# explicitly define the outward facing API of this module
+__all__ = [VecEnv.__name__]
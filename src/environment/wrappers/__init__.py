@@ -15,17 +15,22 @@ from .frame_stack_env import FrameStackEnv
 from .max_frameskip_env import MaxFrameskipEnv
 from .noop_reset_env import NoopResetEnv
 from .penalize_death_env import PenalizeDeathEnv
+from .pipeline_env import AtariPipelineEnv, NESPipelineEnv
+from .reset_cache_env import ResetCacheEnv
 from .reward_cache_env import RewardCacheEnv
 
 
 # explicitly specify the outward facing API of this package
 __all__ = [
+    AtariPipelineEnv.__name__,
     ClipRewardEnv.__name__,
     DownsampleEnv.__name__,
     FireResetEnv.__name__,
     FrameStackEnv.__name__,
     MaxFrameskipEnv.__name__,
+    NESPipelineEnv.__name__,
     NoopResetEnv.__name__,
     PenalizeDeathEnv.__name__,
+    ResetCacheEnv.__name__,
     RewardCacheEnv.__name__,
 ]
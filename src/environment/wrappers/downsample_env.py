@@ -4,6 +4,43 @@ import cv2
 import numpy as np
 
 
+def downsample(frames: np.ndarray,
+    image_size: tuple,
+    out: np.ndarray=None,
+) -> np.ndarray:
+    """
+    Down-sample a batch of RGB frames to smaller B&W frames.
+
+    Notes:
+        the RGB to gray conversion of the whole batch is a single call, i.e.,
+        the cost of a batch of N frames is one conversion and N resizes that
+        write straight into `out`. It matches DownsampleEnv frame by frame,
+        which converts its single frames directly (a batch of one only adds
+        overhead)
+
+    Args:
+        frames: the batch of RGB frames with shape (N, height, width, 3)
+        image_size: the (width, height) to resize frames to
+        out: an optional C-contiguous array with shape
+            (N, height, width, 1) to write the frames to. If None, a new
+            array is made
+
+    Returns:
+        the batch of down-sampled frames with shape (N, height, width, 1)
+
+    """
+    count, height, width, _ = frames.shape
+    if out is None:
+        out = np.empty((count, image_size[1], image_size[0], 1), dtype=np.uint8)
+    # stack the frames vertically into a single image to convert at once
+    image = np.ascontiguousarray(frames).reshape(count * height, width, 3)
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY).reshape(count, height, width)
+    for index in range(count):
+        cv2.resize(gray[index], image_size, dst=out[index, :, :, 0])
+
+    return out
+
+
 class DownsampleEnv(gym.ObservationWrapper):
     """An environment that down-samples frames."""
 
@@ -36,4 +73,4 @@ class DownsampleEnv(gym.ObservationWrapper):
 
 
 # explicitly define the outward facing API of this module
-__all__ = [DownsampleEnv.__name__]
+__all__ = [DownsampleEnv.__name__, downsample.__name__]
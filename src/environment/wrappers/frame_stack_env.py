@@ -1,78 +1,130 @@
 """An environment wrapper to stack observations into a tensor."""
-from collections import deque
+import itertools
 import numpy as np
 import gym
 
 
+# the IDs of frames stacked by any FrameStackEnv in this process
+_FRAME_IDS = itertools.count()
+
+
+class FrameStack(np.ndarray):
+    """A stack of frames that knows the ID of each of its frames."""
+
+    def __array_finalize__(self, obj) -> None:
+        # arrays derived from a stack (e.g. slices) don't have frame IDs
+        self.frame_ids = None
+
+
+class FrameRing(object):
+    """A ring buffer of the last k frames."""
+
+    def __init__(self, shape: tuple, k: int, copy: bool=True) -> None:
+        """
+        Create a new ring buffer of frames.
+
+        Notes:
+            The ring has room for 2k frames. Each frame is written twice, k
+            frames apart, so the last k frames are always a contiguous slice
+            of the buffer in the order of the models, i.e., a stack is a
+            view of the buffer
+
+        Args:
+            shape: the shape of a single frame, i.e. (height, width, channels)
+            k: the number of frames to stack
+            copy: whether to copy each stack out of the buffer. If False,
+                each stack is a view of the buffer that is only valid until
+                the next push
+
+        Returns:
+            None
+
+        """
+        height, width, channels = shape
+        self.k = k
+        self.copy = copy
+        self._channels = channels
+        self._buffer = np.zeros((height, width, 2 * k * channels), dtype=np.uint8)
+        self._ids = np.zeros(2 * k, dtype=np.int64)
+        # the index of the newest frame in the ring
+        self._index = k - 1
+
+    def push(self, frame: np.ndarray, repeat: int=1) -> None:
+        """
+        Push a frame onto the ring buffer.
+
+        Args:
+            frame: the frame to push
+            repeat: the number of times to push the frame (with one ID)
+
+        Returns:
+            None
+
+        """
+        frame_id = next(_FRAME_IDS)
+        for _ in range(repeat):
+            self._index = (self._index + 1) % self.k
+            for index in [self._index, self._index + self.k]:
+                start = index * self._channels
+                self._buffer[..., start:start + self._channels] = frame
+                self._ids[index] = frame_id
+
+    def stack(self) -> FrameStack:
+        """Return the stack of the last k frames."""
+        start = self._index + 1
+        stack = self._buffer[..., start * self._channels:(start + self.k) * self._channels]
+        if self.copy:
+            stack = np.array(stack)
+        stack = stack.view(FrameStack)
+        stack.frame_ids = self._ids[start:start + self.k].copy()
+        return stack
+
+
 class FrameStackEnv(gym.Wrapper):
     """An environment wrapper to stack observations into a tensor."""
 
-    def __init__(self, env, k):
-        """Stack k last frames.
-        Returns lazy array, which is much more memory efficient.
-        See Also
-        --------
-        baselines.common.atari_wrappers.LazyFrames
+    def __init__(self, env: gym.Env, k: int, copy: bool=True) -> None:
+        """
+        Create a new frame stacker with the k last frames.
+
+        Notes:
+            The frames are in a FrameRing, i.e., a step copies a single frame
+            into the ring and (optionally) copies the stack out. Each stack
+            has the `frame_ids` of its frames, frame replay queues compare
+            the IDs of stacks instead of their pixels.
+
+        Args:
+            env: the environment to stack the frames of
+            k: the number of frames to stack
+            copy: whether to copy each stack out of the buffer (one copy per
+                step). If False, each stack is a view of the buffer that is
+                only valid until the next step
+
+        Returns:
+            None
+
         """
         gym.Wrapper.__init__(self, env)
         self.k = k
-        self.frames = deque([], maxlen=k)
-        shp = env.observation_space.shape
+        height, width, channels = env.observation_space.shape
         self.observation_space = gym.spaces.Box(
             low=0,
             high=255,
-            shape=(shp[0], shp[1], shp[2] * k),
+            shape=(height, width, channels * k),
             dtype=np.uint8
         )
+        self.ring = FrameRing(env.observation_space.shape, k, copy=copy)
 
-    def reset(self):
-        ob = self.env.reset()
-        for _ in range(self.k):
-            self.frames.append(ob)
-        return self._get_ob()
+    def reset(self, **kwargs):
+        # the initial stack repeats the first frame
+        self.ring.push(self.env.reset(**kwargs), repeat=self.k)
+        return self.ring.stack()
 
     def step(self, action):
         ob, reward, done, info = self.env.step(action)
-        self.frames.append(ob)
-        return self._get_ob(), reward, done, info
-
-    def _get_ob(self):
-        assert len(self.frames) == self.k
-        return LazyFrames(list(self.frames))
-
-
-class LazyFrames(object):
-    """A memory efficient buffer for frame tensors."""
-
-    def __init__(self, frames):
-        """
-        This object ensures that common frames between the observations are
-        only stored once. It exists purely to optimize memory usage which can
-        be huge for DQN's 1M frames replay buffers. This object should only be
-        converted to numpy array before being passed to the model. You'd not
-        believe how complex the previous solution was.
-        """
-        self._frames = frames
-        self._out = None
-
-    def _force(self):
-        if self._out is None:
-            self._out = np.concatenate(self._frames, axis=2)
-            self._frames = None
-        return self._out
-
-    def __array__(self, dtype=None):
-        out = self._force()
-        if dtype is not None:
-            out = out.astype(dtype)
-        return out
-
-    def __len__(self):
-        return len(self._force())
-
-    def __getitem__(self, i):
-        return self._force()[i]
+        self.ring.push(ob)
+        return self.ring.stack(), reward, done, info
 
 
 # explicitly define the outward facing API of this module
-__all__ = [FrameStackEnv.__name__]
+__all__ = [FrameStackEnv.__name__, FrameRing.__name__, FrameStack.__name__]
@@ -3,16 +3,28 @@ import gym
 import numpy as np
 
 
+def _no_screen() -> None:
+    """Return no observation instead of the screen of an ALE environment."""
+    return None
+
+
 class MaxFrameskipEnv(gym.Wrapper):
     """An environment to skip k frames and return a max between the last two."""
 
-    def __init__(self, env, skip: int=4) -> None:
+    def __init__(self, env, skip: int=4, skip_screens: bool=True) -> None:
         """
         Initialize a new max frame skip env around an existing environment.
 
+        Notes:
+            The observation of a step is a buffer that is reused by the next
+            step, wrappers that keep observations should copy them
+
         Args:
             env: the environment to wrap around
             skip: the number of frames to skip (i.e. hold an action for)
+            skip_screens: whether to skip reading the screens of the first
+                `skip - 2` frames from the emulator. Only ALE environments
+                support this, it has no effect on other environments
 
         Returns:
             None
@@ -21,7 +33,14 @@ class MaxFrameskipEnv(gym.Wrapper):
         gym.Wrapper.__init__(self, env)
         # most recent raw observations (for max pooling across time steps)
         self._obs_buffer = np.zeros((2, *env.observation_space.shape), dtype=np.uint8)
+        # the reusable buffer of the max over the last observations
+        self._max_frame = np.zeros(env.observation_space.shape, dtype=np.uint8)
         self._skip = skip
+        # the gym ALE environment reads (and copies) the screen on every step
+        # in `_get_obs`, which an attribute of the instance can shadow
+        unwrapped = env.unwrapped
+        self.skip_screens = skip_screens and hasattr(unwrapped, 'ale') and \
+            callable(getattr(unwrapped, '_get_obs', None))
 
     def step(self, action):
         """Repeat action, sum reward, and max over last observations."""
@@ -30,7 +49,16 @@ class MaxFrameskipEnv(gym.Wrapper):
         done = None
         # perform the action `skip` times
         for i in range(self._skip):
-            obs, reward, done, info = self.env.step(action)
+            # only the last two frames are observed, skip the screens of the
+            # frames before them
+            skip_screen = self.skip_screens and i < self._skip - 2
+            if skip_screen:
+                self.env.unwrapped._get_obs = _no_screen
+            try:
+                obs, reward, done, info = self.env.step(action)
+            finally:
+                if skip_screen:
+                    del self.env.unwrapped._get_obs
             total_reward += reward
             # assign the buffer with the last two frames
             if i == self._skip - 2:
@@ -42,9 +70,9 @@ class MaxFrameskipEnv(gym.Wrapper):
                 break
         # Note that the observation on the done=True frame doesn't matter
         # (because the next state isn't evaluated when done is true)
-        max_frame = self._obs_buffer.max(axis=0)
+        np.maximum(self._obs_buffer[0], self._obs_buffer[1], out=self._max_frame)
 
-        return max_frame, total_reward, done, info
+        return self._max_frame, total_reward, done, info
 
     def reset(self, **kwargs):
         return self.env.reset(**kwargs)
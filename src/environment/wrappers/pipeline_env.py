@@ -0,0 +1,231 @@
+"""Fused environment wrappers that preprocess frames in a single layer."""
+import gym
+import cv2
+import numpy as np
+from .frame_stack_env import FrameRing
+from .max_frameskip_env import _no_screen
+
+
+class _PipelineEnv(gym.Wrapper):
+    """The preprocessing steps shared by the fused pipelines."""
+
+    def __init__(self,
+        env: gym.Env,
+        image_size: tuple,
+        clip_rewards: bool,
+        agent_history_length: int,
+    ) -> None:
+        """
+        Initialize a new fused pipeline.
+
+        Args:
+            env: the environment to wrap
+            image_size: the size to down-sample images to
+            clip_rewards: whether to clip rewards in {-1, 0, +1}
+            agent_history_length: the size of the frame buffer for the agent
+
+        Returns:
+            None
+
+        """
+        gym.Wrapper.__init__(self, env)
+        self.image_size = image_size
+        self.clip_rewards = clip_rewards
+        self.agent_history_length = agent_history_length
+        # the raw score of the current episode (like RewardCacheEnv)
+        self._score = 0
+        self.env.unwrapped.episode_rewards = []
+        shape = (image_size[1], image_size[0], 1)
+        if agent_history_length is None:
+            self.ring = None
+        else:
+            self.ring = FrameRing(shape, agent_history_length)
+            shape = (image_size[1], image_size[0], agent_history_length)
+        self.observation_space = gym.spaces.Box(low=0, high=255, shape=shape, dtype=np.uint8)
+
+    def _raw_step(self, action: int) -> tuple:
+        """Step the environment and cache the reward of the episode."""
+        obs, reward, done, info = self.env.step(action)
+        self._score += reward
+        if done:
+            self.env.unwrapped.episode_rewards.append(self._score)
+            self._score = 0
+        return obs, reward, done, info
+
+    def _observation(self, frame: np.ndarray, repeat: int=1):
+        """Down-sample a frame and return the observation of the agent."""
+        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        frame = cv2.resize(frame, self.image_size)
+        if self.ring is None:
+            return frame[:, :, np.newaxis]
+        self.ring.push(frame[:, :, np.newaxis], repeat=repeat)
+        return self.ring.stack()
+
+    def _reward(self, reward: float) -> float:
+        """Return the reward of the agent."""
+        if self.clip_rewards:
+            return np.sign(reward)
+        return reward
+
+
+class AtariPipelineEnv(_PipelineEnv):
+    """The Atari preprocessing of `build_atari_environment` in one wrapper."""
+
+    def __init__(self,
+        env: gym.Env,
+        image_size: tuple=(84, 84),
+        noop_max: int=30,
+        skip_frames: int=4,
+        death_penalty: int=-1,
+        clip_rewards: bool=True,
+        agent_history_length: int=4,
+    ) -> None:
+        """
+        Initialize a new fused Atari pipeline.
+
+        Notes:
+            Each step and reset does the work of the wrappers RewardCacheEnv,
+            NoopResetEnv, MaxFrameskipEnv, FireResetEnv, DownsampleEnv,
+            PenalizeDeathEnv, ClipRewardEnv, and FrameStackEnv in a single
+            call with preallocated buffers. The observations and rewards are
+            identical to the wrappers.
+
+        Args:
+            env: the (unwrapped) Atari environment to preprocess
+            image_size: the size to down-sample images to
+            noop_max: the max number of random no-ops at the beginning of a game
+            skip_frames: the number of frames to hold each action for
+            death_penalty: the penalty for losing a life in a game
+            clip_rewards: whether to clip rewards in {-1, 0, +1}
+            agent_history_length: the size of the frame buffer for the agent
+
+        Returns:
+            None
+
+        """
+        _PipelineEnv.__init__(self, env, image_size, clip_rewards, agent_history_length)
+        self.noop_max = noop_max
+        self.skip_frames = skip_frames
+        self.death_penalty = death_penalty
+        meanings = env.unwrapped.get_action_meanings()
+        if noop_max is not None:
+            assert meanings[0] == 'NOOP'
+        self.fire_reset = 'FIRE' in meanings
+        # the last two raw frames of a skip and the max between them
+        shape = env.observation_space.shape
+        self._obs_buffer = np.zeros((2, *shape), dtype=np.uint8)
+        self._max_frame = np.zeros(shape, dtype=np.uint8)
+        # ALE environments can skip the screens of unobserved frames
+        self._skip_screens = hasattr(env.unwrapped, 'ale') and \
+            callable(getattr(env.unwrapped, '_get_obs', None))
+        self.lives = 0
+
+    def _skip_step(self, action: int) -> tuple:
+        """Hold an action for the skipped frames and max the last two."""
+        if self.skip_frames is None:
+            return self._raw_step(action)
+        unwrapped = self.env.unwrapped
+        total_reward = 0.0
+        done = None
+        for i in range(self.skip_frames):
+            skip_screen = self._skip_screens and i < self.skip_frames - 2
+            if skip_screen:
+                unwrapped._get_obs = _no_screen
+            try:
+                obs, reward, done, info = self._raw_step(action)
+            finally:
+                if skip_screen:
+                    del unwrapped._get_obs
+            total_reward += reward
+            if i == self.skip_frames - 2:
+                self._obs_buffer[0] = obs
+            if i == self.skip_frames - 1:
+                self._obs_buffer[1] = obs
+            if done:
+                break
+        np.maximum(self._obs_buffer[0], self._obs_buffer[1], out=self._max_frame)
+
+        return self._max_frame, total_reward, done, info
+
+    def _noop_reset(self, **kwargs) -> np.ndarray:
+        """Reset the environment and take a random number of no-ops."""
+        obs = self.env.reset(**kwargs)
+        if self.noop_max is None:
+            return obs
+        noops = self.env.unwrapped.np_random.randint(1, self.noop_max + 1)
+        for _ in range(noops):
+            obs, _, done, _ = self._raw_step(0)
+            if done:
+                obs = self.env.reset(**kwargs)
+        return obs
+
+    def reset(self, **kwargs):
+        obs = self._noop_reset(**kwargs)
+        if self.fire_reset:
+            obs, _, done, _ = self._skip_step(1)
+            if done:
+                self._noop_reset(**kwargs)
+            obs, _, done, _ = self._skip_step(2)
+            if done:
+                self._noop_reset(**kwargs)
+        if self.death_penalty is not None:
+            self.lives = self.env.unwrapped.ale.lives()
+        return self._observation(obs, repeat=self.agent_history_length or 1)
+
+    def step(self, action):
+        obs, reward, done, info = self._skip_step(action)
+        obs = self._observation(obs)
+        if self.death_penalty is not None:
+            lives = self.env.unwrapped.ale.lives()
+            reward = self.death_penalty if lives < self.lives else reward
+            self.lives = lives
+        return obs, self._reward(reward), done, info
+
+
+class NESPipelineEnv(_PipelineEnv):
+    """The NES preprocessing of `nes_py.wrappers.wrap` in one wrapper."""
+
+    def __init__(self,
+        env: gym.Env,
+        image_size: tuple=(84, 84),
+        death_penalty: int=-15,
+        clip_rewards: bool=False,
+        agent_history_length: int=4,
+    ) -> None:
+        """
+        Initialize a new fused NES pipeline.
+
+        Notes:
+            Each step and reset does the work of the nes_py wrappers
+            RewardCacheEnv, DownsampleEnv, PenalizeDeathEnv, ClipRewardEnv,
+            and FrameStackEnv in a single call. The observations and rewards
+            are identical to the wrappers.
+
+        Args:
+            env: the NES environment to preprocess
+            image_size: the size to down-sample images to
+            death_penalty: the reward of the step that ends an episode
+            clip_rewards: whether to clip rewards in {-1, 0, +1}
+            agent_history_length: the size of the frame buffer for the agent
+
+        Returns:
+            None
+
+        """
+        _PipelineEnv.__init__(self, env, image_size, clip_rewards, agent_history_length)
+        self.death_penalty = death_penalty
+
+    def reset(self, **kwargs):
+        obs = self.env.reset(**kwargs)
+        return self._observation(obs, repeat=self.agent_history_length or 1)
+
+    def step(self, action):
+        obs, reward, done, info = self._raw_step(action)
+        obs = self._observation(obs)
+        if self.death_penalty is not None and done:
+            reward = self.death_penalty
+        return obs, self._reward(reward), done, info
+
+
+# explicitly define the outward facing API of this module
+__all__ = [AtariPipelineEnv.__name__, NESPipelineEnv.__name__]
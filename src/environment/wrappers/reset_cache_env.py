@@ -0,0 +1,90 @@
+"""An environment wrapper to restore resets from a pool of emulator states."""
+import time
+import gym
+from gym.wrappers import TimeLimit
+import numpy as np
+
+
+class ResetCacheEnv(gym.Wrapper):
+    """An environment wrapper to restore resets from a pool of emulator states."""
+
+    def __init__(self, env, size: int=32, refresh_every: int=10) -> None:
+        """
+        Initialize a new reset caching environment.
+
+        Notes:
+            The wrapped environment resets with no-ops, fire, etc. The first
+            `size` resets are real resets that fill the pool with a snapshot
+            of the emulator (and the observation) after each reset. Later
+            resets restore a random snapshot, i.e., the starts are drawn from
+            the same distribution. Every `refresh_every` reset is a real reset
+            that replaces the oldest snapshot. Only ALE environments support
+            snapshots, other environments always reset. A restore restarts
+            the step count of the TimeLimit wrappers of the environment too
+
+        Args:
+            env: the environment to wrap
+            size: the number of snapshots in the pool
+            refresh_every: the number of resets between real resets once the
+                pool is full. If None, the pool is never refreshed
+
+        Returns:
+            None
+
+        """
+        gym.Wrapper.__init__(self, env)
+        self.size = size
+        self.refresh_every = refresh_every
+        # the (emulator state, observation) snapshots after real resets
+        self.snapshots = []
+        # the index of the oldest snapshot (the next to replace)
+        self._oldest = 0
+        self._resets = 0
+        self.enabled = hasattr(env.unwrapped, 'ale')
+        # the TimeLimit wrappers inside this wrapper (e.g. from `gym.make`)
+        self._time_limits = []
+        while isinstance(env, gym.Wrapper):
+            if isinstance(env, TimeLimit):
+                self._time_limits.append(env)
+            env = env.env
+
+    def step(self, action):
+        return self.env.step(action)
+
+    def _snapshot_reset(self, **kwargs):
+        """Reset the environment and snapshot the emulator after it."""
+        obs = self.env.reset(**kwargs)
+        snapshot = (self.env.unwrapped.ale.cloneState(), np.array(obs))
+        if len(self.snapshots) < self.size:
+            self.snapshots.append(snapshot)
+        else:
+            self.snapshots[self._oldest] = snapshot
+            self._oldest = (self._oldest + 1) % self.size
+        return obs
+
+    def _restart_time_limits(self) -> None:
+        """Restart the episode of each TimeLimit like a real reset."""
+        for time_limit in self._time_limits:
+            time_limit._elapsed_steps = 0
+            # gym < 0.11 limits the seconds of episodes too
+            if hasattr(time_limit, '_episode_started_at'):
+                time_limit._episode_started_at = time.time()
+
+    def reset(self, **kwargs):
+        if not self.enabled:
+            return self.env.reset(**kwargs)
+        self._resets += 1
+        # fill the pool, then refresh it with every few resets
+        refresh = self.refresh_every is not None and self._resets % self.refresh_every == 0
+        if len(self.snapshots) < self.size or refresh:
+            return self._snapshot_reset(**kwargs)
+        # restore a random snapshot from the pool
+        index = self.env.unwrapped.np_random.randint(len(self.snapshots))
+        state, obs = self.snapshots[index]
+        self.env.unwrapped.ale.restoreState(state)
+        self._restart_time_limits()
+        return np.array(obs)
+
+
+# explicitly specify the external API of this module
+__all__ = [ResetCacheEnv.__name__]
@@ -1,10 +1,24 @@
 """Deep learning models for value function estimation in deep RL."""
 from .deep_q_model import build_deep_q_model
 from .dueling_deep_q_model import build_dueling_deep_q_model
+from .numpy_weights import export_numpy_weights
+from .policy import build_policy_function
+from .quantization import compare_policies
+from .quantization import export_quantized_model
+from .quantization import QuantizedPolicy
+from .train_step import build_target_update_function
+from .train_step import build_train_function
 
 
 # explicitly define the outward facing API for this package
 __all__ = [
     build_deep_q_model.__name__,
     build_dueling_deep_q_model.__name__,
+    build_policy_function.__name__,
+    build_target_update_function.__name__,
+    build_train_function.__name__,
+    compare_policies.__name__,
+    export_numpy_weights.__name__,
+    export_quantized_model.__name__,
+    QuantizedPolicy.__name__,
 ]
@@ -0,0 +1,61 @@
+"""A method to export the weights of a Q network for the NumPy policy."""
+import numpy as np
+from keras.models import Model
+from keras.layers import Subtract
+from keras.layers.convolutional import Conv2D
+
+
+def _source(tensor):
+    """Return the layer that outputs a tensor."""
+    return tensor._keras_history[0]
+
+
+def export_numpy_weights(model: Model, path: str) -> None:
+    """
+    Export the weights of a Q network to a `.npz` file.
+
+    Notes:
+        The file holds the kernel and bias of each convolution
+        ('conv_<index>_kernel') with the strides ('conv_strides'), and of
+        the hidden and output dense layers of each head ('hidden_kernel',
+        'output_kernel' or 'value_hidden_kernel', 'advantage_output_kernel',
+        ...) with a 'dueling' flag. `src.base.NumPyPolicy` loads it
+
+    Args:
+        model: a Q network from `build_deep_q_model` or
+            `build_dueling_deep_q_model`
+        path: the path of the file to write
+
+    Returns:
+        None
+
+    """
+    convolutions = [layer for layer in model.layers if isinstance(layer, Conv2D)]
+    weights = {'conv_strides': np.array([layer.strides for layer in convolutions])}
+    for index, layer in enumerate(convolutions):
+        kernel, bias = layer.get_weights()
+        weights['conv_{}_kernel'.format(index)] = kernel
+        weights['conv_{}_bias'.format(index)] = bias
+    # the Q values are the first input of the output `Multiply` layer
+    Q = _source(model.layers[-1].input[0])
+    weights['dueling'] = np.array(any(isinstance(layer, Subtract) for layer in model.layers))
+    if weights['dueling']:
+        # Q = Add()([Subtract()([advantage, avg_advantage]), value])
+        heads = {
+            'value_': _source(Q.input[1]),
+            'advantage_': _source(_source(Q.input[0]).input[0]),
+        }
+    else:
+        heads = {'': Q}
+    for prefix, output in heads.items():
+        # the output layer follows the activation of the hidden layer
+        hidden = _source(_source(output.input).input)
+        for name, layer in [('hidden', hidden), ('output', output)]:
+            kernel, bias = layer.get_weights()
+            weights['{}{}_kernel'.format(prefix, name)] = kernel
+            weights['{}{}_bias'.format(prefix, name)] = bias
+    np.savez(path, **weights)
+
+
+# explicitly define the outward facing API of this module
+__all__ = [export_numpy_weights.__name__]
@@ -0,0 +1,50 @@
+"""A compiled function that selects greedy actions with a Q network."""
+from typing import Callable
+from keras import backend as K
+from keras.models import Model
+from keras.layers import Input
+from keras.layers import Lambda
+
+
+def _q_model(model: Model) -> Model:
+    """Return the model of the Q values of a network (without the mask)."""
+    # the Q values are the first input of the output `Multiply` layer
+    return Model(inputs=model.inputs[0], outputs=model.layers[-1].input[0])
+
+
+def build_policy_function(model: Model) -> Callable:
+    """
+    Build a function that returns the greedy actions of a Q network.
+
+    Notes:
+        The function feeds `uint8` frames to a copy of the graph of the
+        network (that shares its weights) without the mask input, i.e., it
+        skips the `Multiply` with an all-ones mask and the input checks,
+        batching, and callbacks of `model.predict`. It returns the argmax of
+        the Q values in the graph. The actions are identical to
+        `np.argmax(model.predict([frames, ones]), axis=1)`, and the weights
+        of the network can change between calls
+
+    Args:
+        model: a Q network from `build_deep_q_model` or
+            `build_dueling_deep_q_model`, i.e., a model with the inputs
+            [frames, mask] and the output `Multiply()([Q, mask])`
+
+    Returns:
+        a function of a batch of stacks of frames that returns the greedy
+        action of each stack
+
+    """
+    frames = Input(K.int_shape(model.inputs[0])[1:], dtype='uint8')
+    Q = _q_model(model)(Lambda(lambda x: K.cast(x, K.floatx()))(frames))
+    function = K.function([frames], [K.argmax(Q, axis=-1)])
+
+    def policy(states):
+        """Return the greedy action of each stack of frames in a batch."""
+        return function([states])[0]
+
+    return policy
+
+
+# explicitly define the outward facing API of this module
+__all__ = [build_policy_function.__name__]
@@ -0,0 +1,178 @@
+"""Reduced-precision copies of Q networks for fast greedy evaluation."""
+import numpy as np
+import tensorflow as tf
+from keras import backend as K
+from keras.models import Model
+from keras.layers import Input
+from keras.layers import Lambda
+from .policy import _q_model
+
+
+# the precisions that a network can be quantized to
+QUANTIZATIONS = ['int8', 'float16']
+
+
+def _tflite():
+    """Return the TensorFlow Lite module of the installed TensorFlow."""
+    if hasattr(tf, 'lite'):
+        return tf.lite
+    # TensorFlow 1.12 has TensorFlow Lite in contrib
+    return tf.contrib.lite
+
+
+def export_quantized_model(model: Model, path: str, quantization: str='int8') -> None:
+    """
+    Export a reduced-precision copy of a Q network to a TensorFlow Lite file.
+
+    Notes:
+        The copy takes a `uint8` batch of one stack of frames and returns its
+        Q values without the mask input of the network. QuantizedPolicy
+        resizes the input to the size of its batches.
+        - 'int8': the weights are stored as 8-bit integers with a scale for
+          each tensor, the kernels quantize activations on the fly (hybrid
+          kernels), i.e., 1/4 of the memory of the weights
+        - 'float16': the weights are stored as 16-bit floats, i.e., 1/2 of
+          the memory of the weights (requires TensorFlow >= 1.15)
+
+    Args:
+        model: a Q network from `build_deep_q_model` or
+            `build_dueling_deep_q_model`
+        path: the path of the file to write
+        quantization: the precision of the weights as either 'int8' or
+            'float16'
+
+    Returns:
+        None
+
+    """
+    if quantization not in QUANTIZATIONS:
+        raise ValueError('`quantization` must be in {}'.format(QUANTIZATIONS))
+    lite = _tflite()
+    # a graph for single stacks of frames that shares the weights
+    frames = Input(batch_shape=(1, *K.int_shape(model.inputs[0])[1:]), dtype='uint8')
+    Q = _q_model(model)(Lambda(lambda x: K.cast(x, K.floatx()))(frames))
+    converter = lite.TFLiteConverter.from_session(K.get_session(), [frames], [Q])
+    if hasattr(lite, 'Optimize'):
+        converter.optimizations = [lite.Optimize.DEFAULT]
+        if quantization == 'float16':
+            if not hasattr(converter.target_spec, 'supported_types'):
+                raise ValueError('float16 quantization requires TensorFlow >= 1.15')
+            constants = getattr(lite, 'constants', None)
+            converter.target_spec.supported_types = [
+                getattr(constants, 'FLOAT16', None) or tf.float16
+            ]
+    elif quantization == 'int8':
+        converter.post_training_quantize = True
+    else:
+        raise ValueError('float16 quantization requires TensorFlow >= 1.15')
+    with open(path, 'wb') as model_file:
+        model_file.write(converter.convert())
+
+
+class QuantizedPolicy(object):
+    """A policy that selects greedy actions with a quantized Q network."""
+
+    def __init__(self, path: str) -> None:
+        """
+        Load a quantized Q network from a TensorFlow Lite file.
+
+        Args:
+            path: the path of a file from `export_quantized_model`
+
+        Returns:
+            None
+
+        """
+        self.path = path
+        self.interpreter = _tflite().Interpreter(model_path=path)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]['index']
+        self._output = self.interpreter.get_output_details()[0]['index']
+        # the batch size that the tensors of the interpreter are allocated for
+        self._batch_size = 1
+
+    def __repr__(self) -> str:
+        """Return an executable string representation of self."""
+        return '{}(path={})'.format(self.__class__.__name__, repr(self.path))
+
+    def q_values(self, states: np.ndarray) -> np.ndarray:
+        """
+        Return the Q values of a batch of stacks of frames.
+
+        Notes:
+            The batch is a single invoke of the interpreter. The tensors are
+            reallocated when the size of the batch changes, i.e., a policy
+            should be called with batches of a fixed size
+
+        Args:
+            states: the batch of stacks of frames
+
+        Returns:
+            the Q values of each action for each stack
+
+        """
+        # the file has an input of a single stack, resize the input to the
+        # batch (and reallocate the tensors) when the batch size changes
+        if len(states) != self._batch_size:
+            shape = [len(states), *self.interpreter.get_input_details()[0]['shape'][1:]]
+            self.interpreter.resize_tensor_input(self._input, shape)
+            self.interpreter.allocate_tensors()
+            self._batch_size = len(states)
+        self.interpreter.set_tensor(self._input, np.ascontiguousarray(states))
+        self.interpreter.invoke()
+        # get_tensor returns a copy of the output tensor
+        return self.interpreter.get_tensor(self._output)
+
+    def __call__(self, states: np.ndarray) -> np.ndarray:
+        """
+        Return the greedy action of each stack of frames in a batch.
+
+        Args:
+            states: the batch of stacks of frames
+
+        Returns:
+            the action with the highest Q value for each stack
+
+        """
+        return np.argmax(self.q_values(states), axis=1)
+
+
+def compare_policies(model: Model, policy, states: np.ndarray) -> dict:
+    """
+    Compare the greedy actions of a quantized policy with its network.
+
+    Args:
+        model: the (float32) Q network
+        policy: the quantized policy of the network (a QuantizedPolicy)
+        states: the held-out stacks of frames to compare the actions of
+
+    Returns:
+        a dictionary with:
+            - states: the number of states compared
+            - changed: the number of states with a different action
+            - agreement: the fraction of states with the same action
+            - max_error: the max absolute error of a Q value
+
+    """
+    mask = np.ones((1, K.int_shape(model.output)[-1]), dtype=np.float32)
+    # predict one state at a time like `DeepQAgent.predict`
+    expected = np.concatenate([
+        model.predict_on_batch([state[np.newaxis], mask])
+        for state in states
+    ])
+    values = policy.q_values(states)
+    changed = int(np.sum(np.argmax(expected, axis=1) != np.argmax(values, axis=1)))
+    return {
+        'states': len(states),
+        'changed': changed,
+        'agreement': 1 - changed / max(1, len(states)),
+        'max_error': float(np.max(np.abs(expected - values))),
+    }
+
+
+# explicitly define the outward facing API of this module
+__all__ = [
+    compare_policies.__name__,
+    export_quantized_model.__name__,
+    QuantizedPolicy.__name__,
+]
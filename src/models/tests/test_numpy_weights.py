@@ -0,0 +1,30 @@
+"""Unit tests for the NumPy weights export method."""
+import os
+import tempfile
+import numpy as np
+from unittest import TestCase
+from src.base import NumPyPolicy
+from ..deep_q_model import build_deep_q_model
+from ..dueling_deep_q_model import build_dueling_deep_q_model
+from ..numpy_weights import export_numpy_weights
+
+
+def assert_matches(test: TestCase, model) -> None:
+    """Assert that a NumPy policy of a model has its Q values."""
+    states = np.random.randint(0, 256, (4, 84, 84, 4), dtype=np.uint8)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'weights.npz')
+        export_numpy_weights(model, path)
+        policy = NumPyPolicy(path)
+    expected = model.predict_on_batch([states, np.ones((4, 6))])
+    test.assertTrue(np.allclose(expected, policy.q_values(states), atol=1e-4))
+
+
+class ShouldMatchDeepQModel(TestCase):
+    def test(self):
+        assert_matches(self, build_deep_q_model())
+
+
+class ShouldMatchDuelingDeepQModel(TestCase):
+    def test(self):
+        assert_matches(self, build_dueling_deep_q_model())
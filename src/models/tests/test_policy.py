@@ -0,0 +1,32 @@
+"""Unit tests for the policy function builder method."""
+import numpy as np
+from unittest import TestCase
+from ..deep_q_model import build_deep_q_model
+from ..dueling_deep_q_model import build_dueling_deep_q_model
+from ..policy import build_policy_function
+
+
+def assert_same_actions(test: TestCase, model) -> None:
+    """Assert that a policy selects the actions of its model."""
+    policy = build_policy_function(model)
+    states = np.random.randint(0, 256, (16, 84, 84, 4), dtype=np.uint8)
+    mask = np.ones((1, 6), dtype=np.float32)
+    for state in states:
+        expected = np.argmax(model.predict([state[np.newaxis], mask]), axis=1)
+        test.assertTrue(np.array_equal(expected, policy(state[np.newaxis])))
+    # the policy follows new weights of the model
+    model.set_weights([w + np.random.normal(size=w.shape) for w in model.get_weights()])
+    expected = np.argmax(model.predict([states[:1], mask]), axis=1)
+    test.assertTrue(np.array_equal(expected, policy(states[:1])))
+
+
+class ShouldSelectActionsOfDeepQModel(TestCase):
+    def test(self):
+        np.random.seed(1)
+        assert_same_actions(self, build_deep_q_model())
+
+
+class ShouldSelectActionsOfDuelingDeepQModel(TestCase):
+    def test(self):
+        np.random.seed(1)
+        assert_same_actions(self, build_dueling_deep_q_model())
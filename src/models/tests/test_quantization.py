@@ -0,0 +1,51 @@
+"""Unit tests for the quantized policy methods."""
+import os
+import tempfile
+import numpy as np
+from unittest import TestCase
+from ..deep_q_model import build_deep_q_model
+from ..quantization import compare_policies
+from ..quantization import export_quantized_model
+from ..quantization import QuantizedPolicy
+
+
+class ShouldMatchModel(TestCase):
+    def test(self):
+        np.random.seed(1)
+        model = build_deep_q_model()
+        states = np.random.randint(0, 256, (16, 84, 84, 4), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'weights_int8.tflite')
+            export_quantized_model(model, path, 'int8')
+            policy = QuantizedPolicy(path)
+            report = compare_policies(model, policy, states)
+        self.assertEqual(16, report['states'])
+        self.assertEqual(16 - report['changed'], round(16 * report['agreement']))
+        self.assertEqual((16,), policy(states).shape)
+
+
+class ShouldInvokeOnceForEachBatch(TestCase):
+    def test(self):
+        np.random.seed(1)
+        model = build_deep_q_model()
+        states = np.random.randint(0, 256, (8, 84, 84, 4), dtype=np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'weights_int8.tflite')
+            export_quantized_model(model, path, 'int8')
+            policy = QuantizedPolicy(path)
+            expected = np.concatenate([policy.q_values(state[np.newaxis]) for state in states])
+            invoke = policy.interpreter.invoke
+            invokes = []
+            policy.interpreter.invoke = lambda: invokes.append(invoke())
+            self.assertTrue(np.allclose(expected, policy.q_values(states), atol=1e-5))
+            self.assertEqual(1, len(invokes))
+            # the input is resized again for batches of other sizes
+            self.assertTrue(np.allclose(expected[:3], policy.q_values(states[:3]), atol=1e-5))
+            self.assertTrue(np.allclose(expected[:1], policy.q_values(states[:1]), atol=1e-5))
+            self.assertEqual(3, len(invokes))
+
+
+class ShouldRaiseOnUnknownQuantization(TestCase):
+    def test(self):
+        model = build_deep_q_model()
+        self.assertRaises(ValueError, export_quantized_model, model, 'x', 'int4')
@@ -0,0 +1,51 @@
+"""Unit tests for the train step builder methods."""
+import numpy as np
+from unittest import TestCase
+from keras.optimizers import SGD
+from ..deep_q_model import build_deep_q_model
+from ..train_step import build_target_update_function
+from ..train_step import build_train_function
+
+
+def batch(size: int=8, num_actions: int=6) -> tuple:
+    """Return a random batch of experiences."""
+    s = np.random.randint(0, 256, (size, 84, 84, 4), dtype=np.uint8)
+    a = np.random.randint(0, num_actions, size).astype(np.uint8)
+    r = np.random.normal(size=size).astype(np.float32)
+    d = np.random.random(size) < 0.25
+    s2 = np.random.randint(0, 256, (size, 84, 84, 4), dtype=np.uint8)
+    w = np.random.random(size).astype(np.float32)
+    return s, a, r, d, s2, w
+
+
+class ShouldTrainLikeTrainOnBatch(TestCase):
+    def test(self):
+        np.random.seed(1)
+        model = build_deep_q_model(optimizer=SGD(lr=0.01))
+        target_model = build_deep_q_model(optimizer=SGD(lr=0.01))
+        other = build_deep_q_model(optimizer=SGD(lr=0.01))
+        other.set_weights(model.get_weights())
+        train = build_train_function(model, target_model, discount_factor=0.9)
+        s, a, r, d, s2, w = batch()
+        # the targets and masks of `DeepQAgent._replay`
+        Q_t = np.max(target_model.predict_on_batch([s2, np.ones((8, 6))]), axis=1)
+        Q_t[d] = 0
+        mask = np.eye(6, dtype=np.float32)[a]
+        y = mask * (r + 0.9 * Q_t)[:, None]
+        Q = np.sum(other.predict_on_batch([s, mask]), axis=1)
+        expected_loss = other.train_on_batch([s, mask], y, sample_weight=w)
+        loss, td_error = train(s, a, r, d, s2, w)
+        self.assertAlmostEqual(expected_loss, loss, places=5)
+        self.assertTrue(np.allclose(r + 0.9 * Q_t - Q, td_error, atol=1e-5))
+        for expected, weights in zip(other.get_weights(), model.get_weights()):
+            self.assertTrue(np.allclose(expected, weights, atol=1e-5))
+
+
+class ShouldUpdateTarget(TestCase):
+    def test(self):
+        model = build_deep_q_model()
+        target_model = build_deep_q_model()
+        update_target = build_target_update_function(model, target_model)
+        update_target()
+        for expected, weights in zip(model.get_weights(), target_model.get_weights()):
+            self.assertTrue(np.array_equal(expected, weights))
@@ -0,0 +1,141 @@
+"""Compiled functions that train a Q network against a target network."""
+from typing import Callable
+from keras import backend as K
+from keras.models import Model
+from .losses import huber_loss
+from .policy import _q_model
+
+
+def _jit_scope():
+    """Return the scope that compiles the ops built in it with XLA."""
+    try:
+        from tensorflow.contrib.compiler import jit
+    except ImportError:
+        raise ValueError('XLA compilation requires TensorFlow 1.x with contrib')
+    return jit.experimental_jit_scope()
+
+
+def _build_train_step(
+    model: Model,
+    target_model: Model,
+    discount_factor: float,
+    loss: Callable,
+) -> tuple:
+    """
+    Build the ops of a train step (see `build_train_function`).
+
+    Args:
+        model: the online Q network to train
+        target_model: the target Q network to estimate targets with
+        discount_factor: the discount of the Q values of the next states
+        loss: the loss of the network
+
+    Returns:
+        a tuple of the inputs, the outputs, and the updates of the step
+
+    """
+    shape = K.int_shape(model.inputs[0])[1:]
+    num_actions = K.int_shape(model.output)[-1]
+    s = K.placeholder((None, *shape), dtype='uint8', name='s')
+    a = K.placeholder((None,), dtype='uint8', name='a')
+    r = K.placeholder((None,), dtype='float32', name='r')
+    d = K.placeholder((None,), dtype='bool', name='d')
+    s2 = K.placeholder((None, *shape), dtype='uint8', name='s2')
+    w = K.placeholder((None,), dtype='float32', name='w')
+    # the max Q value of each next state (zero for terminal states)
+    Q_t = K.max(_q_model(target_model)(K.cast(s2, K.floatx())), axis=-1)
+    Q_t = K.stop_gradient(Q_t * (1 - K.cast(d, K.floatx())))
+    target = r + discount_factor * Q_t
+    # mask the Q values of the actions that weren't selected like `_replay`
+    mask = K.one_hot(K.cast(a, 'int32'), num_actions)
+    Q = _q_model(model)(K.cast(s, K.floatx())) * mask
+    td_error = target - K.sum(Q, axis=-1)
+    # weigh the mean loss of each experience like `train_on_batch`
+    losses = K.mean(loss(mask * K.expand_dims(target), Q), axis=-1) * w
+    total_loss = K.mean(losses) / K.mean(K.cast(K.not_equal(w, 0), K.floatx()))
+    updates = model.optimizer.get_updates(loss=total_loss, params=model.trainable_weights)
+
+    return [s, a, r, d, s2, w], [total_loss, td_error], updates
+
+
+def build_train_function(
+    model: Model,
+    target_model: Model,
+    discount_factor: float=0.99,
+    loss: Callable=huber_loss,
+    jit_compile: bool=False,
+) -> Callable:
+    """
+    Build a function that trains a Q network on a batch of experiences.
+
+    Notes:
+        The function feeds the batch (with `uint8` states and actions) to
+        a single graph that computes the max Q values of the target network,
+        the masked loss, and the update of the optimizer of `model`, i.e., a
+        step is one session call. The loss is the loss of `train_on_batch`
+        with the targets and masks of `DeepQAgent._replay`. The function
+        creates the (new) weights of the optimizer, build it before loading
+        the weights of the optimizer
+
+    Args:
+        model: the online Q network to train (a compiled model from
+            `build_deep_q_model` or `build_dueling_deep_q_model`)
+        target_model: the target Q network to estimate targets with
+        discount_factor: the discount of the Q values of the next states,
+            i.e., γ^n for n-step returns
+        loss: the loss of the network
+        jit_compile: whether to compile the graph of the step with XLA
+
+    Returns:
+        a function of a batch (s, a, r, d, s2, w) that trains the network
+        and returns the loss and the TD-error of each experience before the
+        update
+
+    """
+    if jit_compile:
+        with _jit_scope():
+            inputs, outputs, updates = _build_train_step(model, target_model,
+                discount_factor, loss
+            )
+    else:
+        inputs, outputs, updates = _build_train_step(model, target_model,
+            discount_factor, loss
+        )
+    function = K.function(inputs, outputs, updates=updates)
+
+    def train(s, a, r, d, s2, w):
+        """Train the network on a batch and return the loss and TD-errors."""
+        loss, td_error = function([s, a, r, d, s2, w])
+        return float(loss), td_error
+
+    return train
+
+
+def build_target_update_function(model: Model, target_model: Model) -> Callable:
+    """
+    Build a function that copies the weights of a network to its target.
+
+    Notes:
+        The weights are assigned in the graph, i.e., they never leave the
+        device like `target_model.set_weights(model.get_weights())` does
+
+    Args:
+        model: the online Q network to copy the weights of
+        target_model: the target Q network to copy the weights to
+
+    Returns:
+        a function with no arguments that updates the target network
+
+    """
+    updates = [K.update(target, online) for target, online in zip(target_model.weights, model.weights)]
+    function = K.function([], [], updates=updates)
+
+    def update_target():
+        """Copy the weights of the network to the target network."""
+        function([])
+
+    return update_target
+
+
+# explicitly define the outward facing API of this module
+__all__ = [build_target_update_function.__name__, build_train_function.__name__]
@@ -2,7 +2,9 @@
 import os
 import sys
 from datetime import datetime
+from functools import partial
 import gym
+import numpy as np
 import pandas as pd
 from matplotlib import pyplot as plt
 from .setup_env import setup_env
@@ -36,18 +38,80 @@ def plot_results(env: gym.Env, results_dir: str, filename: str) -> None:
     plt.savefig('{}/{}.pdf'.format(results_dir, filename))
 
 
-def play(results_dir: str, monitor: bool=False) -> None:
+def quantize_agent(agent, env_id: str, results_dir: str,
+    quantization: str,
+    held_out_frames: int=1000,
+) -> None:
+    """
+    Replace the policy of an agent with a quantized copy of its network.
+
+    Args:
+        agent: the DeepQAgent with the weights to quantize
+        env_id: the ID of the environment to collect held-out frames from
+        results_dir: the directory to store the quantized network and the
+            report of changed actions in
+        quantization: the precision of the weights as either 'int8' or
+            'float16'
+        held_out_frames: the number of frames to compare the actions of the
+            quantized and float32 networks on
+
+    Returns:
+        None
+
+    """
+    # these are long to import, import here to save early execution time
+    from src.models import compare_policies
+    from src.models import export_quantized_model
+    from src.models import QuantizedPolicy
+
+    model_file = '{}/weights_{}.tflite'.format(results_dir, quantization)
+    export_quantized_model(agent.model, model_file, quantization)
+    policy = QuantizedPolicy(model_file)
+    # collect held-out frames with the float32 policy in an environment of
+    # their own (the scores of the played environment stay untouched)
+    env = setup_env(env_id)
+    states = [env.reset()]
+    while len(states) < held_out_frames:
+        state, _, done, _ = env.step(agent.predict(states[-1], 0.05))
+        states.append(env.reset() if done else state)
+    env.close()
+    # report the actions that the quantized network changes
+    report = pd.Series(compare_policies(agent.model, policy, np.array(states)))
+    print(report)
+    report.to_csv('{}/quantization_{}.csv'.format(results_dir, quantization))
+    agent.policy = policy
+
+
+def play(results_dir: str,
+    monitor: bool=False,
+    quantization: str=None,
+    numpy_policy: bool=False,
+    num_envs: int=1,
+    fused: bool=False,
+) -> None:
     """
     Play an environment with a certain agent.
 
     Args:
         results_dir: the directory containing results of a training session
         monitor: whether to monitor the operation
+        quantization: the precision to quantize the network to as either
+            'int8' or 'float16'. If None, plays with the float32 network
+        numpy_policy: whether to play with the NumPy copy of the network in
+            `weights.npz` (without importing TensorFlow)
+        num_envs: the number of environments to play games in parallel
+            processes in
+        fused: whether to preprocess Atari games with a single fused
+            wrapper (see `setup_env`)
 
     Returns:
         None
 
     """
+    if numpy_policy and quantization is not None:
+        raise ValueError('the NumPy policy plays with float32 weights')
+    if monitor and num_envs > 1:
+        raise ValueError('monitoring requires a single environment')
     try:
         env_id = list(filter(None, results_dir.split('/')))[-3]
     except IndexError:
@@ -55,25 +119,39 @@ def play(results_dir: str, monitor: bool=False) -> None:
 
     # set up the weights file
     weights_file = '{}/weights.h5'.format(results_dir)
+    numpy_file = '{}/weights.npz'.format(results_dir)
     # make sure the weights exist
-    if not os.path.exists(weights_file):
+    if not os.path.exists(weights_file) and not (numpy_policy and os.path.exists(numpy_file)):
         raise OSError('weights file not found: {}'.format(weights_file))
 
-    # these are long to import and train is only ever called once during
-    # an execution life-cycle. import here to save early execution time
-    from src.agents import DeepQAgent
-
     # build the environment
     monitor_dir = '{}/monitor_play'.format(results_dir) if monitor else None
-    env = setup_env(env_id, monitor_dir)
-    # build the agent without any replay memory since we're just playing, load
-    # the trained weights, and play some games
-    agent = DeepQAgent(env, replay_memory_size=0)
-    agent.model.load_weights(weights_file)
-    agent.target_model.load_weights(weights_file)
+    env = setup_env(env_id, monitor_dir, fused=fused)
+    if numpy_policy:
+        from src.agents import PolicyAgent
+        from src.base import NumPyPolicy
+        if not os.path.exists(numpy_file):
+            # convert the weights of older sessions (imports TensorFlow once)
+            from src.agents.deep_q_agent import DeepQAgent
+            from src.models import export_numpy_weights
+            agent = DeepQAgent(env, replay_memory_size=0)
+            agent.model.load_weights(weights_file)
+            export_numpy_weights(agent.model, numpy_file)
+        agent = PolicyAgent(env, NumPyPolicy(numpy_file))
+    else:
+        # these are long to import and train is only ever called once during
+        # an execution life-cycle. import here to save early execution time
+        from src.agents.deep_q_agent import DeepQAgent
+        # build the agent without any replay memory since we're just
+        # playing, load the trained weights, and play some games
+        agent = DeepQAgent(env, replay_memory_size=0)
+        agent.model.load_weights(weights_file)
+        agent.target_model.load_weights(weights_file)
+        if quantization is not None:
+            quantize_agent(agent, env_id, results_dir, quantization)
 
     try:
-        agent.play()
+        agent.play(num_workers=num_envs, env_fn=partial(setup_env, env_id, fused=fused))
     except KeyboardInterrupt:
         env.close()
         sys.exit(0)
@@ -84,7 +162,12 @@ def play(results_dir: str, monitor: bool=False) -> None:
     env.close()
 
 
-def play_random(env_id: str, output_dir: str, monitor: bool=False) -> None:
+def play_random(env_id: str,
+    output_dir: str,
+    monitor: bool=False,
+    num_envs: int=1,
+    fused: bool=False,
+) -> None:
     """
     Run a uniformly random agent in the given environment.
 
@@ -92,11 +175,17 @@ def play_random(env_id: str, output_dir: str, monitor: bool=False) -> None:
         env_id: the ID of the environment to play
         output_dir: the base directory to store results into
         monitor: whether to monitor the operation
+        num_envs: the number of environments to play games in parallel
+            processes in
+        fused: whether to preprocess Atari games with a single fused
+            wrapper (see `setup_env`)
 
     Returns:
         None
 
     """
+    if monitor and num_envs > 1:
+        raise ValueError('monitoring requires a single environment')
     # setup the output directory with a timestamped directory
     now = datetime.today().strftime('%Y-%m-%d_%H-%M')
     output_dir = '{}/{}/Random/{}'.format(output_dir, env_id, now)
@@ -110,10 +199,10 @@ def play_random(env_id: str, output_dir: str, monitor: bool=False) -> None:
 
     # build the environment
     monitor_dir = '{}/monitor_random'.format(output_dir) if monitor else None
-    env = setup_env(env_id, monitor_dir)
+    env = setup_env(env_id, monitor_dir, fused=fused)
     # initialize a random agent on the environment and play a validation batch
     agent = RandomAgent(env)
-    agent.play()
+    agent.play(num_workers=num_envs, env_fn=partial(setup_env, env_id, fused=fused))
 
     # plot the results and save data to disk
     plot_results(env, output_dir, 'result_random')
@@ -1,17 +1,22 @@
 """A method to setup an environment based on its string ID."""
 import gym
-from nes_py.wrappers import BinarySpaceToDiscreteSpaceEnv, wrap as nes_py_wrap
+from nes_py.wrappers import BinarySpaceToDiscreteSpaceEnv
 from gym_super_mario_bros.actions import SIMPLE_MOVEMENT
 from src.environment.atari import build_atari_environment
+from src.environment.wrappers import NESPipelineEnv
 
 
-def setup_env(env_id: str, monitor_dir: str=None) -> gym.Env:
+def setup_env(env_id: str, monitor_dir: str=None, fused: bool=False) -> gym.Env:
     """
     Make and environment and set it up with wrappers.
 
     Args:
         env_id: the id for the environment to load
-        output_dir: the output directory to route monitor output to
+        monitor_dir: the output directory to route monitor output to
+        fused: whether to preprocess Atari games with a single fused
+            wrapper (AtariPipelineEnv) instead of a stack of wrappers (the
+            observations and rewards are identical). SuperMarioBros games
+            always use the fused NESPipelineEnv
 
     Returns:
         a loaded and wrapped Open AI Gym environment
@@ -25,9 +30,10 @@ def setup_env(env_id: str, monitor_dir: str=None) -> gym.Env:
         import gym_super_mario_bros
         env = gym_super_mario_bros.make(env_id)
         env = BinarySpaceToDiscreteSpaceEnv(env, SIMPLE_MOVEMENT)
-        env = nes_py_wrap(env)
+        # the preprocessing of `nes_py.wrappers.wrap` in a single wrapper
+        env = NESPipelineEnv(env)
     else:
-        env = build_atari_environment(env_id)
+        env = build_atari_environment(env_id, fused=fused)
 
     if monitor_dir is not None:
         env = gym.wrappers.Monitor(env, monitor_dir, force=True)
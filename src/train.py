@@ -2,12 +2,23 @@
 import os
 import sys
 import datetime
+from functools import partial
 import pandas as pd
 from matplotlib import pyplot as plt
 from .setup_env import setup_env
 
 
-def train(env_id: str, output_dir: str, monitor: bool=False) -> None:
+def train(env_id: str,
+    output_dir: str,
+    monitor: bool=False,
+    replay_on_disk: bool=False,
+    compress_replay: bool=False,
+    resume: str=None,
+    num_envs: int=1,
+    pipelined: bool=False,
+    num_actors: int=0,
+    fused: bool=False,
+) -> None:
     """
     Train an agent to actuate a certain environment.
 
@@ -15,49 +26,116 @@ def train(env_id: str, output_dir: str, monitor: bool=False) -> None:
         env_id: the ID of the environment to play
         output_dir: the base directory to store results into
         monitor: whether to monitor the operation
+        replay_on_disk: whether to store the replay memory in memory-mapped
+            files in the output directory instead of in memory
+        compress_replay: whether to compress the frames of the replay memory
+        resume: the results directory of a training session to resume from
+            its last checkpoint. If None, starts a new training session
+        num_envs: the number of environments to step in parallel worker
+            processes while training
+        pipelined: whether to act and learn in parallel threads, i.e., to
+            step the environment while the network trains
+        num_actors: the number of Ape-X actor processes that play the game
+            with copies of the network while this process learns. If 0,
+            this process plays the game too
+        fused: whether to preprocess Atari games with a single fused
+            wrapper (see `setup_env`)
 
     Returns:
         None
 
     """
-    # setup the output directory based on the environment ID and current time
-    now = datetime.datetime.today().strftime('%Y-%m-%d_%H-%M')
-    output_dir = '{}/{}/DeepQAgent/{}'.format(output_dir, env_id, now)
+    if num_envs > 1 and pipelined:
+        raise ValueError('pipelined training steps a single environment')
+    if num_actors > 0 and (num_envs > 1 or pipelined):
+        raise ValueError('Ape-X actors can\'t be combined with other modes')
+    if resume is None:
+        # setup the output directory based on the environment ID and time
+        now = datetime.datetime.today().strftime('%Y-%m-%d_%H-%M')
+        output_dir = '{}/{}/DeepQAgent/{}'.format(output_dir, env_id, now)
+    else:
+        # continue writing results to the directory of the resumed session
+        try:
+            env_id = list(filter(None, resume.split('/')))[-3]
+        except IndexError:
+            raise ValueError('invalid results directory: {}'.format(resume))
+        output_dir = resume
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     print('writing results to {}'.format(repr(output_dir)))
     weights_file = '{}/weights.h5'.format(output_dir)
+    checkpoint_dir = '{}/checkpoint'.format(output_dir)
 
     # these are long to import and train is only ever called once during
     # an execution lifecycle. import here to save early execution time
-    from src.agents import DeepQAgent
+    from src.agents.deep_q_agent import DeepQAgent
+    from src.models import export_numpy_weights
     from src.util import BaseCallback
 
     # build the environment
     monitor_dir = '{}/monitor_train'.format(output_dir) if monitor else None
-    env = setup_env(env_id, monitor_dir)
+    env = setup_env(env_id, monitor_dir, fused=fused)
+    # the function that builds the environments of worker processes
+    env_fn = partial(setup_env, env_id, fused=fused)
     # build the agent
-    agent = DeepQAgent(env, replay_memory_size=int(7.5e5))
+    replay_memory_dir = '{}/replay'.format(output_dir) if replay_on_disk else None
+    agent = DeepQAgent(env,
+        replay_memory_size=int(7.5e5),
+        replay_memory_dir=replay_memory_dir,
+        compress_replay_memory=compress_replay,
+        # the replay queue keeps the frames of each environment (or actor)
+        # apart
+        num_envs=num_actors if num_actors > 0 else num_envs,
+        # Ape-X replays experiences by the priorities of the actors
+        prioritized_experience_replay=num_actors > 0,
+    )
     # write some info about the agent's hyperparameters to disk
     with open('{}/agent.py'.format(output_dir), 'w') as agent_file:
         agent_file.write(repr(agent))
+    callback = BaseCallback(weights_file, checkpoint_dir=checkpoint_dir)
 
-    # observe frames to fill the replay memory
-    try:
-        agent.observe()
-    except KeyboardInterrupt:
-        env.close()
-        sys.exit(0)
+    if resume is None:
+        # observe frames to fill the replay memory
+        try:
+            agent.observe()
+        except KeyboardInterrupt:
+            env.close()
+            sys.exit(0)
+    else:
+        # restore the agent and metrics from the last checkpoint
+        print('resuming from {}'.format(repr(checkpoint_dir)))
+        callback.restore(agent.load_checkpoint(checkpoint_dir))
 
-    # train the agent
+    # train the agent for the frames left in the session
     try:
-        callback = BaseCallback(weights_file)
-        agent.train(frames_to_play=int(2.5e6), callback=callback)
+        frames_to_play = int(2.5e6) - agent.frames_played
+        if num_actors > 0:
+            agent.train_ape_x(env_fn, num_actors,
+                frames_to_play=frames_to_play,
+                callback=callback,
+            )
+        elif num_envs > 1:
+            from src.environment.vec_env import VecEnv
+            vec_env = VecEnv(env_fn, num_envs)
+            try:
+                agent.train_vectorized(vec_env,
+                    frames_to_play=frames_to_play,
+                    callback=callback,
+                )
+            finally:
+                vec_env.close()
+        elif pipelined:
+            agent.train_pipelined(frames_to_play=frames_to_play, callback=callback)
+        else:
+            agent.train(frames_to_play=frames_to_play, callback=callback)
     except KeyboardInterrupt:
         print('canceled training')
 
-    # save the weights to disk
-    agent.model.save_weights(weights_file, overwrite=True)
+    # save the weights to disk (and a copy for the NumPy policy), writing
+    # any weights the callback has pending first
+    callback.save_weights(agent)
+    callback.close()
+    export_numpy_weights(agent.model, '{}/weights.npz'.format(output_dir))
 
     # save the training results
     rewards = pd.Series(callback.scores)
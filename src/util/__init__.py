@@ -1,10 +1,12 @@
 """Utilities for the project."""
 from .base_callback import BaseCallback
+from .checkpoint_writer import CheckpointWriter
 from .jupyter_callback import JupyterCallback
 
 
 # explicitly define the outward facing API of this package
 __all__ = [
     BaseCallback.__name__,
+    CheckpointWriter.__name__,
     JupyterCallback.__name__,
 ]
@@ -1,16 +1,29 @@
 """A reward tracking callback for the command line."""
+from .checkpoint_writer import CheckpointWriter
 
 
 class BaseCallback(object):
     """A reward tracking callback for the command line."""
 
-    def __init__(self, weights_file_name: str, update_every: int=100) -> None:
+    def __init__(self,
+        weights_file_name: str,
+        update_every: int=100,
+        checkpoint_dir: str=None,
+        checkpoint_every: int=500,
+        keep: int=1,
+    ) -> None:
         """
         Initialize a new base callback.
 
         Args:
             weights_file_name: the name of the file to save model weights to
             update_every: the number of episodes to see before saving weights
+            checkpoint_dir: the directory to save checkpoints to for resuming
+                training. If None, no checkpoints are saved
+            checkpoint_every: the number of episodes to see before saving a
+                checkpoint
+            keep: the number of saved weights to keep (the weights before
+                the latest are kept as '<name>-<episode>.h5')
 
         Returns:
             None
@@ -19,16 +32,26 @@ class BaseCallback(object):
         # setup caches for metrics
         self.weights_file_name = weights_file_name
         self.update_every = update_every
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_every = checkpoint_every
+        self.keep = keep
+        # the writer that saves the weights on a background thread
+        self.writer = CheckpointWriter(weights_file_name, keep=keep)
         self._episodes = 0
         self.scores = []
         self.losses = []
 
     def __repr__(self) -> str:
         """Return an executable string representation of this object."""
-        return '{}(weights_file_name={}, update_every={})'.format(
+        template = '{}(weights_file_name={}, update_every={}, ' \
+            'checkpoint_dir={}, checkpoint_every={}, keep={})'
+        return template.format(
             self.__class__.__name__,
             repr(self.weights_file_name),
             self.update_every,
+            repr(self.checkpoint_dir),
+            self.checkpoint_every,
+            self.keep,
         )
 
     def __call__(self, agent, score: float, loss: float) -> None:
@@ -49,9 +72,50 @@ class BaseCallback(object):
         # append the score to the list
         self.scores.append(score)
         self.losses.append(loss)
-        # save the weights
+        # save the weights (training only pays for the copy in memory)
         if self._episodes % self.update_every == 0:
-            agent.model.save_weights(self.weights_file_name)
+            self.writer.save(agent.model, self._episodes)
+        # save a checkpoint with the metrics to resume training from
+        if self.checkpoint_dir is None:
+            return
+        if self._episodes % self.checkpoint_every == 0:
+            agent.save_checkpoint(self.checkpoint_dir,
+                scores=self.scores,
+                losses=self.losses,
+            )
+
+    def save_weights(self, agent) -> None:
+        """
+        Save the weights of an agent and wait for the write to finish.
+
+        Args:
+            agent: the agent to save the weights of
+
+        Returns:
+            None
+
+        """
+        self.writer.save(agent.model, self._episodes)
+        self.writer.flush()
+
+    def close(self) -> None:
+        """Write the pending weights and stop the writer."""
+        self.writer.close()
+
+    def restore(self, state: dict) -> None:
+        """
+        Restore the metrics of the callback from a checkpoint.
+
+        Args:
+            state: the state returned by the `load_checkpoint` of an agent
+
+        Returns:
+            None
+
+        """
+        self.scores = list(state['scores'])
+        self.losses = list(state['losses'])
+        self._episodes = len(self.scores)
 
 
 # explicitly define the outward facing API of this module
@@ -0,0 +1,186 @@
+"""A writer that saves the weights of models on a background thread."""
+import atexit
+import os
+import queue
+import shutil
+import threading
+
+
+def _snapshot(model) -> tuple:
+    """
+    Return an in-memory copy of the weights of a model.
+
+    Args:
+        model: the Keras model to copy the weights of
+
+    Returns:
+        a tuple of:
+            - the name of each layer with the names of its weights
+            - the value of each weight of the model (in layer order)
+
+    """
+    layers = [(layer.name, [weight.name for weight in layer.weights]) for layer in model.layers]
+    return layers, model.get_weights()
+
+
+def _write_weights(path: str, layers: list, weights: list) -> None:
+    """
+    Write a snapshot of weights to an HDF5 file like `save_weights`.
+
+    Args:
+        path: the path of the HDF5 file to write
+        layers: the name of each layer with the names of its weights
+        weights: the value of each weight (in layer order)
+
+    Returns:
+        None
+
+    """
+    # import Keras on the first write, i.e., importing the writer (and the
+    # util package) doesn't import TensorFlow
+    import h5py
+    from keras import __version__ as keras_version
+    from keras import backend as K
+    weights = iter(weights)
+    with h5py.File(path, 'w') as weights_file:
+        # the layout of `keras.engine.saving.save_weights_to_hdf5_group`
+        weights_file.attrs['layer_names'] = [name.encode('utf8') for name, _ in layers]
+        weights_file.attrs['backend'] = K.backend().encode('utf8')
+        weights_file.attrs['keras_version'] = str(keras_version).encode('utf8')
+        for name, weight_names in layers:
+            group = weights_file.create_group(name)
+            group.attrs['weight_names'] = [w.encode('utf8') for w in weight_names]
+            for weight_name in weight_names:
+                value = next(weights)
+                dataset = group.create_dataset(weight_name, value.shape, dtype=value.dtype)
+                dataset[...] = value
+
+
+class CheckpointWriter(object):
+    """A writer that saves the weights of models on a background thread."""
+
+    def __init__(self, path: str, keep: int=1, max_pending: int=2) -> None:
+        """
+        Initialize a new checkpoint writer.
+
+        Notes:
+            `save` only copies the weights into memory, a thread writes the
+            copy to a temporary file that replaces `path` when complete,
+            i.e., an interrupted write never corrupts the last weights. The
+            writer flushes the pending writes when the interpreter exits
+
+        Args:
+            path: the path of the HDF5 file to write the latest weights to
+            keep: the number of checkpoints to keep. the checkpoints before
+                the latest are kept as '<path root>-<step><path ext>'
+            max_pending: the max number of snapshots waiting to be written
+                before `save` blocks
+
+        Returns:
+            None
+
+        """
+        if keep < 1:
+            raise ValueError('`keep` must be >= 1')
+        self.path = path
+        self.keep = keep
+        self.max_pending = max_pending
+        self._snapshots = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._error = None
+        # the steps of the latest checkpoint and the kept older checkpoints
+        self._step = None
+        self._history = []
+        atexit.register(self.flush)
+
+    def __repr__(self) -> str:
+        """Return an executable string representation of this object."""
+        return '{}(path={}, keep={}, max_pending={})'.format(
+            self.__class__.__name__,
+            repr(self.path),
+            self.keep,
+            self.max_pending,
+        )
+
+    def _name(self, step: int) -> str:
+        """Return the name of the kept checkpoint of a step."""
+        root, ext = os.path.splitext(self.path)
+        return '{}-{}{}'.format(root, step, ext)
+
+    def _write(self, step: int, layers: list, weights: list) -> None:
+        """Write a snapshot and rotate the kept checkpoints."""
+        temp_path = '{}.tmp'.format(self.path)
+        _write_weights(temp_path, layers, weights)
+        # keep the last checkpoint under its own name before replacing it
+        if self.keep > 1 and self._step not in (None, step) and os.path.exists(self.path):
+            try:
+                os.link(self.path, self._name(self._step))
+            except OSError:
+                shutil.copyfile(self.path, self._name(self._step))
+            self._history.append(self._step)
+        os.replace(temp_path, self.path)
+        self._step = step
+        # remove the checkpoints past the number to keep
+        while len(self._history) > self.keep - 1:
+            name = self._name(self._history.pop(0))
+            if os.path.exists(name):
+                os.remove(name)
+
+    def _run(self) -> None:
+        """Write the snapshots in the queue until the writer closes."""
+        while True:
+            snapshot = self._snapshots.get()
+            try:
+                if snapshot is None:
+                    return
+                if self._error is None:
+                    self._write(*snapshot)
+            except Exception as error:
+                # raise the error in the training thread on the next call
+                self._error = error
+            finally:
+                self._snapshots.task_done()
+
+    def _raise(self) -> None:
+        """Raise the error of a failed write (once)."""
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def save(self, model, step: int) -> None:
+        """
+        Save the weights of a model (in the background).
+
+        Args:
+            model: the Keras model to save the weights of
+            step: the step (e.g. episode) of the weights to name the kept
+                checkpoint of the weights with
+
+        Returns:
+            None
+
+        """
+        self._raise()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._snapshots.put((step, *_snapshot(model)))
+
+    def flush(self) -> None:
+        """Block until every pending snapshot is written."""
+        if self._thread is not None:
+            self._snapshots.join()
+        self._raise()
+
+    def close(self) -> None:
+        """Write the pending snapshots and stop the thread."""
+        if self._thread is not None:
+            self._snapshots.put(None)
+            self._thread.join()
+            self._thread = None
+        atexit.unregister(self.flush)
+        self._raise()
+
+
+# explicitly define the outward facing API of this module
+__all__ = [CheckpointWriter.__name__]
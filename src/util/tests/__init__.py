@@ -0,0 +1 @@
+"""Test cases for the util package."""
@@ -0,0 +1,167 @@
+"""Unit tests for the CheckpointWriter class."""
+import os
+import tempfile
+import threading
+from types import SimpleNamespace
+from unittest import TestCase, mock
+import numpy as np
+from .. import checkpoint_writer
+from ..checkpoint_writer import CheckpointWriter
+
+
+def stub_model(value: float):
+    """Return a stub of a Keras model with a dense layer of a value."""
+    layer = SimpleNamespace(name='dense_1', weights=[
+        SimpleNamespace(name='dense_1/kernel:0'),
+        SimpleNamespace(name='dense_1/bias:0'),
+    ])
+    weights = [np.full((2, 3), value, dtype=np.float32), np.full(3, value, dtype=np.float32)]
+    return SimpleNamespace(layers=[layer], get_weights=lambda: weights)
+
+
+def write_text(path: str, layers: list, weights: list) -> None:
+    """Write the value of a snapshot of a stub model as text."""
+    with open(path, 'w') as text_file:
+        text_file.write(str(int(weights[1][0])))
+
+
+def read_text(path: str) -> str:
+    """Return the text of a file."""
+    with open(path) as text_file:
+        return text_file.read()
+
+
+class CheckpointWriter__init__(TestCase):
+    def test(self):
+        self.assertRaises(ValueError, CheckpointWriter, 'weights.h5', keep=0)
+        writer = CheckpointWriter('weights.h5', keep=2)
+        self.assertEqual("CheckpointWriter(path='weights.h5', keep=2, max_pending=2)", repr(writer))
+        writer.close()
+
+
+class CheckpointWriter_should_replace_checkpoint_atomically(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(checkpoint_writer, '_write_weights', write_text):
+            path = os.path.join(directory, 'weights.h5')
+            writer = CheckpointWriter(path)
+            writer.save(stub_model(1), 1)
+            writer.flush()
+            self.assertEqual('1', read_text(path))
+            writer.save(stub_model(2), 2)
+            writer.close()
+            self.assertEqual('2', read_text(path))
+            # the temporary file replaced the checkpoint
+            self.assertEqual(['weights.h5'], os.listdir(directory))
+
+
+class CheckpointWriter_should_keep_last_checkpoints(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(checkpoint_writer, '_write_weights', write_text):
+            path = os.path.join(directory, 'weights.h5')
+            writer = CheckpointWriter(path, keep=3)
+            for step in range(1, 6):
+                writer.save(stub_model(step), step)
+            writer.close()
+            names = ['weights-3.h5', 'weights-4.h5', 'weights.h5']
+            self.assertEqual(names, sorted(os.listdir(directory)))
+            self.assertEqual('3', read_text(os.path.join(directory, 'weights-3.h5')))
+            self.assertEqual('4', read_text(os.path.join(directory, 'weights-4.h5')))
+            self.assertEqual('5', read_text(path))
+
+
+class CheckpointWriter_should_copy_checkpoints_without_hard_links(TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(checkpoint_writer, '_write_weights', write_text), \
+                mock.patch('os.link', side_effect=OSError) as link:
+            path = os.path.join(directory, 'weights.h5')
+            writer = CheckpointWriter(path, keep=2)
+            for step in range(1, 4):
+                writer.save(stub_model(step), step)
+            writer.close()
+            self.assertEqual(2, link.call_count)
+            self.assertEqual(['weights-2.h5', 'weights.h5'], sorted(os.listdir(directory)))
+            self.assertEqual('2', read_text(os.path.join(directory, 'weights-2.h5')))
+            self.assertEqual('3', read_text(path))
+
+
+class CheckpointWriter_should_raise_errors_of_writes(TestCase):
+    def test(self):
+        def write_odd(path: str, layers: list, weights: list) -> None:
+            if int(weights[1][0]) % 2 == 0:
+                raise IOError('disk full')
+            write_text(path, layers, weights)
+
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(checkpoint_writer, '_write_weights', write_odd):
+            path = os.path.join(directory, 'weights.h5')
+            writer = CheckpointWriter(path)
+            writer.save(stub_model(1), 1)
+            writer.save(stub_model(2), 2)
+            # the error of the writing thread raises in the calling thread
+            self.assertRaises(IOError, writer.flush)
+            # the last complete checkpoint is untouched
+            self.assertEqual('1', read_text(path))
+            # the error raises once
+            writer.save(stub_model(3), 3)
+            writer.flush()
+            self.assertEqual('3', read_text(path))
+            writer.save(stub_model(4), 4)
+            self.assertRaises(IOError, writer.close)
+            self.assertIsNone(writer._thread)
+
+
+class CheckpointWriter_should_flush_at_exit(TestCase):
+    def test(self):
+        with mock.patch('atexit.register') as register, \
+                mock.patch('atexit.unregister') as unregister:
+            writer = CheckpointWriter('weights.h5')
+            register.assert_called_once_with(writer.flush)
+            # flushing and closing without saves doesn't start a thread
+            writer.flush()
+            writer.close()
+            self.assertIsNone(writer._thread)
+            unregister.assert_called_once_with(writer.flush)
+
+
+class CheckpointWriter_should_not_block_saves_on_writes(TestCase):
+    def test(self):
+        writing = threading.Event()
+        written = threading.Event()
+
+        def write_slowly(path: str, layers: list, weights: list) -> None:
+            writing.set()
+            written.wait(10)
+            write_text(path, layers, weights)
+
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(checkpoint_writer, '_write_weights', write_slowly):
+            path = os.path.join(directory, 'weights.h5')
+            writer = CheckpointWriter(path)
+            writer.save(stub_model(1), 1)
+            self.assertTrue(writing.wait(10))
+            # the save returned before the write finished
+            self.assertFalse(os.path.exists(path))
+            written.set()
+            writer.close()
+            self.assertEqual('1', read_text(path))
+
+
+class CheckpointWriter_should_write_weights_like_keras(TestCase):
+    def test(self):
+        import h5py
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'weights.h5')
+            writer = CheckpointWriter(path)
+            writer.save(stub_model(7), 1)
+            writer.close()
+            with h5py.File(path, 'r') as weights_file:
+                self.assertEqual([b'dense_1'], list(weights_file.attrs['layer_names']))
+                self.assertIn('keras_version', weights_file.attrs)
+                group = weights_file['dense_1']
+                names = [b'dense_1/kernel:0', b'dense_1/bias:0']
+                self.assertEqual(names, list(group.attrs['weight_names']))
+                self.assertTrue(np.array_equal(np.full((2, 3), 7), group['dense_1/kernel:0'][...]))
+                self.assertTrue(np.array_equal(np.full(3, 7), group['dense_1/bias:0'][...]))